@@ -0,0 +1,11 @@
+"""
+Offline benchmarks for Yael.
+
+Runs the real engine, graph memory, profile and import code against
+deterministic stand-ins for Ollama, Graphiti/Neo4j and the embedding API
+(see fakes.py), so performance changes can be measured on any machine
+and compared across commits:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --compare <base-commit>
+"""
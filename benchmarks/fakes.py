@@ -0,0 +1,263 @@
+"""
+Deterministic stand-ins for Ollama, Graphiti and the embedding API.
+
+Latencies are modelled with asyncio.sleep, so everything Yael does
+around the backends (caching, queueing, concurrency, prompt assembly)
+is measured for real while the backends behave the same on every run.
+"""
+import asyncio
+import hashlib
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+from yael.tokens import estimate_tokens
+
+WORD = re.compile(r"[a-z][a-z0-9]{3,}")
+
+
+def words(text: str) -> set[str]:
+    return set(WORD.findall(text.lower()))
+
+
+class FakeLLM:
+    """Streaming chat model with a token rate and a single-slot KV cache.
+
+    Like Ollama, it only has to prefill the part of the prompt that
+    differs from the previous request (prompt + reply), so prompt layout
+    changes show up in time to first token and in `prompt_eval_count`.
+    """
+
+    def __init__(
+        self,
+        tokens_per_sec: float = 400.0,
+        prefill_tokens_per_sec: float = 8000.0,
+        reply_tokens: int = 40,
+    ):
+        self.tokens_per_sec = tokens_per_sec
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.reply_tokens = reply_tokens
+        self.model = "fake"
+        self.keep_alive = None
+        self.client = object()
+        self.last_stats: dict[str, int] = {}
+        self.requests = 0
+        # Full prompt size of every chat request (not summaries), to set
+        # prefill against
+        self.prompt_tokens = 0
+        self._cached: list[tuple[str, str]] = []
+
+    def _prefill(self, messages: list[dict]) -> tuple[int, int]:
+        """Return (prompt tokens, tokens that must be evaluated)."""
+        prompt = [(m["role"], m["content"]) for m in messages]
+        shared = 0
+        for cached, message in zip(self._cached, prompt):
+            if cached != message:
+                break
+            shared += 1
+        total = sum(estimate_tokens(content) for _, content in prompt)
+        reused = sum(estimate_tokens(content) for _, content in prompt[:shared])
+        return total, total - reused
+
+    def _reply(self, messages: list[dict]) -> list[str]:
+        seed = hashlib.sha256(messages[-1]["content"].encode()).hexdigest()
+        return [f"{seed[i % 60:i % 60 + 4]} " for i in range(self.reply_tokens)]
+
+    async def stream(self, messages: list[dict]):
+        self.prompt_tokens += self._prefill(messages)[0]
+        async for token in self._generate(messages):
+            yield token
+
+    async def _generate(self, messages: list[dict]):
+        self.requests += 1
+        self.last_stats = {}
+        total, evaluated = self._prefill(messages)
+        await asyncio.sleep(evaluated / self.prefill_tokens_per_sec)
+
+        reply = self._reply(messages)
+        for token in reply:
+            await asyncio.sleep(1 / self.tokens_per_sec)
+            yield token
+
+        self._cached = [(m["role"], m["content"]) for m in messages]
+        self._cached.append(("assistant", "".join(reply)))
+        self.last_stats = {
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(evaluated / self.prefill_tokens_per_sec * 1e9),
+            "eval_count": len(reply),
+            "eval_duration": int(len(reply) / self.tokens_per_sec * 1e9),
+            "load_duration": 0,
+            "total_duration": 0,
+        }
+
+    async def complete(self, messages: list[dict]) -> str:
+        return "".join([token async for token in self._generate(messages)])
+
+    async def preload(self) -> None:
+        pass
+
+    async def is_available(self) -> bool:
+        return True
+
+
+class FakeEmbedder:
+    """Hash-based embeddings with a per-request latency."""
+
+    def __init__(self, latency: float = 0.02, dim: int = 64):
+        self.latency = latency
+        self.dim = dim
+        self.requests = 0
+
+    def vector(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        for word in words(text) or {text}:
+            digest = hashlib.sha256(word.encode()).digest()
+            vector[digest[0] % self.dim] += 1.0
+        return vector
+
+    async def create(self, input_data) -> list[float]:
+        if isinstance(input_data, list):
+            input_data = input_data[0]
+        return (await self.create_batch([input_data]))[0]
+
+    async def create_batch(self, input_data_list: list[str]) -> list[list[float]]:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return [self.vector(text) for text in input_data_list]
+
+
+NAME = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*")
+
+
+def sentences(text: str) -> list[str]:
+    return [s.strip() for s in re.split(r"[.\n!?]+", text) if len(s.strip()) > 20]
+
+
+class FakeExtractionLLM:
+    """Extraction model: fixed latency per call, canned JSON response.
+
+    Asked for a structured graph (the embedded backend's response_model),
+    it links the user to the capitalized names in the first few sentences.
+    """
+
+    def __init__(self, latency: float = 0.1, facts_per_episode: int = 3):
+        self.latency = latency
+        self.facts_per_episode = facts_per_episode
+        self.requests = 0
+
+    async def generate_response(self, messages: list, response_model=None, **kwargs) -> dict:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if response_model is None:
+            return {"extracted": [sorted(words(messages[-1].content))[:8]]}
+
+        # Skip the source/date header
+        text = messages[-1].content.split("\n\n", 1)[-1]
+        facts = []
+        for sentence in sentences(text)[: self.facts_per_episode]:
+            name = next(iter(NAME.findall(sentence)), "User")
+            facts.append({"source": "User", "target": name, "relation": "MENTIONED", "fact": sentence[:200]})
+        names = {fact["target"] for fact in facts} | {"User"}
+        return {"entities": [{"name": name} for name in sorted(names)], "facts": facts}
+
+
+class FakeDriver:
+    def __init__(self, graphiti: "FakeGraphiti"):
+        self.graphiti = graphiti
+
+    async def execute_query(self, query: str, **kwargs):
+        await asyncio.sleep(self.graphiti.query_latency)
+        return SimpleNamespace(records=[{
+            "episodes": self.graphiti.episodes,
+            "latest": self.graphiti.latest,
+            "nodes": len(self.graphiti._index),
+            "edges": len(self.graphiti.facts),
+        }])
+
+
+class FakeGraphiti:
+    """In-memory knowledge graph with Graphiti's add/search interface.
+
+    Each episode becomes a few facts made from its sentences. Search cost
+    is a fixed latency plus a per-fact term, so it grows with the graph
+    the way an index scan would.
+    """
+
+    def __init__(
+        self,
+        llm_client=None,
+        embedder=None,
+        search_latency: float = 0.03,
+        search_latency_per_fact: float = 0.0,
+        extraction_calls: int = 2,
+        query_latency: float = 0.005,
+        facts_per_episode: int = 3,
+    ):
+        self.llm_client = llm_client or FakeExtractionLLM()
+        self.embedder = embedder
+        self.search_latency = search_latency
+        self.search_latency_per_fact = search_latency_per_fact
+        self.extraction_calls = extraction_calls
+        self.query_latency = query_latency
+        self.facts_per_episode = facts_per_episode
+
+        self.driver = FakeDriver(self)
+        self.facts: list[SimpleNamespace] = []
+        self._index: dict[str, list[int]] = {}
+        self.episodes = 0
+        self.latest: datetime | None = None
+
+    async def build_indices_and_constraints(self) -> None:
+        await asyncio.sleep(self.query_latency)
+
+    async def add_episode(self, episode_body: str, reference_time: datetime, **kwargs):
+        # Node extraction, then edge extraction, like Graphiti
+        for _ in range(self.extraction_calls):
+            await self.llm_client.generate_response([SimpleNamespace(content=episode_body)])
+        edges = self._extract(episode_body, reference_time)
+        if self.embedder is not None:
+            await self.embedder.create_batch([edge.fact for edge in edges])
+        return SimpleNamespace(nodes=[None] * (len(edges) + 1), edges=edges)
+
+    async def add_episode_bulk(self, episodes: list) -> SimpleNamespace:
+        # Bulk mode extracts episodes concurrently and skips edge invalidation
+        await asyncio.gather(*(
+            self.llm_client.generate_response([SimpleNamespace(content=episode.content)])
+            for episode in episodes
+        ))
+        edges = []
+        for episode in episodes:
+            edges.extend(self._extract(episode.content, episode.reference_time))
+        if self.embedder is not None:
+            await self.embedder.create_batch([edge.fact for edge in edges])
+        return SimpleNamespace(nodes=[None] * (len(edges) + len(episodes)), edges=edges)
+
+    async def search(self, query: str, num_results: int = 10) -> list:
+        if self.embedder is not None:
+            await self.embedder.create([query.replace("\n", " ")])
+        await asyncio.sleep(self.search_latency + self.search_latency_per_fact * len(self.facts))
+
+        scores: dict[int, int] = {}
+        for word in words(query):
+            for position in self._index.get(word, ()):
+                scores[position] = scores.get(position, 0) + 1
+        ranked = sorted(scores, key=lambda position: (-scores[position], -position))
+        return [self.facts[position] for position in ranked[:num_results]]
+
+    async def close(self) -> None:
+        pass
+
+    def _extract(self, body: str, reference_time: datetime) -> list[SimpleNamespace]:
+        edges = []
+        for sentence in sentences(body)[: self.facts_per_episode]:
+            edge = SimpleNamespace(fact=sentence[:200], score=None)
+            position = len(self.facts)
+            self.facts.append(edge)
+            for word in words(sentence):
+                self._index.setdefault(word, []).append(position)
+            edges.append(edge)
+
+        self.episodes += 1
+        if self.latest is None or reference_time.timestamp() > self.latest.timestamp():
+            self.latest = reference_time
+        return edges
@@ -0,0 +1,116 @@
+"""
+Setup helpers for benchmark scenarios.
+
+`isolate_home()` must run before any yael module that reads the config
+directory is imported: benchmarks get their own throwaway ~/.yael so
+they never touch (or are skewed by) the real one.
+"""
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .fakes import FakeEmbedder, FakeExtractionLLM, FakeGraphiti, FakeLLM
+
+
+def isolate_home() -> Path:
+    """Point HOME at a fresh temporary directory for this process."""
+    home = Path(tempfile.mkdtemp(prefix="yael-bench-"))
+    os.environ["HOME"] = str(home)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    return home
+
+
+def reset_home() -> None:
+    """Remove all state (caches, logs, indexes) from the benchmark ~/.yael."""
+    from yael.config import CONFIG_DIR
+
+    shutil.rmtree(CONFIG_DIR, ignore_errors=True)
+
+
+def fake_clients(embedding_latency: float = 0.02, extraction_latency: float = 0.1):
+    """Fake embedder and extraction LLM, governed and cached like the real ones."""
+    from yael.embeddings import CachedEmbedder
+    from yael.extraction import GovernedLLMClient
+    from yael.limits import governor
+
+    embedder = CachedEmbedder(FakeEmbedder(embedding_latency), governor=governor("embedding"))
+    llm_client = GovernedLLMClient(FakeExtractionLLM(extraction_latency), governor("extraction"))
+    return embedder, llm_client
+
+
+def fake_backends(
+    embedding_latency: float = 0.02,
+    extraction_latency: float = 0.1,
+    **graph_options,
+) -> FakeGraphiti:
+    """A fake Graphiti wired to governed, cached fake model clients."""
+    embedder, llm_client = fake_clients(embedding_latency, extraction_latency)
+    return FakeGraphiti(llm_client=llm_client, embedder=embedder, **graph_options)
+
+
+def use_fake_graphiti(graph, **backend_options) -> None:
+    """Swap a fake Graphiti into a graphiti-backed GraphMemory."""
+    graph.backend.graphiti = fake_backends(**backend_options)
+    graph.backend.embedder = graph.backend.graphiti.embedder
+
+
+def make_graph(index_name: str = "episodes.db", **backend_options):
+    """GraphMemory from the default config, backed by fakes and its own index."""
+    from yael.config import CONFIG_DIR, load_config
+    from yael.graph import GraphMemory
+    from yael.index import EpisodeIndex
+
+    graph = GraphMemory.from_config(load_config())
+    graph.index.close()
+    graph.index = EpisodeIndex(CONFIG_DIR / index_name)
+    use_fake_graphiti(graph, **backend_options)
+    return graph
+
+
+def make_embedded_graph(embedding_latency: float = 0.02, extraction_latency: float = 0.1):
+    """GraphMemory on the real embedded backend, with fake model clients."""
+    from yael.config import load_config
+    from yael.graph import GraphMemory
+
+    config = load_config()
+    config["graph"]["backend"] = "embedded"
+    graph = GraphMemory.from_config(config)
+    graph.backend.embedder, graph.backend.llm_client = fake_clients(embedding_latency, extraction_latency)
+    return graph
+
+
+def make_engine(llm_options: dict | None = None, **backend_options):
+    """ChatEngine with the fake LLM and fake graph backends swapped in."""
+    from yael.engine import ChatEngine
+
+    engine = ChatEngine()
+    # Don't wait for queued episode writes on close; they aren't measured
+    engine.config["episodes"]["flush_timeout"] = 0
+    llm = FakeLLM(**(llm_options or {}))
+    engine.llm = llm
+    engine.history.llm = llm
+    use_fake_graphiti(engine.graph, **backend_options)
+    return engine
+
+
+def seed_graph(graphiti: FakeGraphiti, texts: list[str]) -> None:
+    """Add facts directly, without extraction latency."""
+    from datetime import datetime
+
+    for text in texts:
+        graphiti._extract(text, datetime(2025, 1, 1))
+
+
+class Stopwatch:
+    """Milliseconds since creation (or the last lap)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    def lap(self) -> float:
+        now = time.perf_counter()
+        elapsed = (now - self.started) * 1000
+        self.started = now
+        return elapsed
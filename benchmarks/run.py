@@ -0,0 +1,132 @@
+"""
+Run the offline benchmarks and compare results across commits.
+
+    python -m benchmarks.run                      # all scenarios
+    python -m benchmarks.run --quick chat import  # a fast subset
+    python -m benchmarks.run --compare abc1234    # this commit vs abc1234
+
+Results are written to benchmarks/results/<commit>.json (with a -dirty
+suffix when the working tree has uncommitted changes).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from .harness import isolate_home
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+console = Console()
+
+
+def git_commit() -> str:
+    """Short commit hash of the working tree, marked -dirty if modified."""
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--untracked-files=no"):
+        commit += "-dirty"
+    return commit
+
+
+async def run(names: list[str], quick: bool) -> dict[str, dict[str, float]]:
+    from .scenarios import SCENARIOS
+
+    results = {}
+    for name in names:
+        console.print(f"[dim]Running {name}...[/dim]")
+        results[name] = await SCENARIOS[name](quick)
+    return results
+
+
+def print_results(results: dict[str, dict[str, float]], baseline: dict | None = None) -> None:
+    table = Table(title_justify="left")
+    table.add_column("Scenario")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    if baseline is not None:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right")
+
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            row = [scenario, metric, f"{value:.1f}"]
+            if baseline is not None:
+                before = baseline.get(scenario, {}).get(metric)
+                if before is None:
+                    row += ["-", ""]
+                else:
+                    change = (value - before) / before if before else 0.0
+                    row += [f"{before:.1f}", f"{change:+.0%}"]
+            table.add_row(*row)
+    console.print(table)
+
+
+def load_results(commit: str) -> dict:
+    path = RESULTS_DIR / f"{commit}.json"
+    if not path.exists():
+        matches = sorted(RESULTS_DIR.glob(f"{commit}*.json"))
+        if not matches:
+            raise FileNotFoundError(f"No results for {commit} in {RESULTS_DIR}")
+        path = matches[0]
+    return json.loads(path.read_text())
+
+
+def main() -> int:
+    isolate_home()
+    from .scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description="Run Yael's offline benchmarks.")
+    parser.add_argument(
+        "scenarios", nargs="*", metavar="SCENARIO",
+        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast check")
+    parser.add_argument("--compare", metavar="COMMIT", help="show changes against a saved run")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_results(args.compare)["scenarios"]
+        except FileNotFoundError as e:
+            console.print(f"[red]{e}[/red]")
+            return 1
+
+    names = args.scenarios or list(SCENARIOS)
+    results = asyncio.run(run(names, args.quick))
+    print_results(results, baseline)
+
+    if not args.no_save:
+        commit = git_commit()
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{commit}{'-quick' if args.quick else ''}.json"
+        path.write_text(json.dumps({
+            "commit": commit,
+            "quick": args.quick,
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenarios": results,
+        }, indent=2))
+        console.print(f"[dim]Saved {path}[/dim]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
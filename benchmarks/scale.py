@@ -0,0 +1,176 @@
+"""
+Search latency as the graph grows.
+
+Imports an export (usually one from benchmarks.synthetic) in stages and,
+after each stage, measures uncached search latency against the graph's
+size, then charts p95 against node count:
+
+    python -m benchmarks.synthetic /tmp/export --conversations 100000
+    python -m benchmarks.scale /tmp/export --stages 100,1000,10000,100000
+
+The default `fake` backend is the in-memory stand-in from the offline
+benchmarks, and `embedded` is the real embedded SQLite backend with fake
+model clients; both run offline. `--backend graphiti` imports into a real
+Neo4j with your config.yml's extraction and embedding settings; point
+`--uri` at a scratch database, since the benchmark writes to it.
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from rich.console import Console
+
+from .harness import Stopwatch, isolate_home
+from .run import RESULTS_DIR, git_commit
+
+DEFAULT_QUERIES = [
+    "What projects am I working on?",
+    "Who do I work with most?",
+    "Where do I live?",
+    "What tools do I use?",
+]
+
+console = Console()
+
+
+async def open_graph(backend: str, uri: str | None):
+    from yael.config import load_config
+    from yael.graph import GraphMemory
+
+    from .harness import make_embedded_graph, make_graph
+
+    # Fast model stand-ins for the offline backends: this measures search, not import
+    if backend == "fake":
+        graph = make_graph(
+            embedding_latency=0.001, extraction_latency=0.005, search_latency_per_fact=0.00002,
+        )
+    elif backend == "embedded":
+        graph = make_embedded_graph(embedding_latency=0.001, extraction_latency=0.005)
+        await graph.initialize()
+    else:
+        config = load_config()
+        if uri:
+            config["graph"]["uri"] = uri
+        graph = GraphMemory.from_config(config)
+        await graph.initialize()
+    # Measure the graph, not the retrieval cache
+    graph.cache = None
+    return graph
+
+
+async def measure_search(graph, queries: list[str], samples: int) -> dict[str, float]:
+    from yael.metrics import Histogram
+
+    latency = Histogram(window=samples)
+    for i in range(samples):
+        clock = Stopwatch()
+        await graph.search(queries[i % len(queries)])
+        latency.add(clock.lap())
+    return {"search_p50": latency.percentile(50), "search_p95": latency.percentile(95)}
+
+
+async def run(args) -> list[dict]:
+    from yael.export import ExportReader
+    from yael.importer import ImportStats, import_conversations
+
+    queries_file = args.export / "benchmark_queries.json"
+    queries = json.loads(queries_file.read_text()) if queries_file.exists() else DEFAULT_QUERIES
+
+    graph = await open_graph(args.backend, args.uri)
+    items = ExportReader.open(args.export).items(args.max_tokens)
+    stats = ImportStats()
+    rows = []
+    imported = 0
+
+    def take(count: int):
+        nonlocal imported
+        for item in islice(items, count):
+            imported += 1
+            yield item
+
+    try:
+        for stage in args.stages:
+            started = time.perf_counter()
+            await import_conversations(
+                graph, take(stage - imported),
+                concurrency=args.concurrency, bulk_size=args.bulk, stats=stats,
+            )
+            row = {
+                "items": imported,
+                "episodes": stats.episodes,
+                "import_seconds": time.perf_counter() - started,
+                **await graph.size(),
+                **await measure_search(graph, queries, args.samples),
+            }
+            rows.append(row)
+            console.print(
+                f"[dim]{imported} items: {row['nodes']} nodes, {row['edges']} edges, "
+                f"search p95 {row['search_p95']:.1f}ms[/dim]"
+            )
+            if imported < stage:
+                break  # The export is smaller than the remaining stages
+    finally:
+        await graph.close()
+    return rows
+
+
+def chart(rows: list[dict], width: int = 50) -> str:
+    """Horizontal bar chart of search p95 against node count."""
+    peak = max((row["search_p95"] for row in rows), default=0) or 1
+    lines = [f"{'nodes':>10}  {'edges':>10}  {'p95 ms':>8}"]
+    for row in rows:
+        bar = "█" * max(round(row["search_p95"] / peak * width), 1)
+        lines.append(f"{row['nodes']:>10}  {row['edges']:>10}  {row['search_p95']:>8.1f}  {bar}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chart search latency against graph size.")
+    parser.add_argument("export", type=Path, help="export directory to import")
+    parser.add_argument(
+        "--stages", default="100,1000,10000",
+        help="cumulative export items to have imported at each measurement "
+             "(default: %(default)s)",
+    )
+    parser.add_argument("--backend", choices=["fake", "embedded", "graphiti"], default="fake")
+    parser.add_argument("--uri", help="Neo4j URI for the graphiti backend (use a scratch database)")
+    parser.add_argument("--samples", type=int, default=50, help="searches per stage (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="(default: %(default)s)")
+    parser.add_argument("--bulk", type=int, default=0, metavar="N", help="bulk ingestion batch size")
+    parser.add_argument("--max-tokens", type=int, default=2000, help="episode size (default: %(default)s)")
+    args = parser.parse_args()
+    args.stages = sorted(int(stage) for stage in args.stages.split(","))
+    if not args.export.is_dir():
+        parser.error(f"not an export directory: {args.export}")
+
+    # A throwaway home keeps caches and the episode index out of ~/.yael,
+    # but a real backend should still use the real extraction settings
+    user_config = Path.home() / ".yael" / "config.yml"
+    home = isolate_home()
+    if args.backend == "graphiti" and user_config.exists():
+        (home / ".yael").mkdir()
+        shutil.copy(user_config, home / ".yael" / "config.yml")
+
+    rows = asyncio.run(run(args))
+    print(chart(rows))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"scale-{args.backend}-{git_commit()}.json"
+    path.write_text(json.dumps({
+        "created_at": datetime.now().isoformat(),
+        "export": str(args.export),
+        "backend": args.backend,
+        "stages": rows,
+    }, indent=2))
+    console.print(f"[dim]Saved {path}[/dim]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
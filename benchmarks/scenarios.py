@@ -0,0 +1,308 @@
+"""
+Benchmark scenarios.
+
+Each scenario is an async function taking `quick` (smaller sizes for a
+fast run) and returning a flat dict of metrics. Times are milliseconds
+unless the name says otherwise.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from yael.metrics import Histogram
+
+from .harness import Stopwatch, make_engine, make_graph, reset_home, seed_graph
+
+TOPICS = [
+    "the Rust rewrite of the ingestion service",
+    "training for the Berlin marathon in April",
+    "migrating the team wiki from Confluence to Notion",
+    "the sourdough starter that keeps dying",
+    "Neo4j query tuning for the recommendation graph",
+    "planning a trip to Kyoto with Maya",
+    "learning Hebrew with spaced repetition",
+    "the home lab Proxmox cluster",
+    "writing the grant proposal for the reading program",
+    "debugging flaky CI on the payments repo",
+]
+
+QUESTIONS = [
+    "How is the Rust rewrite going?",
+    "What did we decide about the marathon training plan?",
+    "Remind me what was blocking the wiki migration.",
+    "Any ideas for the sourdough starter?",
+    "Which Neo4j queries were slow last time?",
+    "What's left to plan for Kyoto?",
+    "How should I schedule my Hebrew reviews?",
+    "What was wrong with the Proxmox cluster?",
+]
+# Asked after the question at the same position; they name only things the
+# question named, so a prefetch started from the question can answer them
+FOLLOW_UPS = [
+    "Is Rust still the right choice there?",
+    "Should I add a rest day to it?",
+    "Would a smaller wiki be easier to move?",
+    "Should I feed it more often?",
+    "Would an index help Neo4j with those?",
+    "Is Kyoto busy in spring?",
+    "Does Hebrew need daily reviews?",
+    "Should I rebuild Proxmox from scratch?",
+]
+
+
+def corpus(count: int, seed: int = 0) -> list[str]:
+    """Sentences about recurring topics, for seeding the fake graph."""
+    rng = random.Random(seed)
+    verbs = ["decided on", "struggled with", "made progress on", "asked about", "postponed"]
+    return [
+        f"The user {rng.choice(verbs)} {rng.choice(TOPICS)} in week {i % 52}. "
+        f"They mentioned {rng.choice(TOPICS)} as related context for this."
+        for i in range(count)
+    ]
+
+
+def summarize(prefix: str, histogram: Histogram) -> dict[str, float]:
+    return {f"{prefix}_p50": histogram.percentile(50), f"{prefix}_p95": histogram.percentile(95)}
+
+
+async def run_turns(
+    engine, turns: int, pause: float = 0.0, start: int = 0, follow_ups: bool = False,
+) -> dict[str, Histogram]:
+    """Chat for `turns` turns; return user-perceived latency histograms.
+
+    `pause` is the user's think time between turns, in seconds, and
+    `start` numbers the turns so separate runs don't repeat messages.
+    With `follow_ups`, every other turn follows up on the question before
+    it instead of changing the subject. Also records how many graph extraction calls were running as each
+    turn started.
+    """
+    from yael.limits import governor
+
+    first_token, total, writes = Histogram(), Histogram(), Histogram()
+    for turn in range(start, start + turns):
+        if pause and turn > start:
+            await asyncio.sleep(pause)
+        writes.add(governor("extraction").stats()["active"])
+        clock = Stopwatch()
+        first = None
+        if follow_ups:
+            message = (FOLLOW_UPS if turn % 2 else QUESTIONS)[turn // 2 % len(QUESTIONS)]
+        else:
+            message = QUESTIONS[turn % len(QUESTIONS)]
+        async for _ in engine.chat(message + f" (turn {turn})"):
+            if first is None:
+                first = clock.lap()
+        total.add(first + clock.lap())
+        first_token.add(first)
+    return {"first_token": first_token, "turn": total, "writes_in_flight": writes}
+
+
+async def startup(quick: bool) -> dict[str, float]:
+    """Engine construction, time until chat is possible, and full setup, cold and warm.
+
+    Cold has no cached profile; warm reuses the one the cold run saved.
+    """
+    from .harness import fake_backends
+
+    reset_home()
+    fake_backends()  # Import the fakes' dependencies outside the timed region
+
+    results = {}
+    for phase in ("cold", "warm"):
+        clock = Stopwatch()
+        engine = make_engine()
+        construct = clock.lap()
+        seed_graph(engine.graph.backend.graphiti, corpus(200))
+        clock.lap()
+
+        engine.start()
+        await engine._ready_task
+        ready = construct + clock.lap()
+        await engine.setup_task
+        results[f"{phase}_construct"] = construct
+        results[f"{phase}_ready"] = ready
+        results[f"{phase}_setup"] = ready + clock.lap()
+        await engine.close()
+    return results
+
+
+async def chat(quick: bool) -> dict[str, float]:
+    """Short session against a seeded graph: turn latency, TTFT, retrieval, episodes written.
+
+    Half the turns are follow-ups, which prefetches started while the
+    previous reply streamed should answer.
+    """
+    reset_home()
+    engine = make_engine()
+    seed_graph(engine.graph.backend.graphiti, corpus(500))
+    engine.start()
+    await engine.setup_task
+
+    turns = 10 if quick else 40
+    latency = await run_turns(engine, turns, follow_ups=True)
+    stats = engine.metrics.summary()
+    prefetch = engine.prefetcher.stats()
+    await engine.close()
+    if not prefetch["hits"]:
+        raise RuntimeError(f"no follow-up was answered from a prefetch ({prefetch})")
+    return {
+        "episodes_per_turn": engine.batcher.flushed / turns,
+        "searches_per_turn": engine.gate.decisions["search"] / turns,
+        "prefetch_hit_rate": prefetch["hit_rate"],
+        **summarize("turn", latency["turn"]),
+        **summarize("first_token", latency["first_token"]),
+        "retrieval_p50": stats["retrieval"]["p50"],
+        "retrieval_p95": stats["retrieval"]["p95"],
+        "model_ttft_p95": stats["ttft"]["p95"],
+    }
+
+
+async def long_session(quick: bool) -> dict[str, float]:
+    """Long session with long replies, for each prompt layout.
+
+    Shows how time to first token and prefilled tokens evolve as the
+    history grows (and gets summarized).
+    """
+    results = {}
+    turns = 30 if quick else 120
+    for layout in ("stable", "legacy"):
+        reset_home()
+        engine = make_engine(llm_options={"reply_tokens": 150, "tokens_per_sec": 2000})
+        engine.prompt_layout = layout
+        seed_graph(engine.graph.backend.graphiti, corpus(300))
+        engine.start()
+        await engine.setup_task
+
+        latency = await run_turns(engine, turns)
+        prefill = engine.prefill
+        results.update({
+            f"{layout}_{name}": value
+            for name, value in summarize("first_token", latency["first_token"]).items()
+        })
+        results[f"{layout}_prefill_tokens_per_turn"] = prefill["evaluated_tokens"] / prefill["turns"]
+        results[f"{layout}_prompt_tokens_per_turn"] = engine.llm.prompt_tokens / prefill["turns"]
+        await engine.close()
+    return results
+
+
+async def profile(quick: bool) -> dict[str, float]:
+    """Profile build on a seeded graph: cold, with warm caches, and unchanged refresh."""
+    from yael.profile import build_user_profile, refresh_profile
+    from yael.config import CONFIG_DIR
+
+    reset_home()
+    graph = make_graph(search_latency_per_fact=0.00002)
+    seed_graph(graph.backend.graphiti, corpus(1000 if quick else 5000))
+    path = CONFIG_DIR / "profile.json"
+
+    clock = Stopwatch()
+    await refresh_profile(graph, path)
+    results = {"cold_build": clock.lap()}
+    await build_user_profile(graph)
+    results["cached_build"] = clock.lap()
+
+    cached = {"marker": await graph.change_marker()}
+    clock.lap()
+    await refresh_profile(graph, path, cached)
+    results["unchanged_refresh"] = clock.lap()
+    await graph.close()
+    return results
+
+
+def conversations(count: int, seed: int = 0) -> list[dict]:
+    """Claude-export-shaped conversations about the benchmark topics."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    result = []
+    for i in range(count):
+        created = start + timedelta(hours=7 * i)
+        messages = []
+        for j in range(rng.randint(2, 8)):
+            topic = rng.choice(TOPICS)
+            sender = "human" if j % 2 == 0 else "assistant"
+            text = f"Talking about {topic}. " * rng.randint(5, 40)
+            messages.append({
+                "sender": sender,
+                "text": text,
+                "created_at": (created + timedelta(minutes=j)).isoformat() + "Z",
+            })
+        result.append({
+            "uuid": f"bench-{seed}-{i}",
+            "name": rng.choice(TOPICS).capitalize(),
+            "created_at": created.isoformat() + "Z",
+            "updated_at": created.isoformat() + "Z",
+            "chat_messages": messages,
+        })
+    return result
+
+
+async def import_throughput(quick: bool) -> dict[str, float]:
+    """Import throughput (episodes/minute) at several concurrency and bulk settings."""
+    from yael.export import conversation_episodes
+    from yael.importer import ImportStats, import_conversations
+    from yael.limits import governor
+
+    convos = conversations(30 if quick else 150)
+    items = [conversation_episodes(convo, max_tokens=500) for convo in convos]
+    items = [item for item in items if item]
+
+    results = {}
+    for name, concurrency, bulk in (("c1", 1, 0), ("c4", 4, 0), ("c8", 8, 0), ("c4_bulk8", 4, 8)):
+        reset_home()
+        graph = make_graph(index_name=f"{name}.db")
+        governor("extraction").configure(max(concurrency, bulk))
+        stats = ImportStats()
+        graph.on_ingest = stats.record_cost
+        await import_conversations(graph, items, concurrency=concurrency, bulk_size=bulk, stats=stats)
+        results[f"{name}_episodes_per_minute"] = stats.episode_rate
+        results[f"{name}_llm_calls_per_episode"] = stats.cost.per_episode().get("llm_calls", 0.0)
+        await graph.close()
+    governor("extraction").configure(4)
+    return results
+
+
+async def concurrent_writes(quick: bool) -> dict[str, float]:
+    """Turn latency while a backlog of episode writes drains in the background.
+
+    The scheduler pauses background writes during a reply, so the user's
+    think time between turns is what lets the backlog drain. It is kept
+    shorter than one extraction, so writes started in a pause are still
+    running when the next turn begins. Both phases use the same pause and
+    start from warm caches, so only the backlog differs.
+    """
+    reset_home()
+    engine = make_engine(extraction_latency=0.3)
+    seed_graph(engine.graph.backend.graphiti, corpus(500))
+    engine.start()
+    await engine.setup_task
+
+    turns, pause = (8 if quick else 24), 0.2
+    await run_turns(engine, 1, start=-1)  # Warm up
+    idle = await run_turns(engine, turns, pause)
+    await engine.episodes._queue.join()
+
+    for text in corpus(40 if quick else 120, seed=1):
+        engine.episodes.put(text)
+    busy = await run_turns(engine, turns, pause, start=turns)
+    backlog = engine.episodes.pending
+    await engine.close()
+    busy_turns = sum(1 for count in busy["writes_in_flight"].samples if count)
+    if busy_turns < turns - 1:
+        # Only the first busy turn may start before any write does
+        raise RuntimeError(f"writes were in flight for only {busy_turns} of {turns} busy turns")
+    return {
+        **summarize("idle_turn", idle["turn"]),
+        **summarize("busy_turn", busy["turn"]),
+        "busy_turns_with_writes": busy_turns / turns,
+        "backlog_after_turns": backlog,
+    }
+
+
+SCENARIOS = {
+    "startup": startup,
+    "chat": chat,
+    "long_session": long_session,
+    "profile": profile,
+    "import": import_throughput,
+    "concurrent_writes": concurrent_writes,
+}
@@ -0,0 +1,280 @@
+"""
+Synthetic Claude exports for scale testing.
+
+Generates conversations.json, memories.json, projects.json and users.json
+shaped like a real export, at any size from a handful to millions of
+conversations. Conversations are written as they are generated, so
+memory use stays flat however large the export is.
+
+The content is built from a fixed "world" of people, projects, places
+and tools chosen with a skewed (Zipf-like) distribution, so the same
+entities recur across conversations the way they do in real history.
+Conversations are spread over a configurable time span, projects are
+only discussed while active, and some facts change over time (where
+the user lives, people's roles), which exercises temporal edges.
+
+    python -m benchmarks.synthetic out/ --conversations 10000
+"""
+import argparse
+import json
+import random
+import sys
+import uuid
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+
+FIRST_NAMES = [
+    "Maya", "Noam", "Priya", "Lucas", "Amara", "Kenji", "Sofia", "Tomas", "Leila", "Arjun",
+    "Hana", "Mateo", "Ines", "Olu", "Freya", "Dmitri", "Chloe", "Yusuf", "Elena", "Ravi",
+]
+LAST_NAMES = [
+    "Cohen", "Okafor", "Tanaka", "Silva", "Novak", "Haddad", "Berg", "Mendes", "Kaur", "Rossi",
+]
+PLACES = [
+    "Berlin", "Lisbon", "Tel Aviv", "Kyoto", "Toronto", "Nairobi", "Oaxaca", "Tallinn",
+    "Melbourne", "Edinburgh", "Seoul", "Porto",
+]
+TOOLS = [
+    "Rust", "Neo4j", "PostgreSQL", "Kubernetes", "PyTorch", "React", "Terraform", "DuckDB",
+    "Ollama", "Grafana", "Kafka", "SQLite", "Svelte", "Proxmox",
+]
+ROLES = ["engineer", "tech lead", "manager", "designer", "researcher", "founder", "advisor"]
+HOBBIES = [
+    "sourdough baking", "trail running", "bouldering", "learning Hebrew", "film photography",
+    "chess openings", "woodworking", "birdwatching", "jazz piano", "urban sketching",
+]
+PROJECT_NOUNS = [
+    "ingestion pipeline", "recommendation graph", "billing service", "mobile app", "data warehouse",
+    "home lab", "grant proposal", "research paper", "design system", "CLI tool", "search index",
+]
+
+QUESTIONS = [
+    "Can you help me think through {topic}?",
+    "I'm stuck on {topic} again. {person} suggested using {tool} - thoughts?",
+    "Quick question about {topic}: how would you structure it?",
+    "{person} and I disagree about {topic}. Can you weigh in?",
+    "What's a good way to get started with {tool} for {topic}?",
+    "Can you review my plan for {topic} before I send it to {person}?",
+]
+ANSWERS = [
+    "For {topic}, I'd start by narrowing the scope. {tool} is a reasonable fit if the data is already there.",
+    "{person}'s suggestion makes sense, but watch the trade-offs: {tool} adds operational overhead.",
+    "A simple first step for {topic} is to write down the constraints and measure before optimizing.",
+    "Given you're in {place}, it may be easier to meet {person} in person and settle {topic} quickly.",
+    "I'd split {topic} into smaller milestones so each one can be checked independently.",
+]
+FOLLOW_UPS = [
+    "That helps. I moved to {place} recently, so timing is tricky.",
+    "{person} just became {role}, so they'll own part of {topic} now.",
+    "Makes sense. I'll try {tool} this week and report back.",
+    "Good point. I spent the weekend on {hobby} instead, so I'm behind.",
+    "OK, the deadline for {topic} moved to next month.",
+]
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> list[float]:
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class World:
+    """The recurring people, projects and facts a synthetic user talks about."""
+
+    def __init__(self, rng: random.Random, start: datetime, span: timedelta, projects: int, people: int):
+        self.rng = rng
+        self.start = start
+        self.span = span
+        self.user = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        self.user_uuid = str(uuid.UUID(int=rng.getrandbits(128)))
+
+        self.people = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(people)]
+        self.tools = rng.sample(TOOLS, len(TOOLS))
+        self.hobbies = rng.sample(HOBBIES, 3)
+
+        # Projects are active for a window of the span, and discussed only then
+        self.projects = []
+        for i in range(projects):
+            begin = start + span * rng.random() * 0.9
+            length = span * rng.uniform(0.05, 0.4)
+            self.projects.append({
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "name": f"{rng.choice(self.tools)} {rng.choice(PROJECT_NOUNS)}",
+                "begin": begin,
+                "end": begin + length,
+            })
+
+        # Facts that change over time: where the user lives, people's roles
+        moves = sorted(start + span * rng.random() for _ in range(3))
+        self.homes = list(zip([start] + moves, rng.sample(PLACES, 4)))
+        self.roles = {person: rng.choice(ROLES) for person in self.people}
+
+        self._people_weights = zipf_weights(len(self.people))
+        self._tool_weights = zipf_weights(len(self.tools))
+
+    def person(self) -> str:
+        return self.people[bisect(self._people_weights, self.rng.random() * self._people_weights[-1])]
+
+    def tool(self) -> str:
+        return self.tools[bisect(self._tool_weights, self.rng.random() * self._tool_weights[-1])]
+
+    def home(self, when: datetime) -> str:
+        return [place for since, place in self.homes if since <= when][-1]
+
+    def topic(self, when: datetime) -> tuple[str, dict | None]:
+        active = [p for p in self.projects if p["begin"] <= when <= p["end"]]
+        if active and self.rng.random() < 0.7:
+            project = self.rng.choice(active)
+            return f"the {project['name']}", project
+        return self.rng.choice(self.hobbies), None
+
+    def conversation(self, index: int, total: int) -> dict:
+        rng = self.rng
+        # Evenly spread with jitter, during waking hours
+        day = self.start + self.span * ((index + rng.random()) / total)
+        created = day.replace(hour=rng.randint(8, 23), minute=rng.randint(0, 59))
+        topic, project = self.topic(created)
+
+        slots = {"topic": topic, "person": self.person(), "tool": self.tool(), "place": self.home(created)}
+        messages = []
+        turns = min(1 + int(rng.expovariate(1 / 4)), 20)
+        when = created
+        for turn in range(turns):
+            person = slots["person"]
+            if rng.random() < 0.05:
+                # Someone changes role; later conversations see the new one
+                self.roles[person] = rng.choice(ROLES)
+            slots.update(role=self.roles[person], hobby=rng.choice(self.hobbies))
+
+            question = rng.choice(QUESTIONS if turn == 0 else FOLLOW_UPS).format(**slots)
+            answer = " ".join(
+                rng.choice(ANSWERS).format(**slots) for _ in range(rng.randint(1, 6))
+            )
+            for sender, text in (("human", question), ("assistant", answer)):
+                messages.append({
+                    "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "text": text,
+                    "sender": sender,
+                    "created_at": when.isoformat(),
+                })
+                when += timedelta(seconds=rng.randint(5, 300))
+
+        return {
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": topic[0].upper() + topic[1:] if project is None else project["name"].title(),
+            "created_at": created.isoformat(),
+            "updated_at": when.isoformat(),
+            "chat_messages": messages,
+        }
+
+    def memories(self) -> list[dict]:
+        people = ", ".join(f"{p} ({self.roles[p]})" for p in self.people[:5])
+        summary = (
+            f"**Personal context**\n\n{self.user} lives in {self.homes[-1][1]} and enjoys "
+            f"{', '.join(self.hobbies)}.\n\n**Work context**\n\nWorks mostly with "
+            f"{', '.join(self.tools[:4])}. Frequent collaborators: {people}."
+        )
+        project_memories = {
+            project["uuid"]: f"{project['name']}: ran from {project['begin']:%B %Y} to {project['end']:%B %Y}."
+            for project in self.projects
+        }
+        return [{
+            "conversations_memory": summary,
+            "project_memories": project_memories,
+            "account_uuid": self.user_uuid,
+        }]
+
+    def project_records(self) -> list[dict]:
+        records = []
+        for project in self.projects:
+            owner = self.rng.choice(self.people)
+            records.append({
+                "uuid": project["uuid"],
+                "name": project["name"].title(),
+                "description": f"Working notes for the {project['name']} with {owner}.",
+                "is_private": True,
+                "is_starter_project": False,
+                "prompt_template": "",
+                "created_at": project["begin"].isoformat(),
+                "updated_at": project["end"].isoformat(),
+                "creator": {"uuid": self.user_uuid, "full_name": self.user},
+                "docs": [{
+                    "uuid": str(uuid.UUID(int=self.rng.getrandbits(128))),
+                    "filename": "plan.md",
+                    "content": f"# {project['name'].title()}\n\nOwner: {owner}. Built on {self.tool()}.\n",
+                    "created_at": project["begin"].isoformat(),
+                }],
+            })
+        return records
+
+    def queries(self) -> list[str]:
+        """Questions a user might ask, for retrieval benchmarks."""
+        queries = [f"What do I know about {person}?" for person in self.people[:10]]
+        queries += [f"How is the {project['name']} going?" for project in self.projects[:10]]
+        queries += [f"What have I used {tool} for?" for tool in self.tools[:5]]
+        queries += ["Where do I live?", "What are my hobbies?"]
+        return queries
+
+
+def generate(
+    out: Path,
+    conversations: int,
+    projects: int = 20,
+    people: int = 40,
+    span_days: int = 730,
+    seed: int = 0,
+    on_progress=None,
+) -> Path:
+    """Write a synthetic export batch to `out` and return its path."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    world = World(rng, start, timedelta(days=span_days), projects, people)
+    out.mkdir(parents=True, exist_ok=True)
+
+    with open(out / "conversations.json", "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(conversations):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(world.conversation(i, conversations)))
+            if on_progress is not None and (i + 1) % 1000 == 0:
+                on_progress(i + 1)
+        f.write("]\n")
+
+    # Written last, so memories reflect the end state of the world
+    (out / "users.json").write_text(json.dumps([{
+        "uuid": world.user_uuid,
+        "full_name": world.user,
+        "email_address": "user@example.com",
+        "verified_phone_number": None,
+    }]))
+    (out / "memories.json").write_text(json.dumps(world.memories()))
+    (out / "projects.json").write_text(json.dumps(world.project_records()))
+    (out / "benchmark_queries.json").write_text(json.dumps(world.queries()))
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Claude export.")
+    parser.add_argument("out", type=Path, help="directory to write the export to")
+    parser.add_argument("--conversations", type=int, default=1000, help="(default: %(default)s)")
+    parser.add_argument("--projects", type=int, default=20, help="(default: %(default)s)")
+    parser.add_argument("--people", type=int, default=40, help="(default: %(default)s)")
+    parser.add_argument("--span-days", type=int, default=730, help="time span covered (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="(default: %(default)s)")
+    args = parser.parse_args()
+
+    def on_progress(done: int) -> None:
+        if done % max(args.conversations // 10, 1000) == 0:
+            print(f"{done}/{args.conversations} conversations", file=sys.stderr)
+
+    generate(
+        args.out, args.conversations, args.projects, args.people,
+        args.span_days, args.seed, on_progress,
+    )
+    print(f"Wrote {args.conversations} conversations to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
-"""Import Claude conversation export into Yael's graph memory."""
+"""Import a Claude data export into Yael's graph memory.
+
+Accepts a single conversations.json or a whole export directory, in which
+case users.json, memories.json and projects.json are ingested too.
+"""
+import argparse
 import json
 import sys
 import asyncio
-from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+)
 
 # Load environment
 load_dotenv()
@@ -16,170 +26,239 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from yael.graph import GraphMemory
-from yael.config import load_config, get_openai_key
+from yael.config import CONFIG_DIR, load_config
+from yael.export import SOURCES, ExportReader
+from yael.importer import Checkpoint, ImportStats, SyncState, import_conversations
+from yael.scheduler import ACTIVITY_FILE, Scheduler
 
 console = Console()
 
 
-def parse_claude_export(export_path: Path) -> list[dict]:
-    """Parse Claude's conversations.json export.
-
-    Claude export format:
-    [
-        {
-            "uuid": "...",
-            "name": "Conversation Title",
-            "created_at": "2024-...",
-            "updated_at": "2024-...",
-            "chat_messages": [
-                {
-                    "uuid": "...",
-                    "text": "message content",
-                    "sender": "human" | "assistant",
-                    "created_at": "...",
-                }
-            ]
-        }
-    ]
-    """
-    with open(export_path) as f:
-        data = json.load(f)
-
-    episodes = []
-
-    for convo in data:
-        messages = convo.get("chat_messages", [])
-        if not messages:
-            continue
-
-        # Group into exchanges
-        convo_title = convo.get("name", "Untitled")
-        created = convo.get("created_at", "")
-
-        # Build episode from full conversation
-        episode_parts = [f"# {convo_title}"]
-
-        for msg in messages:
-            sender = msg.get("sender", "human")
-            text = msg.get("text", "")
-
-            if sender == "human":
-                episode_parts.append(f"User: {text}")
-            else:
-                episode_parts.append(f"Assistant: {text}")
-
-        # Parse timestamp
-        try:
-            if created:
-                timestamp = datetime.fromisoformat(created.replace("Z", "+00:00"))
-            else:
-                timestamp = datetime.now()
-        except Exception:
-            timestamp = datetime.now()
-
-        episodes.append({
-            "content": "\n\n".join(episode_parts),
-            "timestamp": timestamp,
-            "source": f"claude_export:{convo.get('uuid', 'unknown')}",
-        })
-
-    return episodes
-
-
-async def import_episodes(graph: GraphMemory, episodes: list[dict]) -> int:
-    """Import episodes into graph."""
-    imported = 0
-
-    for episode in episodes:
-        try:
-            await graph.add_episode(
-                content=episode["content"],
-                source=episode["source"],
-                timestamp=episode["timestamp"],
-            )
-            imported += 1
-        except Exception as e:
-            console.print(f"[yellow]Warning: Failed to import episode: {e}[/yellow]")
-
-    return imported
+def format_eta(seconds: float | None) -> str:
+    """Format an ETA in seconds for the progress line."""
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def print_cost(stats: ImportStats) -> None:
+    """Print throughput and what an average episode cost to ingest."""
+    cost = stats.cost
+    if not cost.episodes:
+        return
+    average = cost.per_episode()
+    console.print(
+        f"[dim]{cost.episodes} episodes at {stats.episode_rate:.1f}/min; per episode: "
+        f"{average['seconds']:.1f}s, {average['llm_calls']:.1f} LLM calls "
+        f"(~{average['input_tokens'] + average['output_tokens']:.0f} tokens), "
+        f"{average['embedded_texts']:.1f} embeddings "
+        f"(+{average['cached_embeddings']:.1f} cached), "
+        f"{average['nodes']:.1f} nodes, {average['edges']:.1f} edges[/dim]"
+    )
+    console.print(
+        f"[dim]Total: {cost.llm_calls} LLM calls, ~{cost.input_tokens} input + "
+        f"~{cost.output_tokens} output tokens, {cost.embedding_calls} embedding requests[/dim]"
+    )
+
+
+def parse_args(config: dict) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Import a Claude conversation export into Yael's graph memory.",
+        epilog="Export from claude.ai → Settings → Export Data, then extract the ZIP.",
+    )
+    parser.add_argument(
+        "export_path", type=Path,
+        help="export directory (data-*/) or a single conversations.json",
+    )
+    parser.add_argument(
+        "--sources", default=",".join(SOURCES),
+        help="comma-separated export files to ingest, in order "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=config["import"]["concurrency"],
+        help="conversations to import in parallel (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--bulk", type=int, default=config["import"]["bulk_size"], metavar="N",
+        help="use Graphiti bulk ingestion in batches of N episodes (default: off)",
+    )
+    parser.add_argument(
+        "--max-tokens", type=int, default=config["import"]["max_episode_tokens"],
+        help="split conversations into episodes of at most this many tokens, "
+             "0 to disable (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path, default=CONFIG_DIR / "import_checkpoint.txt",
+        help="file of completed conversation and document keys (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only import new conversations and messages added since the last "
+             "incremental run",
+    )
+    parser.add_argument(
+        "--state", type=Path, default=CONFIG_DIR / "import_state.jsonl",
+        help="incremental sync state file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="write episodes even if identical content was ingested before",
+    )
+    parser.add_argument(
+        "--restart", action="store_true",
+        help="ignore the checkpoint and import everything again",
+    )
+    parser.add_argument(
+        "--report", type=Path, metavar="PATH",
+        help="write a JSON report of throughput and per-episode cost to PATH",
+    )
+    return parser.parse_args()
 
 
 async def main_async():
-    if len(sys.argv) < 2:
-        console.print("[red]Usage: python import_claude.py <path_to_conversations.json>[/red]")
-        console.print("\nTo export from Claude:")
-        console.print("  1. Go to claude.ai → Settings → Export Data")
-        console.print("  2. Download and extract the ZIP")
-        console.print("  3. Run: python scripts/import_claude.py path/to/conversations.json")
-        return 1
+    config = load_config()
+    args = parse_args(config)
 
-    export_path = Path(sys.argv[1])
+    export_path = args.export_path
     if not export_path.exists():
         console.print(f"[red]File not found: {export_path}[/red]")
         return 1
 
-    console.print(f"[dim]Loading export from {export_path}...[/dim]")
-
-    # Parse export
-    try:
-        episodes = parse_claude_export(export_path)
-        console.print(f"[green]Found {len(episodes)} conversations[/green]")
-    except Exception as e:
-        console.print(f"[red]Failed to parse export: {e}[/red]")
+    sources = [name.strip() for name in args.sources.split(",") if name.strip()]
+    unknown = [name for name in sources if name not in SOURCES]
+    if unknown:
+        console.print(f"[red]Unknown sources: {', '.join(unknown)}[/red]")
         return 1
 
-    if not episodes:
-        console.print("[yellow]No conversations to import.[/yellow]")
+    reader = ExportReader.open(export_path, sources)
+    if not reader.files:
+        console.print("[yellow]No export files to import.[/yellow]")
         return 0
 
+    # Incremental mode tracks per-conversation versions instead of UUIDs
+    tracker_path = args.state if args.incremental else args.checkpoint
+    if args.restart:
+        tracker_path.unlink(missing_ok=True)
+    checkpoint = SyncState(tracker_path) if args.incremental else Checkpoint(tracker_path)
+
+    if args.incremental and checkpoint.conversations:
+        console.print(f"[dim]Syncing changes to {len(checkpoint.conversations)} known conversations[/dim]")
+
     # Initialize graph
     try:
-        config = load_config()
-        graph = GraphMemory(
-            neo4j_uri=config["graph"]["uri"],
-            neo4j_user=config["graph"]["user"],
-            neo4j_password=config["graph"]["password"],
-            neo4j_database=config["graph"]["database"],
-            openai_api_key=get_openai_key(),
-            embedding_model=config["embeddings"]["model"],
-        )
+        graph = GraphMemory.from_config(config)
 
         await graph.initialize()
         console.print("  [green]✓ Connected to graph database[/green]")
     except Exception as e:
         console.print(f"[red]Failed to connect to graph: {e}[/red]")
         console.print("\n[yellow]Make sure:[/yellow]")
-        console.print("  1. Neo4j is running: [cyan]docker-compose up -d[/cyan]")
-        console.print("  2. OPENAI_API_KEY is set in .env")
+        if config["graph"]["backend"] == "graphiti":
+            console.print("  - Neo4j is running: [cyan]docker-compose up -d[/cyan]")
+        console.print("  - OPENAI_API_KEY is set in .env")
         return 1
 
-    # Import with progress
-    console.print(f"\n[bold]Importing {len(episodes)} conversations...[/bold]")
+    # Stream conversations from the export straight into the import workers
+    console.print(
+        f"\n[bold]Importing {', '.join(name for name, _ in reader.files)} "
+        f"from {export_path} ({args.concurrency} at a time)...[/bold]"
+    )
+
+    parse_error = None
 
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        TextColumn("{task.fields[rate]}"),
         console=console,
     ) as progress:
-        task = progress.add_task("Processing conversations...", total=len(episodes))
+        stats = ImportStats(progress=lambda: reader.progress)
+        graph.on_ingest = stats.record_cost
+        task = progress.add_task("Processing export...", total=1.0, rate="")
+
+        def on_progress(stats: ImportStats) -> None:
+            progress.update(
+                task,
+                completed=stats.progress(),
+                rate=(
+                    f"{stats.conversations} items done, {stats.rate:.1f}/min, "
+                    f"ETA {format_eta(stats.eta)}"
+                ),
+            )
+
+        def on_error(episode: dict, error: Exception) -> None:
+            progress.console.print(f"[yellow]Warning: {episode['source']}: {error}[/yellow]")
 
-        imported = 0
-        for episode in episodes:
-            try:
-                await graph.add_episode(
-                    content=episode["content"],
-                    source=episode["source"],
-                    timestamp=episode["timestamp"],
-                )
-                imported += 1
-            except Exception as e:
-                console.print(f"[yellow]Warning: {e}[/yellow]")
+        select = None
+        if args.incremental:
+            select = lambda convos: checkpoint.select(convos, max_tokens=args.max_tokens)
+        conversations = reader.items(max_tokens=args.max_tokens, conversations=select)
 
-            progress.advance(task)
+        # Yield to a running chat session: pause while it replies, slow
+        # down while the user types
+        follower = None
+        if config["import"]["yield_to_chat"]:
+            follower = asyncio.create_task(Scheduler.from_config(config, ACTIVITY_FILE).follow())
 
-    await graph.close()
+        try:
+            await import_conversations(
+                graph,
+                conversations,
+                concurrency=args.concurrency,
+                checkpoint=checkpoint,
+                bulk_size=args.bulk,
+                force=args.force,
+                stats=stats,
+                on_progress=on_progress,
+                on_error=on_error,
+            )
+        except ValueError as e:
+            parse_error = e
+        finally:
+            if follower is not None:
+                follower.cancel()
+            await graph.close()
+
+    if parse_error is not None:
+        console.print(f"[red]Failed to parse export: {parse_error}[/red]")
+        console.print("[dim]Conversations imported so far are checkpointed.[/dim]")
+        return 1
+
+    if args.report is not None:
+        report = stats.report({
+            "sources": args.sources,
+            "concurrency": args.concurrency,
+            "bulk_size": args.bulk,
+            "max_episode_tokens": args.max_tokens,
+            "extraction": config["extraction"],
+            "embeddings": config["embeddings"],
+        })
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2, default=str))
+        console.print(f"[dim]Report written to {args.report}[/dim]")
+
+    if args.incremental and checkpoint.unchanged:
+        console.print(f"[dim]Skipped {checkpoint.unchanged} unchanged conversations[/dim]")
+    if stats.resumed:
+        console.print(f"[dim]Skipped {stats.resumed} conversations already imported (checkpoint)[/dim]")
+    if stats.skipped:
+        console.print(f"[dim]Skipped {stats.skipped} duplicate episodes already in the graph[/dim]")
+    if not stats.conversations and not stats.failed:
+        console.print("[yellow]No new conversations to import.[/yellow]")
+        return 0
 
-    console.print(f"\n[green]✓ Imported {imported}/{len(episodes)} conversations into Yael[/green]")
+    console.print(
+        f"\n[green]✓ Imported {stats.conversations} conversations and documents into Yael "
+        f"in {format_eta(stats.elapsed)}[/green]"
+    )
+    print_cost(stats)
+    if stats.failed:
+        console.print(f"[yellow]{stats.failed} episodes failed; rerun to retry them.[/yellow]")
     console.print("[dim]Your Claude conversation history is now part of Yael's memory![/dim]")
 
     return 0
@@ -0,0 +1,19 @@
+"""Shared setup: every test runs against a throwaway ~/.yael."""
+import pytest
+
+from benchmarks.harness import isolate_home
+
+# Before any yael module reads the config directory
+isolate_home()
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Empty ~/.yael and fresh process-wide governors for each test."""
+    from benchmarks.harness import reset_home
+    from yael import limits
+
+    reset_home()
+    limits._governors.clear()
+    yield
+    limits._governors.clear()
@@ -0,0 +1,34 @@
+import time
+
+from yael.cache import RetrievalCache
+
+
+def test_exact_hits_expire():
+    cache = RetrievalCache(ttl=60)
+    cache.put("Where does Alice work?", 5, ["Acme"])
+    assert cache.get("where does  alice work?", 5) == ["Acme"]
+    assert cache.get("where does alice work?", 10) is None
+
+    cache.ttl = -1
+    cache.put("Where does Bob work?", 5, ["Initech"])
+    assert cache.get("Where does Bob work?", 5) is None
+
+
+def test_puts_from_before_an_invalidation_are_ignored():
+    cache = RetrievalCache()
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("alice", 5, ["stale"], generation=generation)
+    assert cache.get("alice", 5) is None
+
+
+def test_expired_best_match_does_not_hide_a_fresh_one():
+    cache = RetrievalCache(semantic_threshold=0.5)
+    cache.put("alice's job", 5, ["fresh"], vector=[0.8, 0.6])
+    cache.put("where alice works", 5, ["expired"], vector=[1.0, 0.0])
+    # Age the closer entry past its TTL
+    key = ("where alice works", 5)
+    cache._entries[key] = (time.monotonic() - 1, *cache._entries[key][1:])
+
+    assert cache.get_similar([1.0, 0.0], 5) == ["fresh"]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,13 @@
+from yael.config import DEFAULT_CONFIG, load_config, save_config
+
+
+def test_changing_a_loaded_config_leaves_the_defaults_alone():
+    config = load_config()  # Writes the default file
+    config["graph"]["backend"] = "embedded"
+    assert DEFAULT_CONFIG["graph"]["backend"] == "graphiti"
+
+    save_config({"graph": {"backend": "embedded"}})
+    merged = load_config()
+    assert merged["graph"]["backend"] == "embedded"
+    assert merged["graph"]["uri"] == DEFAULT_CONFIG["graph"]["uri"]
+    assert DEFAULT_CONFIG["graph"]["backend"] == "graphiti"
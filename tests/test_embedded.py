@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from benchmarks.harness import make_embedded_graph
+from yael.backends import MemoryBackend, PartialWriteError
+
+
+def make_graph():
+    return make_embedded_graph(embedding_latency=0.0, extraction_latency=0.0)
+
+
+def episode(content: str) -> dict:
+    return {"content": content, "source": "test", "timestamp": datetime(2025, 1, 1)}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Incomplete(MemoryBackend):
+        async def search(self, query, num_results):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_failed_extraction_keeps_the_rest_of_the_batch():
+    async def scenario():
+        graph = make_graph()
+        await graph.connect()
+        llm = graph.backend.llm_client
+        generate = llm.generate_response
+
+        async def flaky(messages, **kwargs):
+            if "Broken" in messages[-1].content:
+                raise RuntimeError("extraction failed")
+            return await generate(messages, **kwargs)
+
+        llm.generate_response = flaky
+        batch = [episode("Alice works at Acme in Berlin."), episode("Broken text."), episode("Bob lives in Oslo with his cat.")]
+        with pytest.raises(PartialWriteError) as raised:
+            await graph.add_episodes_bulk(batch)
+        assert raised.value.written == [0, 2]
+
+        # The stored episodes are indexed; a retry only writes the failed one
+        llm.generate_response = generate
+        assert await graph.add_episodes_bulk(batch) == 1
+        facts = [item["content"] for item in await graph.search("Alice Acme", 10)]
+        assert "Alice works at Acme in Berlin" in facts
+        await graph.close()
+
+    asyncio.run(scenario())
+
+
+def test_database_runs_off_the_event_loop():
+    async def scenario():
+        graph = make_graph()
+        await graph.connect()
+        backend = graph.backend
+        threads = set()
+        execute = backend.db.execute
+
+        class Recording:
+            def __getattr__(self, name):
+                return getattr(conn, name)
+
+            def execute(self, *args):
+                threads.add(threading.get_ident())
+                return execute(*args)
+
+            def __enter__(self):
+                return conn.__enter__()
+
+            def __exit__(self, *args):
+                return conn.__exit__(*args)
+
+        conn = backend.db
+        backend.db = Recording()
+        await graph.add_episodes_bulk([episode("Alice works at Acme in Berlin.")])
+        await graph.search("Alice", 5)
+        await graph.change_marker()
+        backend.db = conn
+        assert threads and threading.get_ident() not in threads
+        await graph.close()
+
+    asyncio.run(scenario())
+
+
+def test_search_finds_facts_by_entity_name():
+    async def scenario():
+        graph = make_graph()
+        await graph.connect()
+        await graph.add_episodes_bulk([episode("Zephyrine started a pottery class.")])
+        backend = graph.backend
+        # Neither the vectors nor the full-text index can match the query
+        backend.vectors.search = lambda vector, limit: []
+        backend._full_text = lambda query, limit: []
+        results = await backend.search("zephyrine", 5)
+        assert [item["content"] for item in results] == ["Zephyrine started a pottery class"]
+        await graph.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+from yael.embeddings import CachedEmbedder, VectorStore
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    async def create(self, input_data):
+        return (await self.create_batch([input_data]))[0]
+
+    async def create_batch(self, input_data_list):
+        self.texts.extend(input_data_list)
+        return [[float(len(text)), 1.0] for text in input_data_list]
+
+
+def test_store_rows_survive_a_reopen(tmp_path):
+    store = VectorStore(tmp_path)
+    store.put_many([("alice", [1.0, 2.0]), ("bob", [3.0, 4.0])])
+    store.put_many([("alice", [9.0, 9.0]), ("carol", [5.0, 6.0])])
+
+    reopened = VectorStore(tmp_path)
+    assert len(reopened) == 3
+    assert reopened.get_many(["alice", "bob", "carol", "dave"]) == {
+        "alice": [1.0, 2.0], "bob": [3.0, 4.0], "carol": [5.0, 6.0],
+    }
+
+
+def test_crashed_append_does_not_shift_later_rows(tmp_path):
+    store = VectorStore(tmp_path)
+    store.put_many([("alice", [1.0, 2.0])])
+    # A writer died after part of a vector row and part of an index line
+    with open(store.vectors_path, "ab") as vectors:
+        vectors.write(b"\x00" * 6)
+    with open(store.index_path, "a", encoding="utf-8") as index:
+        index.write(VectorStore.key("bob")[:10])
+
+    reopened = VectorStore(tmp_path)
+    reopened.put_many([("carol", [5.0, 6.0])])
+    assert reopened.get_many(["alice", "bob", "carol"]) == {"alice": [1.0, 2.0], "carol": [5.0, 6.0]}
+    assert reopened.vectors_path.stat().st_size == 2 * 2 * 4
+    assert VectorStore(tmp_path).get("carol") == [5.0, 6.0]
+
+
+def test_rows_without_index_lines_are_overwritten(tmp_path):
+    store = VectorStore(tmp_path)
+    store.put_many([("alice", [1.0, 2.0])])
+    # Whole rows written, but the writer died before committing them
+    with open(store.vectors_path, "ab") as vectors:
+        vectors.write(b"\x00" * 16)
+
+    other = VectorStore(tmp_path)
+    other.put_many([("bob", [3.0, 4.0])])
+    assert VectorStore(tmp_path).get_many(["alice", "bob"]) == {"alice": [1.0, 2.0], "bob": [3.0, 4.0]}
+
+
+def test_stores_see_each_others_rows(tmp_path):
+    first, second = VectorStore(tmp_path), VectorStore(tmp_path)
+    first.put_many([("alice", [1.0, 2.0])])
+    second.put_many([("bob", [3.0, 4.0])])
+    assert first.get("bob") == [3.0, 4.0]
+    assert second.get("alice") == [1.0, 2.0]
+
+
+def test_cached_embedder_reuses_the_store_off_the_event_loop(tmp_path):
+    async def scenario():
+        inner = CountingEmbedder()
+        store = VectorStore(tmp_path)
+        threads = set()
+        get_many, put_many = store.get_many, store.put_many
+
+        def recording(method):
+            def call(*args):
+                threads.add(threading.get_ident())
+                return method(*args)
+            return call
+
+        store.get_many, store.put_many = recording(get_many), recording(put_many)
+        embedder = CachedEmbedder(inner, store)
+        assert await embedder.create_batch(["alice", "bob", "alice"]) == [[5.0, 1.0], [3.0, 1.0], [5.0, 1.0]]
+        assert await embedder.create(["alice"]) == [5.0, 1.0]
+        assert inner.texts == ["alice", "bob"]
+        assert threads and threading.get_ident() not in threads
+
+        # A fresh process finds the vectors on disk
+        fresh = CachedEmbedder(inner, VectorStore(tmp_path))
+        assert await fresh.create_batch(["bob", "carol"]) == [[3.0, 1.0], [5.0, 1.0]]
+        assert inner.texts == ["alice", "bob", "carol"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from benchmarks.harness import make_engine
+
+
+async def reply(engine, message: str) -> str:
+    return "".join([token async for token in engine.chat(message)])
+
+
+def test_failed_connection_is_retried_on_the_next_turn():
+    async def scenario():
+        engine = make_engine()
+        connect = engine.graph.connect
+        attempts = []
+
+        async def flaky_connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("Neo4j is not up yet")
+            await connect()
+
+        engine.graph.connect = flaky_connect
+        with pytest.raises(ConnectionError):
+            await reply(engine, "Hello there, how are you?")
+        await asyncio.sleep(0)  # Let setup see the failure
+        text = await reply(engine, "Hello again, are you up now?")
+        await engine.setup_task
+        await engine.close()
+        return text, engine._initialized
+
+    text, initialized = asyncio.run(scenario())
+    assert text
+    assert initialized
+
+
+def test_retried_setup_is_reported():
+    async def scenario():
+        engine = make_engine()
+        connect = engine.graph.connect
+        attempts, reported = [], []
+
+        async def flaky_connect():
+            attempts.append(1)
+            if len(attempts) <= 2:
+                raise ConnectionError("Neo4j is not up yet")
+            await connect()
+
+        engine.graph.connect = flaky_connect
+        engine.setup_reporter = lambda task: reported.append(task.exception())
+        engine.start()
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await reply(engine, "Hello there, how are you?")
+            await asyncio.sleep(0)
+        await reply(engine, "Hello again, are you up now?")
+        await engine.setup_task
+        await asyncio.sleep(0)
+        await engine.close()
+        return reported
+
+    reported = asyncio.run(scenario())
+    assert [type(error) for error in reported] == [ConnectionError, ConnectionError, type(None)]
+
+
+def test_close_cancels_a_pending_connection():
+    async def scenario():
+        engine = make_engine()
+        started = asyncio.Event()
+
+        async def hanging_connect():
+            started.set()
+            await asyncio.sleep(3600)
+
+        engine.graph.connect = hanging_connect
+        engine.start()
+        await started.wait()
+        await asyncio.wait_for(engine.close(), timeout=5)
+        await asyncio.sleep(0)
+        return engine._ready_task.cancelled()
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+from yael.episodes import EpisodeBatcher, EpisodeQueue, is_trivial
+
+
+class StuckGraph:
+    """Never finishes a write, so everything stays pending."""
+
+    async def add_episode(self, **kwargs):
+        await asyncio.Event().wait()
+
+
+class RecordingGraph:
+    def __init__(self):
+        self.timestamps = []
+
+    async def add_episode(self, content, source, timestamp):
+        self.timestamps.append(timestamp)
+
+
+def test_episodes_are_written_with_utc_timestamps(tmp_path):
+    log = tmp_path / "episodes.log"
+    # Left by an older version, in naive local time
+    log.write_text(json.dumps({
+        "op": "add", "id": "old", "content": "I moved to Lisbon.", "source": "chat",
+        "timestamp": "2025-01-01T12:00:00",
+    }) + "\n")
+
+    async def scenario():
+        graph = RecordingGraph()
+        queue = EpisodeQueue(graph, log)
+        queue.start()
+        queue.put("The flat is great but noisy.")
+        await queue.close()
+        return graph.timestamps
+
+    old, new = asyncio.run(scenario())
+    assert old == datetime(2025, 1, 1, 12).astimezone(timezone.utc)
+    assert old.tzinfo == new.tzinfo == timezone.utc
+
+
+def test_combined_acknowledgements_are_trivial():
+    assert is_trivial("ok thanks!", "You're welcome.")
+    assert is_trivial("cool, got it", "Great.")
+    assert not is_trivial("ok, and what about the budget?", "Let me check.")
+
+
+def test_bare_answers_to_questions_are_kept():
+    assert not is_trivial("no", "Okay, I won't delete it.")
+    assert not is_trivial("yes", "Done.", previous="Should I delete the old backups?")
+    assert is_trivial("yes", "Glad to hear it.", previous="That should fix it.")
+
+
+def test_batcher_drops_trivial_turns_and_flushes_full_batches(tmp_path):
+    async def scenario():
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        batcher = EpisodeBatcher(queue, tmp_path / "turns.jsonl", max_turns=2, idle_timeout=0)
+        batcher.add("I moved to Lisbon last month.", "How are you settling in?")
+        batcher.add("ok thanks", "Anytime.")
+        batcher.add("The flat is great but noisy.", "Earplugs help.")
+        return queue.pending, batcher.dropped, (tmp_path / "turns.jsonl").exists()
+
+    assert asyncio.run(scenario()) == (1, 1, False)
+
+
+def test_buffered_turns_survive_a_crash(tmp_path):
+    async def scenario():
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        batcher = EpisodeBatcher(queue, tmp_path / "turns.jsonl", max_turns=4, idle_timeout=0)
+        batcher.add("I moved to Lisbon last month.", "How are you settling in?")
+
+        # Next session
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        queue.start()
+        restored = EpisodeBatcher(queue, tmp_path / "turns.jsonl").restore()
+        pending = queue.pending
+        await queue.close(timeout=0)
+        return restored, pending
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_crash_between_queueing_and_clearing_the_buffer_is_not_replayed_twice(tmp_path):
+    buffer = tmp_path / "turns.jsonl"
+
+    async def scenario():
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        batcher = EpisodeBatcher(queue, buffer, max_turns=4, idle_timeout=0)
+        batcher.add("I moved to Lisbon last month.", "How are you settling in?")
+        saved = buffer.read_text()
+        batcher.flush()
+        buffer.write_text(saved)  # As if the process died before the unlink
+
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        queue.start()
+        EpisodeBatcher(queue, buffer).restore()
+        pending = queue.pending
+        await queue.close(timeout=0)
+        return pending
+
+    assert asyncio.run(scenario()) == 1
+    entries = [json.loads(line) for line in (tmp_path / "episodes.log").read_text().splitlines()]
+    assert len(entries) == 1
+
+
+class FailingGraph:
+    async def add_episode(self, **kwargs):
+        raise RuntimeError("graph down")
+
+
+def test_given_up_episodes_are_not_pending_but_stay_in_the_log(tmp_path):
+    async def scenario():
+        queue = EpisodeQueue(FailingGraph(), tmp_path / "episodes.log", max_attempts=1)
+        queue.start()
+        queue.put("I moved to Lisbon last month.")
+        await queue._queue.join()
+        counts = queue.pending, queue.failed
+        left = await queue.close(timeout=0)
+        return counts, left
+
+    assert asyncio.run(scenario()) == ((0, 1), 1)
+    entries = [json.loads(line) for line in (tmp_path / "episodes.log").read_text().splitlines()]
+    assert [entry["op"] for entry in entries] == ["add"]
+
+
+def test_put_syncs_the_log_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    monkeypatch.setattr("yael.episodes.os.fsync", lambda fd: threads.append(threading.get_ident()))
+
+    async def scenario():
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        queue.put("I moved to Lisbon last month.")
+        queue.put("The flat is great but noisy.")
+        await queue.close(timeout=0)
+
+    asyncio.run(scenario())
+    assert threads and threading.get_ident() not in threads
+
+
+def test_batcher_syncs_its_buffer_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    monkeypatch.setattr("yael.episodes.os.fsync", lambda fd: threads.append(threading.get_ident()))
+
+    async def scenario():
+        queue = EpisodeQueue(StuckGraph(), tmp_path / "episodes.log")
+        batcher = EpisodeBatcher(queue, tmp_path / "turns.jsonl", max_turns=4, idle_timeout=0)
+        batcher.add("I moved to Lisbon last month.", "How are you settling in?")
+        batcher.add("The flat is great but noisy.", "Earplugs help.")
+        await batcher._buffer.synced()
+        synced = list(threads)
+        batcher.flush()
+        await queue.close(timeout=0)
+        return synced
+
+    synced = asyncio.run(scenario())
+    assert synced and threading.get_ident() not in synced
+    assert not (tmp_path / "turns.jsonl").exists()
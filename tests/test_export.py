@@ -0,0 +1,52 @@
+import io
+import json
+
+from yael.export import chunk_conversation, iter_json_array
+from yael.tokens import estimate_tokens
+
+
+def message(sender: str, text: str, minute: int) -> dict:
+    return {"sender": sender, "text": text, "created_at": f"2025-01-01T10:{minute:02d}:00Z"}
+
+
+def test_iter_json_array_reads_elements_across_small_chunks():
+    items = [{"id": i, "text": "x" * (i * 7)} for i in range(20)]
+    stream = io.StringIO(" [\n" + ",\n".join(json.dumps(item) for item in items) + "\n] ")
+    assert list(iter_json_array(stream, chunk_size=16)) == items
+
+
+def test_chunks_fit_the_budget_and_keep_exchanges_together():
+    messages = []
+    for i in range(6):
+        messages.append(message("human", f"Question {i} " + "word " * 30, 2 * i))
+        messages.append(message("assistant", f"Answer {i} " + "word " * 30, 2 * i + 1))
+
+    chunks = chunk_conversation("Trip planning", messages, max_tokens=120)
+    assert len(chunks) > 1
+    for i, chunk in enumerate(chunks, 1):
+        assert chunk["content"].startswith(f"# Trip planning (part {i}/{len(chunks)})")
+        assert estimate_tokens(chunk["content"]) <= 120
+        # Each chunk starts with a question and ends with its answer
+        body = chunk["content"].split("\n\n")[1:]
+        assert body[0].startswith("User: ") and body[-1].startswith("Assistant: ")
+    assert chunks[1]["timestamp"].tzinfo is not None
+    assert chunks[0]["timestamp"] < chunks[1]["timestamp"]
+
+
+def test_oversized_messages_are_split():
+    messages = [message("human", "paragraph " * 400, 0)]
+    chunks = chunk_conversation("Long paste", messages, max_tokens=200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk["content"]) <= 200 for chunk in chunks)
+
+
+def test_no_budget_means_one_episode():
+    messages = [message("human", "Hi", 0), message("assistant", "Hello", 1)]
+    [chunk] = chunk_conversation("Greeting", messages, default_time="2025-01-01T09:00:00Z")
+    assert chunk["content"] == "# Greeting\n\nUser: Hi\n\nAssistant: Hello"
+
+
+def test_iter_json_array_waits_for_numbers_split_across_chunks():
+    text = "[1234, -5.5e3, true, null, 67, \"x\"]"
+    assert list(iter_json_array(io.StringIO(text), chunk_size=1)) == [1234, -5500.0, True, None, 67, "x"]
+    assert list(iter_json_array(io.StringIO("[12345]"), chunk_size=2)) == [12345]
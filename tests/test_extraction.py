@@ -0,0 +1,54 @@
+import asyncio
+
+from graphiti_core.llm_client.token_tracker import TokenUsageTracker
+from graphiti_core.prompts.models import Message
+
+from yael.extraction import GovernedLLMClient
+from yael.limits import Governor
+from yael.metrics import track_ingest
+
+
+class ReportingLLM:
+    """Records usage the way Graphiti's OpenAI client does."""
+
+    def __init__(self):
+        self.token_tracker = TokenUsageTracker()
+
+    async def generate_response(self, messages, prompt_name=None, **kwargs):
+        await asyncio.sleep(0)
+        self.token_tracker.record(prompt_name, 1200, 80)
+        return {"facts": []}
+
+
+class SilentLLM:
+    async def generate_response(self, messages, **kwargs):
+        return {"facts": []}
+
+
+def messages() -> list[Message]:
+    return [Message(role="user", content="Alice works at Acme. " * 20)]
+
+
+def test_ingest_cost_uses_reported_usage():
+    async def scenario():
+        client = GovernedLLMClient(ReportingLLM(), Governor("test"))
+        with track_ingest() as cost:
+            # Concurrent calls each count only their own usage
+            await asyncio.gather(*(client.generate_response(messages(), prompt_name="extract") for _ in range(3)))
+        return client, cost
+
+    client, cost = asyncio.run(scenario())
+    assert (cost.llm_calls, cost.input_tokens, cost.output_tokens) == (3, 3600, 240)
+    assert client.token_tracker.get_total_usage().input_tokens == 3600
+
+
+def test_ingest_cost_estimates_without_reported_usage():
+    async def scenario():
+        client = GovernedLLMClient(SilentLLM(), Governor("test"))
+        with track_ingest() as cost:
+            await client.generate_response(messages())
+        return cost
+
+    cost = asyncio.run(scenario())
+    assert cost.llm_calls == 1
+    assert 0 < cost.input_tokens < 1200 and cost.output_tokens > 0
@@ -0,0 +1,71 @@
+import asyncio
+
+from yael.history import ConversationHistory
+
+
+class SummaryLLM:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    async def complete(self, messages: list[dict]) -> str:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return "The user is planning a trip to Kyoto."
+
+
+def exchange(i: int) -> tuple[str, str]:
+    return f"Question {i} " + "about Kyoto " * 20, f"Answer {i} " + "with details " * 20
+
+
+def test_old_turns_fold_into_a_summary():
+    async def scenario():
+        history = ConversationHistory(SummaryLLM(), max_tokens=200)
+        for i in range(6):
+            history.add(*exchange(i))
+        while history._fold_task is not None:
+            await history._fold_task
+        return history
+
+    history = asyncio.run(scenario())
+    messages = history.messages()
+    assert history.folds >= 1
+    assert messages[0]["role"] == "system" and "Kyoto" in messages[0]["content"]
+    assert messages[-1]["content"].startswith("Answer 5")
+    assert history.tokens() <= 200
+
+
+def test_failed_fold_keeps_turns_verbatim():
+    async def scenario():
+        history = ConversationHistory(SummaryLLM(fail=True), max_tokens=200)
+        for i in range(6):
+            history.add(*exchange(i))
+        await history._fold_task
+        return history
+
+    history = asyncio.run(scenario())
+    assert history.summary == "" and len(history) == 6
+    assert history.messages()[-1]["content"].startswith("Answer 5")
+
+
+def test_fold_waits_for_the_background_lane():
+    from yael.limits import Governor
+
+    async def scenario():
+        llm = SummaryLLM()
+        lane = Governor("chat", concurrency=1)
+        lane.set_background_limit(0)  # A reply is being produced
+        history = ConversationHistory(llm, max_tokens=200, governor=lane)
+        for i in range(6):
+            history.add(*exchange(i))
+        await asyncio.sleep(0.01)
+        held = llm.calls
+        lane.set_background_limit(None)
+        while history._fold_task is not None:
+            await history._fold_task
+        return held, llm.calls
+
+    held, calls = asyncio.run(scenario())
+    assert held == 0 and calls >= 1
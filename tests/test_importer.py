@@ -0,0 +1,189 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from yael.backends import PartialWriteError
+from yael.export import conversation_episodes, conversation_key
+from yael.importer import Checkpoint, import_conversations
+
+
+class RecordingGraph:
+    """Stands in for GraphMemory: records writes, optionally failing some."""
+
+    def __init__(self, fail_on: str | None = None):
+        self.fail_on = fail_on
+        self.written: list[str] = []
+        self.bulk_sizes: list[int] = []
+
+    async def add_episode(self, content, source, timestamp, force=False) -> bool:
+        await asyncio.sleep(0)
+        if self.fail_on and self.fail_on in content:
+            raise RuntimeError("extraction failed")
+        self.written.append(content)
+        return True
+
+    async def add_episodes_bulk(self, episodes, force=False) -> int:
+        await asyncio.sleep(0)
+        self.bulk_sizes.append(len(episodes))
+        failed = [i for i, episode in enumerate(episodes) if self.fail_on and self.fail_on in episode["content"]]
+        written = [i for i in range(len(episodes)) if i not in failed]
+        self.written.extend(episodes[i]["content"] for i in written)
+        if failed:
+            raise PartialWriteError(written, failed, 0, 0, [RuntimeError("extraction failed")] * len(failed))
+        return len(episodes)
+
+
+def conversation(key: str, count: int) -> dict:
+    return {
+        "key": key,
+        "episodes": [
+            {"content": f"{key} episode {i}", "source": "test", "timestamp": datetime(2025, 1, 1)}
+            for i in range(count)
+        ],
+    }
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_imports_every_episode_and_checkpoints(tmp_path):
+    graph = RecordingGraph()
+    checkpoint = Checkpoint(tmp_path / "done.txt")
+    stats = run(import_conversations(
+        graph, [conversation("a", 2), conversation("b", 3)], concurrency=2, checkpoint=checkpoint,
+    ))
+    assert stats.episodes == 5 and stats.conversations == 2
+    assert Checkpoint(tmp_path / "done.txt").done == {"a", "b"}
+
+
+def test_shared_keys_do_not_hang():
+    # Conversations without a uuid used to share the key "unknown"
+    graph = RecordingGraph()
+    convos = [conversation("unknown", 2) for _ in range(3)]
+    stats = run(import_conversations(graph, convos, concurrency=1))
+    assert stats.episodes == 6
+    assert len(graph.written) == 6
+
+
+def test_failing_callback_does_not_stall_the_import():
+    def on_progress(stats):
+        raise ValueError("display error")
+
+    graph = RecordingGraph()
+    stats = run(import_conversations(
+        graph, [conversation(str(i), 2) for i in range(5)], concurrency=1, on_progress=on_progress,
+    ))
+    assert stats.episodes == 10
+
+
+def test_failed_episode_keeps_conversation_out_of_checkpoint(tmp_path):
+    graph = RecordingGraph(fail_on="b episode 1")
+    checkpoint = Checkpoint(tmp_path / "done.txt")
+    errors = []
+    stats = run(import_conversations(
+        graph, [conversation("a", 2), conversation("b", 2)], concurrency=2, checkpoint=checkpoint,
+        on_error=lambda episode, error: errors.append(episode["key"]),
+    ))
+    assert stats.failed == 1 and errors == ["b"]
+    assert Checkpoint(tmp_path / "done.txt").done == {"a"}
+
+
+def test_raising_error_callback_still_completes_conversations(tmp_path):
+    def on_error(episode, error):
+        raise ValueError("display error")
+
+    graph = RecordingGraph(fail_on="b episode 0")
+    checkpoint = Checkpoint(tmp_path / "done.txt")
+    stats = run(import_conversations(
+        graph, [conversation("a", 2), conversation("b", 2), conversation("c", 2)],
+        concurrency=1, checkpoint=checkpoint, on_error=on_error,
+    ))
+    assert stats.failed == 1 and stats.conversations == 2
+    assert Checkpoint(tmp_path / "done.txt").done == {"a", "c"}
+
+
+def test_checkpoint_failure_is_raised_after_draining(tmp_path):
+    class BrokenCheckpoint(Checkpoint):
+        def mark(self, key):
+            raise OSError("disk full")
+
+    graph = RecordingGraph()
+    with pytest.raises(OSError):
+        run(import_conversations(
+            graph, [conversation("a", 1), conversation("b", 1)], concurrency=1,
+            checkpoint=BrokenCheckpoint(tmp_path / "done.txt"),
+        ))
+    assert len(graph.written) == 2
+
+
+def test_partial_bulk_write_fails_only_the_failed_episodes(tmp_path):
+    graph = RecordingGraph(fail_on="b episode 1")
+    checkpoint = Checkpoint(tmp_path / "done.txt")
+    stats = run(import_conversations(
+        graph, [conversation("a", 2), conversation("b", 2)], concurrency=1, bulk_size=4,
+        checkpoint=checkpoint,
+    ))
+    assert graph.bulk_sizes == [4]
+    assert stats.failed == 1 and stats.episodes == 3
+    assert Checkpoint(tmp_path / "done.txt").done == {"a"}
+
+
+def test_bulk_batches_are_not_capped_by_the_queue():
+    async def scenario():
+        graph = RecordingGraph()
+        convos = [conversation(str(i), 1) for i in range(16)]
+        return graph, await import_conversations(graph, convos, concurrency=1, bulk_size=8)
+
+    graph, stats = run(scenario())
+    assert stats.episodes == 16
+    assert max(graph.bulk_sizes) == 8
+
+
+def test_conversations_without_uuid_get_distinct_stable_keys():
+    first = {"name": "A", "created_at": "2025-01-01", "chat_messages": [{"text": "hi", "sender": "human"}]}
+    second = {**first, "name": "B"}
+    assert conversation_key(first) == conversation_key(json.loads(json.dumps(first)))
+    assert conversation_key(first) != conversation_key(second)
+    assert conversation_key({"uuid": "u1"}) == "u1"
+    assert conversation_episodes(first)["key"] == conversation_key(first)
+
+
+def test_parse_timestamp_is_always_aware_utc():
+    from yael.export import parse_timestamp
+
+    for value in ("2025-03-01T10:00:00Z", "2025-03-01T10:00:00", "2025-03-01T12:00:00+02:00", None, "garbage"):
+        assert parse_timestamp(value).utcoffset().total_seconds() == 0
+    assert parse_timestamp("2025-03-01T12:00:00+02:00") == parse_timestamp("2025-03-01T10:00:00Z")
+
+
+def test_incremental_sync_skips_unchanged_conversations_and_documents(tmp_path):
+    from yael.importer import SyncState
+
+    def export(messages: int, updated_at: str) -> list[dict]:
+        return [{
+            "uuid": "c1", "name": "Trip", "created_at": "2025-01-01T00:00:00Z", "updated_at": updated_at,
+            "chat_messages": [
+                {"sender": "human", "text": f"message {i}", "created_at": "2025-01-01T00:00:00Z"}
+                for i in range(messages)
+            ],
+        }]
+
+    def sync(convos: list[dict]) -> RecordingGraph:
+        graph = RecordingGraph()
+        state = SyncState(tmp_path / "state.jsonl")
+        items = [*state.select(convos), conversation("memory:account:abc123", 1)]
+        run(import_conversations(graph, items, concurrency=1, checkpoint=state))
+        return graph
+
+    assert len(sync(export(2, "2025-01-02T00:00:00Z")).written) == 2
+    # Unchanged conversation (naive timestamp this time) and the same memory
+    assert sync(export(2, "2025-01-02T00:00:00")).written == []
+    # Appended messages only
+    written = sync(export(3, "2025-01-03T00:00:00Z")).written
+    assert len(written) == 1 and "message 2" in written[0] and "message 0" not in written[0]
+    # More messages under the same updated_at are still imported
+    written = sync(export(4, "2025-01-03T00:00:00Z")).written
+    assert len(written) == 1 and "message 3" in written[0] and "message 2" not in written[0]
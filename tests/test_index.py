@@ -0,0 +1,19 @@
+from yael.index import EpisodeIndex
+
+
+def test_bulk_adds_are_recorded_and_found(tmp_path):
+    index = EpisodeIndex(tmp_path / "episodes.db")
+    digests = [EpisodeIndex.content_hash(f"episode {i}") for i in range(3)]
+    index.add_many([(digest, "import") for digest in digests])
+    index.add(EpisodeIndex.content_hash("chat  turn"), "conversation")
+
+    assert all(digest in index for digest in digests)
+    assert EpisodeIndex.content_hash("chat turn") in index
+    assert len(index) == 4 and index.added == 4
+    # Commits don't fsync; the WAL is synced at checkpoints
+    assert index.db.execute("PRAGMA synchronous").fetchone()[0] == 1
+    index.close()
+
+    reopened = EpisodeIndex(tmp_path / "episodes.db")
+    assert len(reopened) == 4
+    reopened.close()
@@ -0,0 +1,61 @@
+import asyncio
+
+from yael.limits import Governor, foreground
+
+
+async def hold(governor: Governor, entered: list, name: str, release: asyncio.Event) -> None:
+    async with governor.slot():
+        entered.append(name)
+        await release.wait()
+
+
+def test_raising_the_limit_admits_every_waiter_it_can():
+    async def scenario():
+        governor = Governor("test", concurrency=1)
+        entered, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(governor, entered, str(i), release)) for i in range(4)]
+        await asyncio.sleep(0)
+        assert len(entered) == 1
+
+        governor.configure(4)
+        await asyncio.sleep(0)
+        count = len(entered)
+        release.set()
+        await asyncio.gather(*tasks)
+        return count
+
+    assert asyncio.run(scenario()) == 4
+
+
+def test_foreground_calls_skip_queued_background_work():
+    async def scenario():
+        governor = Governor("test", concurrency=1)
+        entered, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(governor, entered, f"bg{i}", release)) for i in range(3)]
+        await asyncio.sleep(0)
+        with foreground():
+            tasks.append(asyncio.create_task(hold(governor, entered, "fg", release)))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        return entered
+
+    # The reserved slot lets it in while the first background call still runs
+    assert asyncio.run(scenario())[:2] == ["bg0", "fg"]
+
+
+def test_background_limit_zero_pauses_background_calls():
+    async def scenario():
+        governor = Governor("test", concurrency=2)
+        governor.set_background_limit(0)
+        entered, release = [], asyncio.Event()
+        task = asyncio.create_task(hold(governor, entered, "bg", release))
+        await asyncio.sleep(0)
+        paused = list(entered)
+        governor.set_background_limit(None)
+        await asyncio.sleep(0)
+        release.set()
+        await task
+        return paused, entered
+
+    assert asyncio.run(scenario()) == ([], ["bg"])
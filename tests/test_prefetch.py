@@ -0,0 +1,115 @@
+import asyncio
+
+from yael.limits import Governor
+from yael.prefetch import Prefetcher, entities, topic
+
+
+def facts(*contents: str) -> list[dict]:
+    return [{"type": "EntityEdge", "content": content, "score": 1.0} for content in contents]
+
+
+class FakeSearch:
+    def __init__(self, results: dict[str, list[dict]]):
+        self.results = results
+        self.queries: list[str] = []
+
+    async def __call__(self, query: str) -> list[dict]:
+        self.queries.append(query)
+        await asyncio.sleep(0)
+        return self.results.get(query, [])
+
+
+async def settle(prefetcher: Prefetcher) -> None:
+    await asyncio.gather(*prefetcher._tasks.values())
+
+
+def test_entities_skip_sentence_words():
+    assert entities("What is Alice doing at Acme Corp? The Orion launch.") == ["Alice", "Acme Corp", "Orion"]
+    assert topic("compiler backend compiler backend release") == "compiler backend"
+
+
+def test_message_naming_prefetched_entities_is_a_hit():
+    async def scenario():
+        search = FakeSearch({"Alice": facts("Alice works on Orion.")})
+        prefetcher = Prefetcher(search)
+        prefetcher.start("Tell me about Alice")
+        await settle(prefetcher)
+        return prefetcher, await prefetcher.lookup("And what is Alice up to now?")
+
+    prefetcher, context = asyncio.run(scenario())
+    assert "Alice works on Orion." in context
+    assert prefetcher.stats()["hits"] == 1
+
+
+def test_empty_prefetch_is_not_a_hit():
+    async def scenario():
+        prefetcher = Prefetcher(FakeSearch({}))
+        prefetcher.start("Tell me about Alice")
+        await settle(prefetcher)
+        return prefetcher, await prefetcher.lookup("What about Alice?")
+
+    prefetcher, context = asyncio.run(scenario())
+    assert context is None
+    assert prefetcher.stats()["hit_rate"] == 0.0
+
+
+def test_unprefetched_name_is_a_miss():
+    async def scenario():
+        prefetcher = Prefetcher(FakeSearch({"Alice": facts("Alice works on Orion.")}))
+        prefetcher.start("Tell me about Alice")
+        await settle(prefetcher)
+        return await prefetcher.lookup("Does Alice know Bob?")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_graph_writes_discard_prefetches():
+    async def scenario():
+        writes = [0]
+        prefetcher = Prefetcher(
+            FakeSearch({"Alice": facts("Alice works on Orion.")}), generation=lambda: writes[0],
+        )
+        prefetcher.start("Tell me about Alice")
+        await settle(prefetcher)
+        writes[0] += 1
+        return await prefetcher.lookup("What about Alice?")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_similar_message_is_a_hit():
+    vectors = {"compiler backend release": [1.0, 0.0], "how is the compiler release going": [0.9, 0.1]}
+
+    async def embed(text):
+        return vectors.get(text, [0.0, 1.0])
+
+    async def scenario():
+        search = FakeSearch({"compiler backend release": facts("The compiler ships in March.")})
+        prefetcher = Prefetcher(search, embed=embed)
+        prefetcher.start("the compiler backend release", "compiler backend release notes")
+        await settle(prefetcher)
+        return await prefetcher.lookup("how is the compiler release going")
+
+    assert "compiler ships in March" in asyncio.run(scenario())
+
+
+def test_prefetches_wait_while_background_work_is_paused():
+    async def scenario():
+        gov = Governor("test", concurrency=2)
+        gov.set_background_limit(0)  # A reply is streaming
+
+        async def search(query):
+            async with gov.slot():
+                return facts(f"{query} fact")
+
+        prefetcher = Prefetcher(search)
+        prefetcher.start("Alice and Bob met Carol in Denver")
+        await asyncio.sleep(0.01)
+        blocked = gov.stats()["active"]
+        gov.set_background_limit(None)
+        await settle(prefetcher)
+        return blocked, prefetcher.stats()["cached"]
+
+    blocked, cached = asyncio.run(scenario())
+    assert blocked == 0
+    assert cached == 3
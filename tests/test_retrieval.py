@@ -0,0 +1,142 @@
+import asyncio
+
+from yael.retrieval import CircuitBreaker, Retriever
+
+
+class SlowSearch:
+    """Answers each query after a per-query delay."""
+
+    def __init__(self, delays: dict[str, float]):
+        self.delays = delays
+
+    async def __call__(self, query: str) -> str:
+        await asyncio.sleep(self.delays.get(query, 0))
+        return f"ctx for {query}"
+
+
+async def probe():
+    return "ok"
+
+
+def test_fresh_result_within_deadline():
+    async def scenario():
+        retriever = Retriever(SlowSearch({}), probe, deadline=0.5)
+        return await retriever.context("my cat")
+
+    assert asyncio.run(scenario()) == ("ctx for my cat", "fresh")
+
+
+def test_timeout_does_not_serve_another_querys_context():
+    async def scenario():
+        retriever = Retriever(SlowSearch({"slow": 0.2}), probe, deadline=0.05)
+        await retriever.context("my cat")
+        result = await retriever.context("slow")
+        await retriever.close()
+        return result
+
+    assert asyncio.run(scenario()) == ("", "empty")
+
+
+def test_timeout_falls_back_to_cached_context_for_the_query():
+    cached = {"slow": "cached ctx for slow"}
+
+    async def scenario():
+        retriever = Retriever(SlowSearch({"slow": 0.2}), probe, fallback=cached.get, deadline=0.05)
+        result = await retriever.context("slow")
+        await retriever.close()
+        return result
+
+    assert asyncio.run(scenario()) == ("cached ctx for slow", "stale")
+
+
+def test_slow_but_healthy_graph_does_not_trip_the_breaker():
+    async def scenario():
+        retriever = Retriever(SlowSearch({"q": 0.05}), probe, deadline=0.01, breaker=CircuitBreaker(2))
+        for _ in range(4):
+            await retriever.context("q")
+            await asyncio.sleep(0.1)  # The late answer arrives
+        return retriever.breaker.trips
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_failures_open_the_breaker_and_skip_the_graph():
+    async def failing(query):
+        raise ConnectionError("graph down")
+
+    async def scenario():
+        retriever = Retriever(failing, probe, deadline=0.5, breaker=CircuitBreaker(2), probe_interval=60)
+        outcomes = [(await retriever.context("q"))[1] for _ in range(3)]
+        await retriever.close()
+        return outcomes
+
+    assert asyncio.run(scenario()) == ["failed", "failed", "skipped"]
+
+
+def test_gate_skips_acknowledgements_and_reuses_back_references():
+    from yael.retrieval import RetrievalGate
+
+    async def scenario():
+        gate = RetrievalGate()
+        decisions = [await gate.decide("What is Alice working on these days?")]
+        gate.remember("What is Alice working on these days?", "ctx")
+        for message in ["thanks!", "why is that?", "tell me more about it", "does it work?", "what does that mean?"]:
+            decisions.append(await gate.decide(message))
+        return [decision for decision, _ in decisions]
+
+    assert asyncio.run(scenario()) == ["search", "skip", "reuse", "reuse", "reuse", "search"]
+
+
+def test_gate_searches_for_new_questions_with_pronoun_words():
+    from yael.retrieval import RetrievalGate
+
+    async def scenario():
+        gate = RetrievalGate()
+        gate.remember("What is Alice working on these days?", "ctx")
+        return [
+            (await gate.decide(message))[0]
+            for message in ["What is this error in my build?", "why did my sister move?", "What does Bob think of that?"]
+        ]
+
+    assert asyncio.run(scenario()) == ["search", "search", "search"]
+
+
+def test_gate_embedding_respects_the_turn_deadline():
+    from yael.retrieval import RetrievalGate
+
+    async def slow_embed(text):
+        await asyncio.sleep(1)
+        return [1.0, 0.0]
+
+    async def scenario():
+        gate = RetrievalGate(slow_embed, embed_timeout=0.5)
+        gate.remember("What is Alice working on these days?", "ctx")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        decision = await gate.decide("How is the Orion launch going overall?", timeout=0.05)
+        return decision[0], loop.time() - started
+
+    decision, elapsed = asyncio.run(scenario())
+    assert decision == "search"
+    assert elapsed < 0.3
+
+
+def test_retriever_deadline_override():
+    async def scenario():
+        retriever = Retriever(SlowSearch({"q": 0.2}), probe, deadline=1.0)
+        result = await retriever.context("q", deadline=0.01)
+        await retriever.close()
+        return result
+
+    assert asyncio.run(scenario()) == ("", "empty")
+
+
+def test_gate_handles_combined_acknowledgements_and_answers():
+    from yael.retrieval import RetrievalGate
+
+    async def scenario():
+        gate = RetrievalGate()
+        gate.remember("Should I delete the old backups?", "ctx")
+        return [(await gate.decide(message))[0] for message in ["ok thanks!", "yes"]]
+
+    assert asyncio.run(scenario()) == ["skip", "reuse"]
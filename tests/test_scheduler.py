@@ -0,0 +1,46 @@
+import asyncio
+import json
+import time
+
+from yael.limits import Governor
+from yael.scheduler import IDLE, REPLYING, TYPING, Scheduler
+
+
+def test_background_limit_follows_user_activity(tmp_path):
+    async def scenario():
+        gov = Governor("test", concurrency=4)
+        scheduler = Scheduler([gov], typing_grace=0.05, state_path=tmp_path / "activity.json")
+        limits = []
+        scheduler.typing()
+        limits.append((scheduler.state, gov.background_limit))
+        with scheduler.replying():
+            limits.append((scheduler.state, gov.background_limit))
+        limits.append((scheduler.state, gov.background_limit))
+        scheduler.typing()
+        await asyncio.sleep(0.1)
+        limits.append((scheduler.state, gov.background_limit))
+        scheduler.close()
+        return limits
+
+    assert asyncio.run(scenario()) == [(TYPING, 1), (REPLYING, 0), (IDLE, None), (IDLE, None)]
+
+
+def test_governor_overrides_keep_their_own_limit():
+    extraction, embedding = Governor("extraction"), Governor("embedding")
+    scheduler = Scheduler([extraction, embedding], overrides={"embedding": {REPLYING: 1}})
+    with scheduler.replying():
+        assert (extraction.background_limit, embedding.background_limit) == (0, 1)
+    assert (extraction.background_limit, embedding.background_limit) == (None, None)
+
+
+def test_other_processes_follow_the_published_state(tmp_path):
+    path = tmp_path / "activity.json"
+    follower = Scheduler([Governor("test")], state_path=path)
+    assert follower.observed() == IDLE
+
+    path.write_text(json.dumps({"state": REPLYING, "pid": -1, "expires": time.time() + 60}))
+    assert follower.observed() == REPLYING
+
+    # A chat process that died mid-reply stops counting once it expires
+    path.write_text(json.dumps({"state": REPLYING, "pid": -1, "expires": time.time() - 1}))
+    assert follower.observed() == IDLE
@@ -0,0 +1,10 @@
+"""
+Storage backends behind GraphMemory.
+
+"graphiti" is Graphiti on a Neo4j server; "embedded" keeps the graph in
+a local SQLite file with an in-process vector index, and needs no server.
+Backend modules are imported only when selected.
+"""
+from .base import MemoryBackend, PartialWriteError
+
+__all__ = ["MemoryBackend", "PartialWriteError"]
@@ -0,0 +1,74 @@
+"""The interface GraphMemory expects from a storage backend."""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any
+
+
+class PartialWriteError(Exception):
+    """Some episodes of a batch were stored and others failed.
+
+    `written` and `failed` hold indices into the batch, and `nodes`/`edges`
+    what the stored episodes produced; `errors` are the failed episodes'
+    errors, in the same order, the first of which is the cause.
+    """
+
+    def __init__(
+        self,
+        written: list[int],
+        failed: list[int],
+        nodes: int,
+        edges: int,
+        errors: list[BaseException],
+    ):
+        super().__init__(f"{len(failed)} of {len(written) + len(failed)} episodes failed: {errors[0]}")
+        self.written = written
+        self.failed = failed
+        self.nodes = nodes
+        self.edges = edges
+        self.errors = errors
+        self.__cause__ = errors[0]
+
+
+class MemoryBackend(ABC):
+    """Extracts, stores and searches episodes for GraphMemory.
+
+    GraphMemory adds the shared layers on top (duplicate index, retrieval
+    cache, ingest cost tracking), so a backend only deals with its store.
+    Writes return the number of (nodes, edges) they produced; search
+    returns items of {"type", "content", "score"}.
+    """
+
+    # Embedder for queries; GraphMemory's semantic cache shares it
+    embedder = None
+
+    async def connect(self) -> None:
+        """Create clients and open the store. Safe to call repeatedly."""
+
+    async def initialize(self) -> None:
+        """Create indexes and constraints."""
+
+    @abstractmethod
+    async def add_episode(self, content: str, source: str, timestamp: datetime) -> tuple[int, int]:
+        """Write one episode."""
+
+    @abstractmethod
+    async def add_episodes(self, episodes: list[dict]) -> tuple[int, int]:
+        """Write many {"content", "source", "timestamp"} episodes at once.
+
+        Raises PartialWriteError if only some of them were stored.
+        """
+
+    @abstractmethod
+    async def search(self, query: str, num_results: int) -> list[dict[str, Any]]:
+        """Facts (and entities) relevant to the query, best first."""
+
+    @abstractmethod
+    async def change_marker(self) -> str:
+        """A value that changes whenever episodes are added."""
+
+    @abstractmethod
+    async def size(self) -> dict[str, int]:
+        """Number of entity nodes and fact edges."""
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,393 @@
+"""Embedded graph memory: SQLite plus an in-process vector index.
+
+Entities, fact edges and episodes live in one SQLite file, with an FTS5
+index over facts. Fact embeddings are also kept in a NumPy matrix in
+memory, so a search is one matrix product, one FTS query and a lookup of
+the entities the query names, fused with reciprocal rank fusion (as
+Graphiti's hybrid search does). No server to run, and retrieval takes
+well under a millisecond for personal-sized graphs, plus the query
+embedding. The database is only touched from one worker thread, so the
+event loop never waits on SQLite and writes never interleave.
+
+Extraction is one structured LLM call per episode through the same
+governed client Graphiti would use. Facts are kept with the time they
+became true but are never invalidated; among equally ranked facts the
+newer one comes first.
+"""
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+from .base import MemoryBackend, PartialWriteError
+
+# Reciprocal rank fusion constant (60 is the usual choice)
+RRF_K = 60
+# Longest entity name, in words, looked for in a query
+MAX_NAME_WORDS = 4
+
+EXTRACTION_PROMPT = """You build a knowledge graph about the user from their conversations and documents.
+
+From the text, list the entities it mentions: people, places, organizations,
+projects, tools and topics. Refer to the user as "User". Give each entity a
+one-sentence summary of what the text says about it.
+
+Then list the facts the text states about how two of those entities relate.
+Each fact has a short relation in SCREAMING_SNAKE_CASE and a self-contained
+sentence stating it. Only include facts the text actually states."""
+
+
+class ExtractedEntity(BaseModel):
+    name: str
+    summary: str = ""
+
+
+class ExtractedFact(BaseModel):
+    source: str
+    target: str
+    relation: str
+    fact: str
+
+
+class Extraction(BaseModel):
+    entities: list[ExtractedEntity] = []
+    facts: list[ExtractedFact] = []
+
+
+class VectorIndex:
+    """Normalized vectors in a growable matrix, searched by cosine similarity."""
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix: np.ndarray | None = None
+        self.count = 0
+
+    def add(self, ids: list[int], vectors: np.ndarray) -> None:
+        if not ids:
+            return
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if self.matrix is None:
+            self.matrix = np.zeros((max(len(ids), 1024), vectors.shape[1]), dtype=np.float32)
+            self.ids = np.zeros(len(self.matrix), dtype=np.int64)
+
+        needed = self.count + len(ids)
+        if needed > len(self.matrix):
+            # Double capacity, so appends are amortized O(1)
+            capacity = max(needed, 2 * len(self.matrix))
+            self.matrix = np.resize(self.matrix, (capacity, self.matrix.shape[1]))
+            self.ids = np.resize(self.ids, capacity)
+        self.matrix[self.count:needed] = vectors
+        self.ids[self.count:needed] = ids
+        self.count = needed
+
+    def search(self, vector: list[float], limit: int) -> list[int]:
+        """Ids of the `limit` most similar vectors, best first."""
+        if not self.count:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self.matrix[:self.count] @ (query / max(np.linalg.norm(query), 1e-12))
+        if limit < self.count:
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(self.count)
+        return [int(self.ids[i]) for i in top[np.argsort(-scores[top])]]
+
+
+class EmbeddedBackend(MemoryBackend):
+    """Graph memory in a local SQLite file, searched in process."""
+
+    def __init__(
+        self,
+        path: Path,
+        openai_api_key: str | None,
+        embeddings: dict,
+        extraction: dict,
+        embedding_cache: Path | None = None,
+    ):
+        self.path = path
+        self._openai_api_key = openai_api_key
+        self._embeddings = embeddings
+        self._extraction = extraction
+        self._embedding_cache = embedding_cache
+
+        self.db: sqlite3.Connection | None = None
+        self.llm_client = None
+        self.vectors = VectorIndex()
+        self._connect_lock = asyncio.Lock()
+        # The database and vector index are only used from this thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yael-sqlite")
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def connect(self) -> None:
+        """Open the database and load the vector index off the event loop."""
+        async with self._connect_lock:
+            if self.db is None:
+                await self._run(self._open)
+
+    def _open(self) -> None:
+        if self.embedder is None:
+            from ..embeddings import create_embedder
+
+            cache_dir = self._embedding_cache if self._embeddings.get("cache", True) else None
+            self.embedder = create_embedder(self._embeddings, cache_dir)
+        if self.llm_client is None:
+            from ..extraction import create_llm_clients
+
+            self.llm_client, _ = create_llm_clients(self._extraction, self._openai_api_key)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS episodes ("
+            " id INTEGER PRIMARY KEY,"
+            " content TEXT,"
+            " source TEXT,"
+            " reference_time TEXT,"
+            " created_at TEXT"
+            ");"
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " id INTEGER PRIMARY KEY,"
+            " name TEXT UNIQUE COLLATE NOCASE,"
+            " summary TEXT,"
+            " created_at TEXT"
+            ");"
+            "CREATE TABLE IF NOT EXISTS edges ("
+            " id INTEGER PRIMARY KEY,"
+            " source_id INTEGER REFERENCES entities(id),"
+            " target_id INTEGER REFERENCES entities(id),"
+            " relation TEXT,"
+            " fact TEXT,"
+            " episode_id INTEGER REFERENCES episodes(id),"
+            " valid_at TEXT,"
+            " embedding BLOB"
+            ");"
+            "CREATE INDEX IF NOT EXISTS edges_fact ON edges(fact);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS edges_fts"
+            " USING fts5(fact, content='edges', content_rowid='id');"
+        )
+        db.commit()
+
+        rows = db.execute("SELECT id, embedding FROM edges WHERE embedding IS NOT NULL").fetchall()
+        if rows:
+            self.vectors.add(
+                [row[0] for row in rows],
+                np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]),
+            )
+        self.db = db
+
+    async def add_episode(self, content: str, source: str, timestamp: datetime) -> tuple[int, int]:
+        return await self.add_episodes([{"content": content, "source": source, "timestamp": timestamp}])
+
+    async def add_episodes(self, episodes: list[dict]) -> tuple[int, int]:
+        results = await asyncio.gather(
+            *(self._extract(episode) for episode in episodes), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result  # Cancelled, not failed
+        written = [i for i, result in enumerate(results) if not isinstance(result, BaseException)]
+        failed = [i for i, result in enumerate(results) if isinstance(result, BaseException)]
+        errors = [results[i] for i in failed]
+        if not written:
+            raise errors[0]
+        episodes = [episodes[i] for i in written]
+        extractions = [results[i] for i in written]
+
+        # Embed every fact not already stored, in one request
+        known = await self._run(self._known_facts, [fact.fact for e in extractions for fact in e.facts])
+        new_facts = list(dict.fromkeys(
+            fact.fact for e in extractions for fact in e.facts if fact.fact not in known
+        ))
+        vectors = await self.embedder.create_batch(new_facts) if new_facts else []
+        embedding = dict(zip(new_facts, vectors))
+
+        nodes, edges = await self._run(self._store, episodes, extractions, embedding)
+        if errors:
+            raise PartialWriteError(written, failed, nodes, edges, errors)
+        return nodes, edges
+
+    def _store(self, episodes: list[dict], extractions: list[Extraction], embedding: dict) -> tuple[int, int]:
+        """Write extracted episodes; runs on the database thread."""
+        now = datetime.now(timezone.utc).isoformat()
+        nodes, edge_ids, edge_vectors = 0, [], []
+        with self.db:
+            for episode, extraction in zip(episodes, extractions):
+                episode_id = self.db.execute(
+                    "INSERT INTO episodes (content, source, reference_time, created_at) VALUES (?, ?, ?, ?)",
+                    (episode["content"], episode["source"], episode["timestamp"].isoformat(), now),
+                ).lastrowid
+
+                entities = {entity.name: entity.summary for entity in extraction.entities if entity.name}
+                for fact in extraction.facts:
+                    entities.setdefault(fact.source, "")
+                    entities.setdefault(fact.target, "")
+                ids = {name: self._upsert_entity(name, summary, now) for name, summary in entities.items()}
+                nodes += len(ids)
+
+                for fact in extraction.facts:
+                    if fact.fact not in embedding or self._known_facts([fact.fact]):
+                        continue  # Stored already, possibly by a concurrent write
+                    vector = np.asarray(embedding[fact.fact], dtype=np.float32)
+                    edge_id = self.db.execute(
+                        "INSERT INTO edges (source_id, target_id, relation, fact, episode_id, valid_at, embedding)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            ids[fact.source], ids[fact.target], fact.relation, fact.fact,
+                            episode_id, episode["timestamp"].isoformat(), vector.tobytes(),
+                        ),
+                    ).lastrowid
+                    self.db.execute("INSERT INTO edges_fts (rowid, fact) VALUES (?, ?)", (edge_id, fact.fact))
+                    edge_ids.append(edge_id)
+                    edge_vectors.append(vector)
+
+        if edge_ids:
+            self.vectors.add(edge_ids, np.stack(edge_vectors))
+        return nodes, len(edge_ids)
+
+    def _known_facts(self, facts: list[str]) -> set[str]:
+        if not facts:
+            return set()
+        rows = self.db.execute(
+            f"SELECT fact FROM edges WHERE fact IN ({','.join('?' * len(facts))})", facts,
+        )
+        return {row[0] for row in rows}
+
+    async def _extract(self, episode: dict) -> Extraction:
+        from graphiti_core.prompts.models import Message
+
+        response = await self.llm_client.generate_response(
+            [
+                Message(role="system", content=EXTRACTION_PROMPT),
+                Message(
+                    role="user",
+                    content=f"Source: {episode['source']}\n"
+                            f"Date: {episode['timestamp'].isoformat()}\n\n{episode['content']}",
+                ),
+            ],
+            response_model=Extraction,
+        )
+        extraction = Extraction.model_validate(response)
+        extraction.facts = [
+            fact for fact in extraction.facts if fact.source and fact.target and fact.fact
+        ]
+        return extraction
+
+    def _upsert_entity(self, name: str, summary: str, now: str) -> int:
+        self.db.execute(
+            "INSERT INTO entities (name, summary, created_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET summary = COALESCE(NULLIF(excluded.summary, ''), summary)",
+            (name, summary, now),
+        )
+        return self.db.execute("SELECT id FROM entities WHERE name = ?", (name,)).fetchone()[0]
+
+    async def search(self, query: str, num_results: int) -> list[dict[str, Any]]:
+        vector = await self.embedder.create([query.replace("\n", " ")])
+        return await self._run(self._search, query, vector, num_results)
+
+    def _search(self, query: str, vector: list[float], num_results: int) -> list[dict[str, Any]]:
+        """Fused vector, full-text and entity rankings; runs on the database thread."""
+        candidates = num_results * 4
+        named, linked = self._named_entities(query, candidates)
+        rankings = [
+            [("edge", edge_id) for edge_id in self.vectors.search(vector, candidates)],
+            [("edge", edge_id) for edge_id in self._full_text(query, candidates)],
+            [("node", entity_id) for entity_id in named] + [("edge", edge_id) for edge_id in linked],
+        ]
+
+        scores: dict[tuple[str, int], float] = {}
+        for ranking in rankings:
+            for rank, key in enumerate(ranking):
+                scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank + 1)
+        if not scores:
+            return []
+
+        # (type, content, valid_at) per result; entities sort as if timeless
+        items = {}
+        edge_ids = [key[1] for key in scores if key[0] == "edge"]
+        if edge_ids:
+            for edge_id, fact, valid_at in self.db.execute(
+                f"SELECT id, fact, valid_at FROM edges WHERE id IN ({','.join('?' * len(edge_ids))})",
+                edge_ids,
+            ):
+                items[("edge", edge_id)] = ("EntityEdge", fact, valid_at)
+        for entity_id, content in named.items():
+            items[("node", entity_id)] = ("EntityNode", content, "")
+
+        ranked = sorted(items, key=lambda key: (scores[key], items[key][2]), reverse=True)
+        return [
+            {"type": items[key][0], "content": items[key][1], "score": scores[key]}
+            for key in ranked[:num_results]
+        ]
+
+    def _named_entities(self, query: str, limit: int) -> tuple[dict[int, str], list[int]]:
+        """Entities the query names, and the newest edges linking them.
+
+        The entities map ids to "name: summary" and include only those
+        with a summary; the edge ids come newest first.
+        """
+        words = re.findall(r"[\w+#.-]+", query)
+        phrases = {
+            " ".join(words[start:end]).strip(".")
+            for start in range(len(words))
+            for end in range(start + 1, min(start + MAX_NAME_WORDS, len(words)) + 1)
+        }
+        phrases = [phrase for phrase in phrases if len(phrase) > 2]
+        if not phrases:
+            return {}, []
+        # The column's NOCASE collation applies, so case doesn't matter
+        rows = self.db.execute(
+            f"SELECT id, name, summary FROM entities WHERE name IN ({','.join('?' * len(phrases))})",
+            phrases,
+        ).fetchall()
+        if not rows:
+            return {}, []
+        ids = [row[0] for row in rows]
+        marks = ",".join("?" * len(ids))
+        linked = self.db.execute(
+            f"SELECT id FROM edges WHERE source_id IN ({marks}) OR target_id IN ({marks})"
+            " ORDER BY valid_at DESC LIMIT ?",
+            (*ids, *ids, limit),
+        )
+        named = {entity_id: f"{name}: {summary}" for entity_id, name, summary in rows if summary}
+        return named, [row[0] for row in linked]
+
+    def _full_text(self, query: str, limit: int) -> list[int]:
+        """Edge ids whose facts match any query word, best BM25 first."""
+        words = {word for word in re.findall(r"\w+", query.lower()) if len(word) > 2}
+        if not words:
+            return []
+        match = " OR ".join(f'"{word}"' for word in words)
+        rows = self.db.execute(
+            "SELECT rowid FROM edges_fts WHERE edges_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        )
+        return [row[0] for row in rows]
+
+    async def change_marker(self) -> str:
+        return await self._run(self._change_marker)
+
+    def _change_marker(self) -> str:
+        count, latest = self.db.execute("SELECT count(*), max(created_at) FROM episodes").fetchone()
+        return f"{count}:{latest}"
+
+    async def size(self) -> dict[str, int]:
+        return await self._run(self._size)
+
+    def _size(self) -> dict[str, int]:
+        nodes = self.db.execute("SELECT count(*) FROM entities").fetchone()[0]
+        edges = self.db.execute("SELECT count(*) FROM edges").fetchone()[0]
+        return {"nodes": nodes, "edges": edges}
+
+    async def close(self) -> None:
+        if self.db is not None:
+            await self._run(self.db.close)
+            self.db = None
@@ -0,0 +1,143 @@
+"""Graphiti on a Neo4j server.
+
+graphiti_core (and the neo4j/openai stack behind it) takes well over a
+second to import, so it is loaded lazily on first use, in a worker
+thread, rather than when this module is imported.
+"""
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .base import MemoryBackend
+
+
+class GraphitiBackend(MemoryBackend):
+    """Graphiti knowledge graph in Neo4j."""
+
+    def __init__(
+        self,
+        neo4j_uri: str,
+        neo4j_user: str,
+        neo4j_password: str,
+        neo4j_database: str,
+        openai_api_key: str | None,
+        embeddings: dict,
+        extraction: dict,
+        embedding_cache: Path | None = None,
+    ):
+        # Set OpenAI API key in environment for Graphiti to use
+        if openai_api_key:
+            os.environ["OPENAI_API_KEY"] = openai_api_key
+        self._openai_api_key = openai_api_key
+
+        # Graphiti is created on first use (see connect)
+        self._neo4j = (neo4j_uri, neo4j_user, neo4j_password)
+        self._embeddings = embeddings
+        self._extraction = extraction
+        self._embedding_cache = embedding_cache
+        self.graphiti = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Create the Graphiti client, importing its stack off the event loop."""
+        async with self._connect_lock:
+            if self.graphiti is None:
+                self.graphiti = await asyncio.to_thread(self._create_graphiti)
+
+    def _create_graphiti(self):
+        from graphiti_core import Graphiti
+        from ..embeddings import create_embedder
+        from ..extraction import create_llm_clients
+
+        # Configured provider behind a persistent vector cache, so repeated
+        # text is never embedded twice
+        cache_dir = self._embedding_cache if self._embeddings.get("cache", True) else None
+        self.embedder = create_embedder(self._embeddings, cache_dir)
+
+        # Extraction LLM (OpenAI, or local through Ollama's OpenAI-compatible API)
+        llm_client, cross_encoder = create_llm_clients(self._extraction, self._openai_api_key)
+
+        return Graphiti(
+            *self._neo4j,
+            llm_client=llm_client,
+            embedder=self.embedder,
+            cross_encoder=cross_encoder,
+        )
+
+    async def initialize(self) -> None:
+        await self.graphiti.build_indices_and_constraints()
+
+    async def add_episode(self, content: str, source: str, timestamp: datetime) -> tuple[int, int]:
+        from graphiti_core.nodes import EpisodeType
+
+        result = await self.graphiti.add_episode(
+            name=f"episode_{timestamp.isoformat()}",
+            episode_body=content,
+            source=EpisodeType.text,
+            source_description=source,
+            reference_time=timestamp,
+        )
+        return len(result.nodes), len(result.edges)
+
+    async def add_episodes(self, episodes: list[dict]) -> tuple[int, int]:
+        """Graphiti bulk ingestion: much faster, but skips edge invalidation."""
+        from graphiti_core.nodes import EpisodeType
+        from graphiti_core.utils.bulk_utils import RawEpisode
+
+        result = await self.graphiti.add_episode_bulk([
+            RawEpisode(
+                name=f"episode_{episode['timestamp'].isoformat()}",
+                content=episode["content"],
+                source=EpisodeType.text,
+                source_description=episode["source"],
+                reference_time=episode["timestamp"],
+            )
+            for episode in episodes
+        ])
+        return len(result.nodes), len(result.edges)
+
+    async def search(self, query: str, num_results: int) -> list[dict[str, Any]]:
+        results = await self.graphiti.search(query, num_results=num_results)
+
+        # Format results for context injection
+        context_items = []
+        for result in results:
+            # Extract human-readable content from Graphiti objects
+            if hasattr(result, "fact"):
+                # Edge (relationship) - has .fact attribute
+                content = result.fact
+            elif hasattr(result, "name"):
+                # EntityNode - has .name and .summary
+                content = f"{result.name}: {getattr(result, 'summary', '')}"
+            else:
+                # Fallback
+                content = str(result)
+
+            context_items.append({
+                "type": result.__class__.__name__,
+                "content": content,
+                "score": getattr(result, "score", None),
+            })
+
+        return context_items
+
+    async def change_marker(self) -> str:
+        result = await self.graphiti.driver.execute_query(
+            "MATCH (e:Episodic) RETURN count(e) AS episodes, max(e.created_at) AS latest"
+        )
+        record = result.records[0]
+        return f"{record['episodes']}:{record['latest']}"
+
+    async def size(self) -> dict[str, int]:
+        result = await self.graphiti.driver.execute_query(
+            "MATCH (n:Entity) WITH count(n) AS nodes "
+            "OPTIONAL MATCH ()-[r:RELATES_TO]->() RETURN nodes, count(r) AS edges"
+        )
+        record = result.records[0]
+        return {"nodes": record["nodes"], "edges": record["edges"]}
+
+    async def close(self) -> None:
+        if self.graphiti is not None:
+            await self.graphiti.close()
@@ -0,0 +1,166 @@
+"""
+Retrieval result cache for graph memory.
+
+Every search costs an embedding call plus several Neo4j queries, even for
+repeated questions. Results are cached per normalized query with LRU
+eviction and a TTL, and the whole cache is invalidated whenever new data
+is written to the graph. An optional semantic tier also serves a cached
+result when a new query's embedding is close enough to a cached one.
+"""
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class RetrievalCache:
+    """LRU + TTL cache of search results, with an optional semantic tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 300.0,
+        semantic_threshold: float = 0.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+
+        # Bumped on every invalidation so in-flight searches can't
+        # repopulate the cache with results from before a write.
+        self.generation = 0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._miss_seconds = 0.0
+
+        self._entries: OrderedDict[tuple[str, int], tuple[float, Any, Any]] = OrderedDict()
+        self._matrix = None
+        self._matrix_keys: list[tuple[str, int]] = []
+
+    @property
+    def semantic(self) -> bool:
+        return self.semantic_threshold > 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get(self, query: str, num_results: int) -> Any | None:
+        """Return cached results for an exact (normalized) query."""
+        key = (self.normalize(query), num_results)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_seconds += self.average_miss_seconds
+        return entry[1]
+
+    def get_similar(self, vector: list[float], num_results: int) -> Any | None:
+        """Return cached results for the most similar cached query, if close enough."""
+        if not self.semantic:
+            return None
+        # Expired entries must not win the argmax over fresh ones
+        self._expire()
+        if not self._entries:
+            return None
+
+        import numpy as np
+
+        if self._matrix is None:
+            self._matrix_keys = [
+                key for key, entry in self._entries.items() if entry[2] is not None
+            ]
+            if not self._matrix_keys:
+                return None
+            self._matrix = np.stack([self._entries[key][2] for key in self._matrix_keys])
+
+        query = self._unit(vector)
+        candidates = [i for i, key in enumerate(self._matrix_keys) if key[1] == num_results]
+        if not candidates:
+            return None
+
+        scores = self._matrix[candidates] @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+
+        key = self._matrix_keys[candidates[best]]
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        self.semantic_hits += 1
+        self.saved_seconds += self.average_miss_seconds
+        return entry[1]
+
+    def put(
+        self,
+        query: str,
+        num_results: int,
+        results: Any,
+        vector: list[float] | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """Cache results, unless the graph changed since `generation` was read."""
+        if generation is not None and generation != self.generation:
+            return
+
+        key = (self.normalize(query), num_results)
+        unit = self._unit(vector) if vector is not None and self.semantic else None
+        self._entries[key] = (time.monotonic() + self.ttl, results, unit)
+        self._entries.move_to_end(key)
+        self._matrix = None
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record_miss(self, seconds: float) -> None:
+        """Record a cache miss and how long the real search took."""
+        self.misses += 1
+        self._miss_seconds += seconds
+
+    @property
+    def average_miss_seconds(self) -> float:
+        return self._miss_seconds / self.misses if self.misses else 0.0
+
+    def invalidate(self) -> None:
+        """Drop every cached result (new data was written to the graph)."""
+        self._entries.clear()
+        self._matrix = None
+        self.generation += 1
+
+    def stats(self) -> dict[str, float]:
+        """Hit/miss counters and the estimated search time saved."""
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self._entries),
+        }
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[0] < now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _drop(self, key: tuple[str, int]) -> None:
+        self._entries.pop(key, None)
+        self._matrix = None
+
+    @staticmethod
+    def _unit(vector):
+        import numpy as np
+
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
@@ -1,10 +1,13 @@
 """Rich CLI interface for Yael."""
 import asyncio
+import signal
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import FileHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+from prompt_toolkit.patch_stdout import patch_stdout
 
 from .engine import ChatEngine
 from .config import CONFIG_DIR, CONFIG_FILE
@@ -17,6 +20,7 @@ COMMANDS = {
     "/system": "Show current system prompt",
     "/edit": "Edit system prompt (opens in $EDITOR)",
     "/config": "Open config file location",
+    "/stats": "Show latency percentiles and cache stats",
     "/quit": "Exit Yael",
 }
 
@@ -114,6 +118,9 @@ async def handle_command(cmd: str, engine: ChatEngine) -> bool:
             border_style="green",
         ))
 
+    elif cmd == "/stats":
+        print_stats(engine)
+
     elif cmd == "/config":
         console.print(f"[dim]Config file: {CONFIG_FILE}[/dim]")
 
@@ -138,31 +145,172 @@ async def handle_command(cmd: str, engine: ChatEngine) -> bool:
     return True
 
 
+LATENCY_LABELS = {
+    "retrieval": "Graph retrieval (ms)",
+    "prompt_assembly": "Prompt assembly (ms)",
+    "ttft": "Time to first token (ms)",
+    "tokens_per_sec": "Generation (tokens/s)",
+    "episode_write": "Episode write (ms)",
+}
+
+
+def print_stats(engine: ChatEngine) -> None:
+    """Print latency percentiles and cache/queue counters for this session."""
+    stats = engine.stats()
+
+    table = Table(title="Latency", title_justify="left")
+    table.add_column("Span")
+    for column in ("count", "p50", "p95", "mean"):
+        table.add_column(column, justify="right")
+    for name, label in LATENCY_LABELS.items():
+        summary = stats["latency"].get(name)
+        if summary is None:
+            continue
+        table.add_row(
+            label,
+            str(summary["count"]),
+            *(f"{summary[key]:.1f}" for key in ("p50", "p95", "mean")),
+        )
+    if table.row_count:
+        console.print(table)
+    else:
+        console.print("[dim]No turns yet.[/dim]")
+
+    prefill = stats["prefill"]
+    if prefill["turns"]:
+        console.print(
+            f"[dim]Prefill: {prefill['evaluated_tokens'] // prefill['turns']} prompt tokens evaluated per turn "
+            f"(the rest from Ollama's cache), {prefill['seconds']:.1f}s over {prefill['turns']} turns[/dim]"
+        )
+    cache = stats["cache"]
+    if cache is not None:
+        console.print(
+            f"[dim]Retrieval cache: {cache['hit_rate']:.0%} hit rate "
+            f"({cache['hits']} exact, {cache['semantic_hits']} semantic, {cache['misses']} misses), "
+            f"~{cache['saved_seconds']:.1f}s saved[/dim]"
+        )
+    retrieval = stats["retrieval"]
+    if retrieval["stale"] or retrieval["empty"] or retrieval["skipped"] or retrieval["failed"]:
+        console.print(
+            f"[dim]Retrieval: {retrieval['fresh']} in time, "
+            f"{retrieval['stale'] + retrieval['empty']} past the deadline, "
+            f"{retrieval['failed']} failed, {retrieval['skipped']} skipped"
+            f"{' (graph unavailable, probing)' if retrieval['open'] else ''}[/dim]"
+        )
+    gate = stats["gate"]
+    if gate is not None and (gate["search"] or gate["reuse"] or gate["skip"]):
+        console.print(
+            f"[dim]Retrieval gate: {gate['search']} searched, {gate['reuse']} reused the last context, "
+            f"{gate['skip']} skipped ({gate['avoided']:.0%} of searches avoided)[/dim]"
+        )
+    prefetch = stats["prefetch"]
+    if prefetch is not None and prefetch["queries"]:
+        console.print(
+            f"[dim]Prefetch: {prefetch['hits']} of {prefetch['hits'] + prefetch['misses']} searched turns "
+            f"served from {prefetch['queries']} prefetched queries ({prefetch['hit_rate']:.0%})[/dim]"
+        )
+    episodes = stats["episodes"]
+    console.print(
+        f"[dim]Episodes: {episodes['buffered_turns']} turns buffered, {episodes['batches']} batches "
+        f"({episodes['dropped_turns']} trivial turns dropped), "
+        f"{episodes['pending']} pending, {episodes['failed']} failed; "
+        f"history ~{stats['history']['tokens']} tokens, {stats['history']['folds']} summary folds[/dim]"
+    )
+    ingest = stats["ingest"]
+    if ingest["episodes"]:
+        console.print(
+            f"[dim]Graph writes: {ingest['episodes']} episodes, {ingest['llm_calls']} LLM calls "
+            f"(~{ingest['input_tokens'] + ingest['output_tokens']} tokens), "
+            f"{ingest['embedded_texts']} embeddings, {ingest['nodes']} nodes, {ingest['edges']} edges[/dim]"
+        )
+    for name, limits in stats["limits"].items():
+        if limits["calls"]:
+            console.print(
+                f"[dim]{name.capitalize()} calls: {limits['calls']} "
+                f"({limits['active']} active, {limits['waiting']} waiting, "
+                f"{limits['rate_limited']} rate limited)[/dim]"
+            )
+    console.print()
+
+
+async def stream_reply(engine: ChatEngine, user_input: str) -> None:
+    """Stream a reply to the console. Ctrl-C cancels generation mid-reply."""
+
+    async def consume():
+        async for token in engine.chat(user_input):
+            console.print(token, end="", highlight=False)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(consume())
+    previous = signal.signal(
+        signal.SIGINT,
+        lambda *_: loop.call_soon_threadsafe(task.cancel),
+    )
+    try:
+        await task
+        console.print("\n")
+    except asyncio.CancelledError:
+        # Re-raise if we are being cancelled ourselves, not just the reply
+        if asyncio.current_task().cancelling():
+            raise
+        console.print("\n[dim]Interrupted.[/dim]\n")
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def print_setup_hints():
+    """Print the usual causes of initialization failures."""
+    console.print("\n[yellow]Make sure:[/yellow]")
+    console.print("  1. Docker is running: [cyan]docker-compose up -d[/cyan]")
+    console.print("  2. Ollama is running: [cyan]ollama serve[/cyan]")
+    console.print("  3. Model is pulled: [cyan]ollama pull llama3.1:8b[/cyan]")
+    console.print("  4. OPENAI_API_KEY is set in .env")
+
+
+async def check_model(engine: ChatEngine) -> None:
+    """Warn if the configured Ollama model is not available."""
+    if not await engine.llm.is_available():
+        console.print("[yellow]Warning: Ollama model not available. Run:[/yellow]")
+        console.print(f"  [cyan]ollama pull {engine.config['llm']['model']}[/cyan]")
+        console.print("\n[dim]You can continue, but chat won't work until model is available.[/dim]\n")
+
+
+def report_setup(task: asyncio.Task) -> None:
+    """Report a failed background initialization (or retry of one)."""
+    if task.cancelled() or task.exception() is None:
+        return
+    console.print(f"[red]Failed to initialize: {task.exception()}[/red]")
+    print_setup_hints()
+
+
 async def run_cli():
     """Main CLI loop."""
     print_welcome()
 
-    # Check prerequisites
-    console.print("[dim]Initializing...[/dim]")
-
     try:
         engine = ChatEngine()
-        await engine.initialize()
     except Exception as e:
         console.print(f"[red]Failed to initialize: {e}[/red]")
-        console.print("\n[yellow]Make sure:[/yellow]")
-        console.print("  1. Docker is running: [cyan]docker-compose up -d[/cyan]")
-        console.print("  2. Ollama is running: [cyan]ollama serve[/cyan]")
-        console.print("  3. Model is pulled: [cyan]ollama pull llama3.1:8b[/cyan]")
-        console.print("  4. OPENAI_API_KEY is set in .env")
+        print_setup_hints()
         return
 
-    if not engine.llm.is_available():
-        console.print("[yellow]Warning: Ollama model not available. Run:[/yellow]")
-        console.print(f"  [cyan]ollama pull {engine.config['llm']['model']}[/cyan]")
-        console.print("\n[dim]You can continue, but chat won't work until model is available.[/dim]\n")
+    if engine.config["cli"]["fast_start"]:
+        # Show the prompt now; connect, set up indices and profile meanwhile
+        engine.setup_reporter = report_setup  # Also reports setup retried by a turn
+        engine.start()
+        model_check = asyncio.create_task(check_model(engine))
+    else:
+        console.print("[dim]Initializing...[/dim]")
+        try:
+            await engine.initialize()
+        except Exception as e:
+            console.print(f"[red]Failed to initialize: {e}[/red]")
+            print_setup_hints()
+            return
 
-    console.print("[green]Ready![/green]\n")
+        model_check = asyncio.create_task(check_model(engine))
+        await model_check
+        console.print("[green]Ready![/green]\n")
 
     # Setup prompt with history
     history_file = CONFIG_DIR / "history.txt"
@@ -170,16 +318,15 @@ async def run_cli():
         history=FileHistory(str(history_file)),
         auto_suggest=AutoSuggestFromHistory(),
     )
+    # Background work slows down while the user is typing
+    session.default_buffer.on_text_changed += lambda _: engine.scheduler.typing()
 
     try:
         while True:
             try:
-                # Run prompt in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                user_input = await loop.run_in_executor(
-                    None,
-                    lambda: session.prompt("You: ")
-                )
+                # Background messages print above the prompt while it is shown
+                with patch_stdout(raw=True):
+                    user_input = await session.prompt_async("You: ")
                 user_input = user_input.strip()
             except KeyboardInterrupt:
                 console.print()
@@ -200,18 +347,17 @@ async def run_cli():
             console.print("[bold blue]Yael:[/bold blue] ", end="")
 
             try:
-                response_text = ""
-                async for token in engine.chat(user_input):
-                    console.print(token, end="", highlight=False)
-                    response_text += token
-
-                console.print("\n")
+                await stream_reply(engine, user_input)
             except Exception as e:
                 console.print(f"\n[red]Error: {e}[/red]\n")
                 if "model" in str(e).lower():
                     console.print("[yellow]Hint: Make sure Ollama is running with the model loaded[/yellow]\n")
 
     finally:
+        model_check.cancel()
+        unsaved = engine.episodes.pending + bool(engine.batcher.buffered)
+        if unsaved:
+            console.print(f"[dim]Saving {unsaved} memories...[/dim]")
         await engine.close()
         console.print("[dim]Goodbye![/dim]")
 
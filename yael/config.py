@@ -1,4 +1,5 @@
 """Configuration management for Yael."""
+import copy
 from pathlib import Path
 from typing import Any
 import yaml
@@ -11,17 +12,103 @@ DEFAULT_CONFIG = {
     "llm": {
         "model": "llama3.1:8b",
         "base_url": "http://localhost:11434",
+        "keep_alive": "30m",  # keep the model and its KV cache loaded between turns
     },
     "embeddings": {
-        "provider": "openai",
+        "provider": "openai",  # or "ollama" for a local model, e.g. nomic-embed-text
         "model": "text-embedding-3-small",
+        "base_url": None,  # defaults to the provider's (llm.base_url for ollama)
+        "batch_size": 64,
+        "cache": True,  # persistent vector cache in ~/.yael/embeddings
+        "concurrency": 8,  # embedding calls in flight, shared by chat and imports
+        "requests_per_minute": 0,  # 0 = unlimited
+    },
+    # LLM Graphiti uses to extract entities and relationships from episodes
+    "extraction": {
+        "provider": "openai",  # "ollama", or "openai_compatible" with a base_url
+        "model": None,  # provider default (llm.model for ollama)
+        "small_model": None,
+        "base_url": None,  # defaults to llm.base_url + "/v1" for ollama
+        "concurrency": 4,  # extraction calls in flight, shared by chat and imports
+        "requests_per_minute": 0,  # 0 = unlimited
     },
     "graph": {
-        "uri": "bolt://localhost:7688",
+        # "graphiti": Graphiti on Neo4j (docker-compose.yml); "embedded": a local
+        # SQLite file with an in-process vector index, no server needed
+        "backend": "graphiti",
+        "path": None,  # embedded database (default ~/.yael/memory.db)
+        "uri": "bolt://localhost:7688",  # Neo4j settings, for the graphiti backend
         "user": "neo4j",
         "password": "yaelgraph",
         "database": "neo4j",
     },
+    "retrieval": {
+        "cache_size": 256,
+        "cache_ttl": 300.0,
+        # Cosine similarity above which a cached result is reused for a
+        # different query (0 disables the semantic tier)
+        "semantic_threshold": 0.0,
+        # Seconds a turn waits for memory before replying without it (0 = no
+        # limit); a late result is kept for the next turn
+        "deadline": 2.0,
+        "breaker_threshold": 3,  # consecutive failures/misses before skipping the graph
+        "probe_interval": 15.0,  # seconds between health probes while skipped
+        # Decide per turn whether to search, reuse the last turn's context
+        # (follow-ups) or skip memory (acknowledgements)
+        "gate": True,
+        "reuse_similarity": 0.8,  # query similarity to the last search that counts as the same topic
+        "max_reuse": 3,  # consecutive reuses before searching again
+        "gate_embed_timeout": 0.3,  # seconds to wait for the similarity check's embedding
+    },
+    # Likely follow-up queries are searched while a reply streams, so the
+    # next turn can skip its search
+    "prefetch": {
+        "enabled": True,
+        "max_queries": 4,  # searches started per prediction (entities plus one topic)
+        "ttl": 120.0,  # seconds prefetched results are used
+        "similarity": 0.75,  # message similarity to a prefetched query that counts as a hit
+    },
+    "cli": {
+        "fast_start": True,
+    },
+    "prompt": {
+        # "stable": system prompt + history form an append-only prefix and the
+        # retrieved context sits next to the new message (KV cache friendly);
+        # "legacy": context right after the system prompt
+        "layout": "stable",
+    },
+    "history": {
+        "max_tokens": 3000,  # recent turns kept verbatim in the prompt
+        "summary_tokens": 400,  # length of the summary of older turns
+        "fold_to": 0.5,  # fold older turns until recent ones fit this share of max_tokens
+    },
+    # Background work (episode extraction, profile refresh, imports) yields
+    # to the user: limits are background calls per governor, None = no cap
+    "scheduler": {
+        "typing_grace": 2.0,  # seconds after a keystroke the user counts as typing
+        "typing_background": 1,
+        "replying_background": 0,  # paused while a turn is retrieved and streamed
+        "replying_embedding": 1,  # except embeddings, so prefetches search during the reply
+    },
+    "episodes": {
+        "workers": 2,
+        "max_attempts": 3,
+        "flush_timeout": 30.0,
+        # Chat turns are written as one episode per batch of exchanges
+        "batch_turns": 4,  # 1 = an episode per turn
+        "batch_tokens": 1500,
+        "idle_flush": 300.0,  # seconds without a turn before a partial batch is written
+        "skip_trivial": True,  # drop bare acknowledgements ("thanks", "ok")
+    },
+    "import": {
+        "concurrency": 4,
+        "bulk_size": 0,
+        "max_episode_tokens": 2000,
+        "yield_to_chat": True,  # slow down while Yael is in use (see scheduler)
+    },
+    "metrics": {
+        "traces": False,  # append per-turn timings to ~/.yael/traces/*.jsonl
+    },
     "system_prompt": """You are Yael (יָעֵל), a personal AI assistant with persistent graph memory.
 Your name means "mountain goat" in Hebrew - you climb impossible terrain.
 
@@ -115,13 +202,14 @@ def load_config() -> dict[str, Any]:
 
     if not CONFIG_FILE.exists():
         save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG)
 
     with open(CONFIG_FILE) as f:
         user_config = yaml.safe_load(f) or {}
 
-    # Merge with defaults (deep merge for nested dicts)
-    config = DEFAULT_CONFIG.copy()
+    # Merge with defaults (deep merge for nested dicts), on a copy so the
+    # defaults themselves never change
+    config = copy.deepcopy(DEFAULT_CONFIG)
     for key, value in user_config.items():
         if isinstance(value, dict) and key in config and isinstance(config[key], dict):
             config[key].update(value)
@@ -138,9 +226,12 @@ def save_config(config: dict[str, Any]) -> None:
         yaml.dump(config, f, default_flow_style=False, sort_keys=False)
 
 
-def get_openai_key() -> str:
-    """Get OpenAI API key from environment."""
+def get_openai_key(required: bool = True) -> str | None:
+    """Get OpenAI API key from environment.
+
+    Only required when embeddings or extraction use OpenAI.
+    """
     key = os.getenv("OPENAI_API_KEY")
-    if not key:
+    if not key and required:
         raise ValueError("OPENAI_API_KEY not set in environment or .env file")
-    return key
+    return key or None
@@ -0,0 +1,353 @@
+"""
+Embedding providers and reuse for graph memory.
+
+Every query and ingested fact is embedded, so embeddings are cached at
+two levels: an in-process LRU, and a persistent content-hash to vector
+store on disk that is shared by chat retrieval and the importer. The
+provider itself is pluggable - OpenAI, or a local Ollama embedding
+model so the retrieval hot path can run fully local.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from graphiti_core.embedder.client import EmbedderClient
+
+from .limits import Governor, governor, is_rate_limit
+from .metrics import ingest_cost
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class VectorStore:
+    """Content-hash to vector cache backed by a memory-mapped array file.
+
+    One directory per provider/model holds:
+      vectors.f32  - appended rows of `dim` float32 values
+      index.tsv    - appended "<sha256>\\t<row>" lines
+      meta.json    - {"dim": ...}
+    Appends are serialized with a file lock so several processes (chat and
+    an import) can share the store; each picks up the others' rows on a miss.
+
+    Vectors are written before their index lines, so the index is the
+    commit record: a row counts once its line is complete. Rows or a line
+    left over from a crashed append are truncated away under the lock on
+    first use, before anything else is appended. The methods do blocking
+    file I/O; CachedEmbedder calls them in a worker thread.
+    """
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.vectors_path = directory / "vectors.f32"
+        self.index_path = directory / "index.tsv"
+        self.meta_path = directory / "meta.json"
+
+        self.dim: int | None = None
+        if self.meta_path.exists():
+            self.dim = json.loads(self.meta_path.read_text())["dim"]
+
+        self._rows: dict[str, int] = {}
+        self._committed = 0
+        self._index_offset = 0
+        self._map = None
+        self._mapped_rows = 0
+        self._opened = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return len(self._rows)
+
+    def get(self, text: str) -> list[float] | None:
+        return self.get_many([text]).get(text)
+
+    def get_many(self, texts: list[str]) -> dict[str, list[float]]:
+        """Stored vectors for whichever of `texts` have one."""
+        with self._lock:
+            self._open()
+            keys = {text: self.key(text) for text in texts}
+            if any(key not in self._rows for key in keys.values()):
+                # Another process may have added them since we last looked
+                self._read_index()
+
+            found = {}
+            for text, key in keys.items():
+                row = self._rows.get(key)
+                if row is None:
+                    continue
+                if row >= self._mapped_rows:
+                    self._remap()
+                    if row >= self._mapped_rows:
+                        continue
+                found[text] = self._map[row].tolist()
+            return found
+
+    def put_many(self, items: list[tuple[str, list[float]]]) -> None:
+        """Append vectors for texts not already stored."""
+        with self._lock:
+            self._open()
+            items = [(self.key(text), vector) for text, vector in items]
+            items = [(key, vector) for key, vector in items if key not in self._rows]
+            if not items:
+                return
+
+            if self.dim is None:
+                self.dim = len(items[0][1])
+                self.meta_path.write_text(json.dumps({"dim": self.dim}))
+            items = [(key, vector) for key, vector in items if len(vector) == self.dim]
+
+            with self._locked_index() as index:
+                self._read_index()
+                items = [(key, vector) for key, vector in items if key not in self._rows]
+                if not items:
+                    return
+                # Append after the last committed row, dropping any rows a
+                # crashed writer left without index lines
+                row = self._committed
+                with open(self.vectors_path, "ab") as vectors:
+                    vectors.truncate(row * self.dim * 4)
+                    vectors.write(np.asarray(
+                        [vector for _, vector in items], dtype=np.float32
+                    ).tobytes())
+                lines = []
+                for key, _ in items:
+                    lines.append(f"{key}\t{row}\n")
+                    row += 1
+                index.write("".join(lines).encode("utf-8"))
+                index.flush()
+                self._read_index()
+
+    def _open(self) -> None:
+        """Drop anything a crashed append left behind, then load the index."""
+        if self._opened:
+            return
+        self._opened = True
+        if not self.index_path.exists() and not self.vectors_path.exists():
+            return
+        with self._locked_index() as index:
+            size = index.seek(0, os.SEEK_END)
+            if size:
+                index.seek(size - 1)
+                if index.read(1) != b"\n":
+                    index.seek(0)
+                    index.truncate(index.read().rfind(b"\n") + 1)
+            self._read_index()
+            if self.dim is not None and self.vectors_path.exists():
+                size = self._committed * self.dim * 4
+                if self.vectors_path.stat().st_size > size:
+                    with open(self.vectors_path, "r+b") as vectors:
+                        vectors.truncate(size)
+
+    @contextmanager
+    def _locked_index(self):
+        with open(self.index_path, "a+b") as index:
+            if fcntl is not None:
+                fcntl.flock(index, fcntl.LOCK_EX)
+            try:
+                yield index
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index, fcntl.LOCK_UN)
+
+    def _read_index(self) -> None:
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Partially written line; read it next time
+                key, _, row = line.rstrip("\n").partition("\t")
+                if row.isdigit():
+                    self._rows[key] = int(row)
+                    self._committed = max(self._committed, int(row) + 1)
+                self._index_offset += len(line.encode("utf-8"))
+
+    def _remap(self) -> None:
+        if self.dim is None or not self.vectors_path.exists():
+            return
+        rows = min(self._committed, self.vectors_path.stat().st_size // (self.dim * 4))
+        if rows:
+            self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            self._mapped_rows = rows
+
+
+class OllamaEmbedder(EmbedderClient):
+    """Embeddings from a local Ollama model, sent in batches."""
+
+    def __init__(self, model: str, base_url: str = "http://localhost:11434", batch_size: int = 64):
+        from ollama import AsyncClient
+
+        self.model = model
+        self.batch_size = batch_size
+        self.client = AsyncClient(host=base_url)
+
+    async def create(self, input_data) -> list[float]:
+        if isinstance(input_data, list) and len(input_data) == 1:
+            input_data = input_data[0]
+        return (await self.create_batch([input_data]))[0]
+
+    async def create_batch(self, input_data_list: list[str]) -> list[list[float]]:
+        vectors = []
+        for start in range(0, len(input_data_list), self.batch_size):
+            response = await self.client.embed(
+                model=self.model,
+                input=input_data_list[start:start + self.batch_size],
+            )
+            vectors.extend(list(vector) for vector in response["embeddings"])
+        return vectors
+
+
+class CachedEmbedder(EmbedderClient):
+    """Embedder that reuses vectors from memory, then the on-disk store."""
+
+    def __init__(
+        self,
+        inner: EmbedderClient,
+        store: VectorStore | None = None,
+        max_entries: int = 4096,
+        governor: Governor | None = None,
+    ):
+        self.inner = inner
+        self.store = store
+        self.governor = governor
+        self.max_entries = max_entries
+        self._vectors: OrderedDict[str, list[float]] = OrderedDict()
+
+    def __getattr__(self, name):
+        # Expose the wrapped embedder's config and attributes to Graphiti
+        return getattr(self.inner, name)
+
+    async def create(self, input_data) -> list[float]:
+        # Graphiti passes single texts as a one-element list
+        text = input_data
+        if isinstance(text, list) and len(text) == 1:
+            text = text[0]
+        if not isinstance(text, str):
+            return await self.inner.create(input_data)
+
+        vector = (await self._get([text])).get(text)
+        if vector is None:
+            vector = await self._call(self.inner.create, input_data, 1)
+            await self._put([(text, vector)])
+        else:
+            self._count_cached(1)
+        return vector
+
+    async def create_batch(self, input_data_list: list[str]) -> list[list[float]]:
+        texts = list(dict.fromkeys(input_data_list))
+        found = await self._get(texts)
+        missing = [text for text in texts if text not in found]
+        self._count_cached(len(texts) - len(missing))
+        if missing:
+            vectors = await self._call(self.inner.create_batch, missing, len(missing))
+            found.update(zip(missing, vectors))
+            await self._put(list(zip(missing, vectors)))
+        return [found[text] for text in input_data_list]
+
+    def peek(self, text: str) -> list[float] | None:
+        """The memoized vector for `text`, without calling the provider."""
+        return self._vectors.get(text)
+
+    async def prime(self, texts: Iterable[str]) -> None:
+        """Embed all uncached texts in one batch request."""
+        await self.create_batch(list(texts))
+
+    async def _call(self, method, argument, texts: int):
+        """Call the provider, under the embedding governor if there is one."""
+        cost = ingest_cost()
+        if cost is not None:
+            cost.embedding_calls += 1
+            cost.embedded_texts += texts
+
+        if self.governor is None:
+            return await method(argument)
+        async with self.governor.slot():
+            try:
+                return await method(argument)
+            except Exception as exc:
+                if is_rate_limit(exc):
+                    self.governor.backoff()
+                raise
+
+    @staticmethod
+    def _count_cached(texts: int) -> None:
+        cost = ingest_cost()
+        if cost is not None:
+            cost.cached_embeddings += texts
+
+    async def _get(self, texts: list[str]) -> dict[str, list[float]]:
+        """Vectors for `texts` from memory, then from the store."""
+        found = {}
+        for text in texts:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+                found[text] = vector
+        missing = [text for text in texts if text not in found]
+        if missing and self.store is not None:
+            stored = await asyncio.to_thread(self.store.get_many, missing)
+            for text, vector in stored.items():
+                self._remember(text, vector)
+            found.update(stored)
+        return found
+
+    async def _put(self, items: list[tuple[str, list[float]]]) -> None:
+        for text, vector in items:
+            self._remember(text, vector)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.put_many, items)
+
+    def _remember(self, text: str, vector: list[float]) -> None:
+        self._vectors[text] = vector
+        self._vectors.move_to_end(text)
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+
+
+def create_embedder(settings: dict, cache_dir: Path | None = None) -> CachedEmbedder:
+    """Build the configured embedding provider, wrapped in the vector cache.
+
+    `settings` is the "embeddings" config section: provider ("openai" or
+    "ollama"), model, optional base_url and batch_size.
+    """
+    provider = settings.get("provider", "openai")
+    model = settings.get("model", "text-embedding-3-small")
+
+    if provider == "ollama":
+        inner = OllamaEmbedder(
+            model,
+            base_url=settings.get("base_url") or "http://localhost:11434",
+            batch_size=settings.get("batch_size", 64),
+        )
+    elif provider == "openai":
+        from graphiti_core.embedder.openai import OpenAIEmbedder, OpenAIEmbedderConfig
+
+        inner = OpenAIEmbedder(OpenAIEmbedderConfig(
+            embedding_model=model,
+            base_url=settings.get("base_url"),
+        ))
+    else:
+        raise ValueError(f"Unknown embeddings provider: {provider}")
+
+    store = None
+    if cache_dir is not None:
+        store = VectorStore(cache_dir / re.sub(r"[^\w.-]+", "_", f"{provider}-{model}"))
+    return CachedEmbedder(inner, store, governor=governor("embedding"))
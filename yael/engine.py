@@ -1,10 +1,21 @@
 """Core chat engine orchestrating LLM and graph memory."""
 import asyncio
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Callable
 from .llm import LLM
 from .graph import GraphMemory
-from .config import load_config, get_openai_key
-from .profile import build_user_profile, inject_profile
+from .episodes import EpisodeBatcher, EpisodeQueue
+from .history import ConversationHistory
+from .limits import foreground, governor
+from .metrics import Metrics
+from .prefetch import Prefetcher
+from .retrieval import REUSE, SEARCH, SKIP, CircuitBreaker, RetrievalGate, Retriever
+from .scheduler import ACTIVITY_FILE, Scheduler
+from .config import CONFIG_DIR, load_config
+from .profile import inject_profile, load_cached_profile, refresh_profile
+
+PROFILE_CACHE = CONFIG_DIR / "profile.json"
+TRACE_DIR = CONFIG_DIR / "traces"
 
 
 class ChatEngine:
@@ -17,36 +28,172 @@ class ChatEngine:
         self.llm = LLM(
             model=self.config["llm"]["model"],
             base_url=self.config["llm"]["base_url"],
+            keep_alive=self.config["llm"]["keep_alive"],
         )
 
+        # Per-turn latency histograms (and optional JSONL traces)
+        self.metrics = Metrics(TRACE_DIR if self.config["metrics"]["traces"] else None)
+
         # Initialize graph memory (will be set up async)
-        self.graph = GraphMemory(
-            neo4j_uri=self.config["graph"]["uri"],
-            neo4j_user=self.config["graph"]["user"],
-            neo4j_password=self.config["graph"]["password"],
-            neo4j_database=self.config["graph"]["database"],
-            openai_api_key=get_openai_key(),
-            embedding_model=self.config["embeddings"]["model"],
+        self.graph = GraphMemory.from_config(self.config)
+
+        # Background work yields while the user types or a reply is produced
+        self.scheduler = Scheduler.from_config(self.config, ACTIVITY_FILE)
+
+        # Memory lookups for chat turns, bounded by a deadline and skipped
+        # while the graph keeps failing
+        retrieval = self.config["retrieval"]
+        self.retriever = Retriever(
+            self.graph.get_context_string,
+            probe=self.graph.change_marker,
+            fallback=self.graph.cached_context,
+            deadline=retrieval["deadline"],
+            breaker=CircuitBreaker(retrieval["breaker_threshold"]),
+            probe_interval=retrieval["probe_interval"],
+        )
+        # Follow-ups reuse the last context and acknowledgements skip memory
+        self.gate = RetrievalGate(
+            lambda text: self.graph.embedder.create([text]),
+            similarity=retrieval["reuse_similarity"],
+            max_reuse=retrieval["max_reuse"],
+            embed_timeout=retrieval["gate_embed_timeout"],
+        ) if retrieval["gate"] else None
+        # Likely follow-up queries, searched while the reply streams and
+        # the user reads it
+        prefetch = self.config["prefetch"]
+        self.prefetcher = Prefetcher(
+            lambda query: self.graph.search(query, num_results=5),
+            embed=lambda text: self.graph.embedder.create([text]),
+            generation=lambda: self.graph.generation,
+            max_queries=prefetch["max_queries"],
+            ttl=prefetch["ttl"],
+            similarity=prefetch["similarity"],
+            embed_timeout=retrieval["gate_embed_timeout"],
+        ) if prefetch["enabled"] else None
+
+        # Durable write-behind queue for episodes (started in initialize)
+        self.episodes = EpisodeQueue(
+            self.graph,
+            CONFIG_DIR / "episodes.log",
+            workers=self.config["episodes"]["workers"],
+            max_attempts=self.config["episodes"]["max_attempts"],
+            metrics=self.metrics,
+        )
+        # Turns are coalesced into episodes before they reach the queue
+        self.batcher = EpisodeBatcher(
+            self.episodes,
+            CONFIG_DIR / "turns.jsonl",
+            max_turns=self.config["episodes"]["batch_turns"],
+            max_tokens=self.config["episodes"]["batch_tokens"],
+            idle_timeout=self.config["episodes"]["idle_flush"],
+            skip_trivial=self.config["episodes"]["skip_trivial"],
         )
 
-        # Conversation history (current session)
-        self.history: list[dict] = []
+        # Conversation history (current session), kept under a token budget
+        self.history = ConversationHistory(
+            self.llm,
+            max_tokens=self.config["history"]["max_tokens"],
+            summary_tokens=self.config["history"]["summary_tokens"],
+            fold_to=self.config["history"]["fold_to"],
+            governor=governor("chat"),
+        )
         self.base_system_prompt = self.config["system_prompt"]
         self.system_prompt = self.base_system_prompt  # Will be enriched with profile
+        self.prompt_layout = self.config["prompt"]["layout"]
+
+        # Prompt tokens Ollama actually evaluated (the rest came from its KV
+        # cache) and the time it took, as Ollama reports them
+        self.prefill = {"turns": 0, "evaluated_tokens": 0, "seconds": 0.0}
+
         self._initialized = False
+        self._ready_task: asyncio.Task | None = None
+        self._profile_task: asyncio.Task | None = None
+        self._preload_task: asyncio.Task | None = None
+        self.setup_task: asyncio.Task | None = None
+        # Called with each setup task (including retries) once it is done
+        self.setup_reporter: Callable[[asyncio.Task], None] | None = None
+
+    def start(self) -> None:
+        """Start initialization in the background and return immediately.
+
+        A cached profile is injected right away. Connecting to the graph,
+        index setup and the profile refresh run as tasks; a chat turn only
+        waits for the graph connection it needs.
+        """
+        if self.setup_task is not None:
+            return
+
+        cached = load_cached_profile(PROFILE_CACHE)
+        if cached is not None:
+            self.system_prompt = inject_profile(self.base_system_prompt, cached["profile"])
+
+        self._ready_task = asyncio.create_task(self._connect())
+        self._start_setup(cached)
+        self._preload_task = asyncio.create_task(self.llm.preload())
 
     async def initialize(self) -> None:
-        """Initialize graph schema and build user profile."""
-        if not self._initialized:
-            await self.graph.initialize()
+        """Initialize graph schema and build user profile.
+
+        A cached profile is injected immediately and refreshed in the
+        background if the graph changed since it was built.
+        """
+        self.start()
+        await self.setup_task
 
-            # Build user profile from graph
-            profile = await build_user_profile(self.graph, max_per_query=3)
+    async def _wait_ready(self) -> None:
+        """Wait for the graph connection, retrying setup if the last try failed.
+
+        Neo4j or Ollama may not be up yet when Yael starts; a failed
+        connection is attempted again on the next turn instead of leaving
+        the session broken until a restart.
+        """
+        if self._ready_task is None:
+            self.start()
+        if failed(self._ready_task):
+            self._ready_task = asyncio.create_task(self._connect())
+        if failed(self.setup_task):
+            self._start_setup(load_cached_profile(PROFILE_CACHE))
+        await self._ready_task
+
+    def _start_setup(self, cached: dict | None) -> None:
+        self.setup_task = asyncio.create_task(self._setup(cached))
+        if self.setup_reporter is not None:
+            self.setup_task.add_done_callback(self.setup_reporter)
+
+    async def _connect(self) -> None:
+        """Load the graph and Ollama clients, then resume pending writes."""
+        await asyncio.gather(
+            self.graph.connect(),
+            asyncio.to_thread(lambda: self.llm.client),
+        )
+
+        # Resume writing anything left over from the last session
+        self.episodes.start()
+        self.batcher.restore()
+
+    async def _setup(self, cached: dict | None) -> None:
+        await self._ready_task
+        await self.graph.initialize()
+
+        if cached is not None:
+            self._profile_task = asyncio.create_task(self._refresh_profile(cached))
+        else:
+            # Cold start: build user profile from graph
+            profile = await refresh_profile(self.graph, PROFILE_CACHE, max_per_query=3)
 
             # Inject profile into system prompt
             self.system_prompt = inject_profile(self.base_system_prompt, profile)
 
-            self._initialized = True
+        self._initialized = True
+
+    async def _refresh_profile(self, cached: dict) -> None:
+        """Rebuild the cached profile in the background if the graph changed."""
+        try:
+            profile = await refresh_profile(self.graph, PROFILE_CACHE, cached, max_per_query=3)
+        except Exception:
+            return  # Keep the cached profile
+        if profile is not None:
+            self.system_prompt = inject_profile(self.base_system_prompt, profile)
 
     async def chat(self, user_message: str) -> AsyncGenerator[str, None]:
         """Process user message and generate response.
@@ -56,43 +203,158 @@ class ChatEngine:
         3. Stream response from LLM
         4. Store exchange in graph
         """
-        # Ensure initialized
-        if not self._initialized:
-            await self.initialize()
+        # Wait only for the graph connection, not index setup or the profile
+        await self._wait_ready()
 
-        # 1. Get relevant context from graph
-        context = await self.graph.get_context_string(user_message)
+        turn: dict = {}
+        full_response = []
 
-        # 2. Build messages
-        messages = [{"role": "system", "content": self.system_prompt}]
+        # Queued background work waits until the reply is done
+        with self.scheduler.replying():
+            # 1. Get relevant context from graph (ahead of background writes),
+            # without letting a slow or failing graph hold up the reply
+            with self.metrics.span("retrieval", turn), foreground():
+                context = await self._retrieve(user_message, turn)
+            # Guess the next question while this reply streams
+            self._prefetch(user_message, context)
 
-        if context:
-            messages.append({
-                "role": "system",
-                "content": context,
-            })
+            # 2. Build messages
+            with self.metrics.span("prompt_assembly", turn):
+                messages = self.build_messages(user_message, context)
 
-        # Add conversation history
-        messages.extend(self.history)
+            # 3. Stream response (non-blocking, so graph writes already
+            # running can finish)
+            requested = time.perf_counter()
+            async for token in self.llm.stream(messages):
+                if not full_response:
+                    turn["ttft"] = (time.perf_counter() - requested) * 1000
+                    self.metrics.record("ttft", turn["ttft"])
+                full_response.append(token)
+                yield token
 
-        # Add current message
-        messages.append({"role": "user", "content": user_message})
+        response_text = "".join(full_response)
+        self._record_prefill()
+        self._record_generation(turn)
 
-        # 3. Stream response
-        full_response = []
-        for token in self.llm.chat(messages, stream=True):
-            full_response.append(token)
-            yield token
+        # 4. Update history, and prefetch for questions about the reply
+        self.history.add(user_message, response_text)
+        self._prefetch(response_text)
 
-        response_text = "".join(full_response)
+        # 5. Store in graph (batched, write-behind - don't block prompt)
+        self.batcher.add(user_message, response_text)
+
+    async def _retrieve(self, user_message: str, turn: dict) -> str:
+        """This turn's memory context, searched only when the gate says so.
 
-        # 4. Update history
-        self.history.append({"role": "user", "content": user_message})
-        self.history.append({"role": "assistant", "content": response_text})
+        The gate's and the prefetcher's embedding checks come out of the same
+        retrieval deadline as the search itself.
+        """
+        started = time.monotonic()
+
+        def remaining() -> float | None:
+            if self.retriever.deadline <= 0:
+                return None
+            return max(self.retriever.deadline - (time.monotonic() - started), 0.0)
+
+        decision = SEARCH
+        if self.gate is not None:
+            decision, turn["retrieval_reason"] = await self.gate.decide(user_message, remaining())
+        turn["retrieval_decision"] = decision
+        if decision == SKIP:
+            return ""
+        if decision == REUSE:
+            return self.gate.context
+
+        if self.prefetcher is not None:
+            context = await self.prefetcher.lookup(user_message, remaining())
+            if context is not None:
+                turn["retrieval_outcome"] = "prefetched"
+                if self.gate is not None:
+                    self.gate.remember(user_message, context)
+                return context
 
-        # 5. Store in graph (background task - don't block prompt)
-        episode = f"User: {user_message}\nAssistant: {response_text}"
-        asyncio.create_task(self.graph.add_episode(episode))
+        context, turn["retrieval_outcome"] = await self.retriever.context(user_message, remaining())
+        if self.gate is not None and turn["retrieval_outcome"] == "fresh":
+            self.gate.remember(user_message, context)
+        return context
+
+    def _prefetch(self, *texts: str) -> None:
+        """Start searching likely follow-up queries, unless the graph is failing.
+
+        Called outside foreground(): prefetches are background work, never
+        ahead of a real turn's retrieval. The scheduler lets one background
+        embedding call through while a reply streams, so a prefetch started
+        from the user's message is ready by the time they ask again.
+        """
+        if self.prefetcher is None or self.retriever.breaker.open:
+            return
+        self.prefetcher.start(*texts)
+
+    def build_messages(self, user_message: str, context: str = "") -> list[dict]:
+        """Assemble the request messages.
+
+        The "stable" layout keeps the system prompt and history as a prefix
+        that only grows between turns, with this turn's retrieved context
+        placed just before the new user message, so Ollama can reuse its
+        KV cache for the prefix instead of re-evaluating the whole
+        conversation. The "legacy" layout puts the context right after the
+        system prompt, which changes the prefix every turn.
+        """
+        messages = [{"role": "system", "content": self.system_prompt}]
+        context_message = [{"role": "system", "content": context}] if context else []
+
+        if self.prompt_layout == "legacy":
+            messages.extend(context_message)
+            messages.extend(self.history.messages())
+        else:
+            messages.extend(self.history.messages())
+            messages.extend(context_message)
+
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _record_prefill(self) -> None:
+        stats = self.llm.last_stats
+        if not stats:
+            return
+        self.prefill["turns"] += 1
+        self.prefill["evaluated_tokens"] += stats["prompt_eval_count"]
+        self.prefill["seconds"] += stats["prompt_eval_duration"] / 1e9
+
+    def _record_generation(self, turn: dict) -> None:
+        stats = self.llm.last_stats
+        if stats.get("eval_duration"):
+            turn["tokens_per_sec"] = stats["eval_count"] / (stats["eval_duration"] / 1e9)
+            self.metrics.record("tokens_per_sec", turn["tokens_per_sec"])
+        # Timings in milliseconds
+        self.metrics.trace(
+            "turn",
+            **turn,
+            prompt_eval_count=stats.get("prompt_eval_count"),
+            eval_count=stats.get("eval_count"),
+        )
+
+    def stats(self) -> dict:
+        """Latency histograms plus cache, prefill, queue and limit counters."""
+        return {
+            "latency": self.metrics.summary(),
+            "cache": self.graph.cache.stats() if self.graph.cache is not None else None,
+            "retrieval": self.retriever.stats(),
+            "gate": self.gate.stats() if self.gate is not None else None,
+            "prefetch": self.prefetcher.stats() if self.prefetcher is not None else None,
+            "prefill": dict(self.prefill),
+            "episodes": {
+                "pending": self.episodes.pending,
+                "failed": self.episodes.failed,
+                "buffered_turns": self.batcher.buffered,
+                "batches": self.batcher.flushed,
+                "dropped_turns": self.batcher.dropped,
+            },
+            "limits": {name: governor(name).stats() for name in ("extraction", "embedding", "chat")},
+            "scheduler": {"state": self.scheduler.state, "changes": self.scheduler.changes},
+            "history": {"tokens": self.history.tokens(), "folds": self.history.folds},
+            "ingest": self.graph.ingest.as_dict(),
+        }
 
     def update_system_prompt(self, new_prompt: str) -> None:
         """Update the system prompt."""
@@ -100,11 +362,30 @@ class ChatEngine:
         self.config["system_prompt"] = new_prompt
 
     def clear_history(self) -> None:
-        """Clear current session history."""
-        self.history = []
+        """Clear current session history and write out buffered turns."""
+        self.history.clear()
+        self.batcher.flush()
+        if self.gate is not None:
+            self.gate.reset()
+        if self.prefetcher is not None:
+            self.prefetcher.clear()
 
     async def close(self) -> None:
         """Clean up resources."""
-        # Wait a moment for any pending graph writes to complete
-        await asyncio.sleep(0.5)
+        for task in (self._ready_task, self.setup_task, self._profile_task, self._preload_task):
+            if task is not None and not task.done():
+                task.cancel()
+        await self.history.close()
+        await self.retriever.close()
+        if self.prefetcher is not None:
+            await self.prefetcher.close()
+        self.scheduler.close()
+        self.batcher.flush()
+        # Flush pending graph writes; anything left is replayed next startup
+        await self.episodes.close(timeout=self.config["episodes"]["flush_timeout"])
         await self.graph.close()
+
+
+def failed(task: asyncio.Task | None) -> bool:
+    """Whether a task has finished with an exception or was cancelled."""
+    return task is not None and task.done() and (task.cancelled() or task.exception() is not None)
@@ -0,0 +1,385 @@
+"""
+Durable write-behind queue for graph episodes.
+
+Each episode is appended to a log under ~/.yael before the chat turn
+returns, then drained into the graph by a small pool of workers.
+Anything not acknowledged by the time Yael exits is replayed on the
+next startup, so no exchange is lost to a crash or a slow extraction.
+
+Chat turns reach the queue through an EpisodeBatcher, which coalesces
+several exchanges into one episode (one extraction instead of several)
+and drops acknowledgements that carry nothing worth remembering.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from .tokens import estimate_tokens
+
+ACKNOWLEDGEMENTS = (
+    r"ok(?:ay)?|k|thanks?(?: you)?(?: so much)?|thx|ty|cool|great|nice|got it|lol|haha|hmm+|"
+    r"perfect|awesome|makes sense|sounds good|good night|bye"
+)
+ANSWERS = r"yes|yep|yeah|no|nope|sure"
+
+
+def _repeated(words: str) -> re.Pattern:
+    """One or more of `words`, e.g. "ok thanks!" or "cool, got it"."""
+    return re.compile(rf"(?:{words})(?:[\s,.!]+(?:{words}))*\W*", re.IGNORECASE)
+
+
+# User messages that carry nothing on their own ("thanks", "ok thanks!")
+ACKNOWLEDGEMENT = _repeated(ACKNOWLEDGEMENTS)
+# ...plus bare answers ("yes", "no"), which only say nothing when nothing was asked
+TRIVIAL = _repeated(f"{ACKNOWLEDGEMENTS}|{ANSWERS}")
+
+# Replies to trivial messages longer than this are kept (the user may have
+# said "yes" to something substantial)
+TRIVIAL_REPLY_TOKENS = 60
+
+
+def is_trivial(user_message: str, response: str, previous: str | None = None) -> bool:
+    """Whether an exchange is a bare acknowledgement with a short reply.
+
+    `previous` is the assistant's reply before this message. A bare "yes"
+    or "no" only counts when that reply is known and asked nothing; after
+    a question it is the user's decision.
+    """
+    message = user_message.strip()
+    if estimate_tokens(response) >= TRIVIAL_REPLY_TOKENS:
+        return False
+    if ACKNOWLEDGEMENT.fullmatch(message):
+        return True
+    return TRIVIAL.fullmatch(message) is not None and previous is not None and "?" not in previous
+
+
+class JsonLog:
+    """An append-only JSON lines file, kept open, synced off the event loop.
+
+    Each append is written and flushed before it returns, so it survives
+    the process crashing; the fsync that makes it survive a power loss
+    runs in a worker thread, shared by every append made while one runs.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._sync_task: asyncio.Task | None = None
+        self._dirty = False
+
+    def append(self, entry: dict, sync: bool = False) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if sync:
+            self._sync()
+
+    def _sync(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            os.fsync(self._file.fileno())  # No loop to keep responsive
+            return
+        self._dirty = True
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_file())
+
+    async def _sync_file(self) -> None:
+        while self._dirty and self._file is not None:
+            self._dirty = False
+            try:
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+            except (OSError, ValueError):
+                return  # Closed (and replaced or removed) meanwhile
+
+    async def synced(self) -> None:
+        """Wait for the fsync in progress, if any."""
+        if self._sync_task is not None:
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EpisodeQueue:
+    """Append-only episode log drained by a bounded worker pool."""
+
+    def __init__(
+        self,
+        graph,
+        log_path: Path,
+        workers: int = 2,
+        max_attempts: int = 3,
+        metrics=None,
+    ):
+        self.graph = graph
+        self.log_path = log_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.metrics = metrics
+
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._pending: dict[str, dict] = {}
+        # Gave up after max_attempts; kept in the log for the next startup
+        self._failed: dict[str, dict] = {}
+        # Ids acknowledged in the log this process has read or written
+        self._done: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._log = JsonLog(log_path)
+
+    @property
+    def pending(self) -> int:
+        """Number of episodes this session will still try to write."""
+        return len(self._pending)
+
+    @property
+    def failed(self) -> int:
+        """Number of episodes given up on until the next startup."""
+        return len(self._failed)
+
+    def start(self) -> int:
+        """Replay unacknowledged episodes and start the workers.
+
+        Returns the number of episodes replayed from a previous session.
+        """
+        if self._tasks:
+            return 0
+
+        replayed = 0
+        for record in self._read_log():
+            if record["id"] not in self._pending:
+                self._pending[record["id"]] = record
+                self._queue.put_nowait(record)
+                replayed += 1
+
+        self._compact()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        return replayed
+
+    def put(
+        self,
+        content: str,
+        source: str = "conversation",
+        timestamp: datetime | None = None,
+        record_id: str | None = None,
+    ) -> None:
+        """Durably enqueue an episode.
+
+        It is in the log when this returns (see JsonLog). Putting a `record_id` that is already logged is a
+        no-op, so a caller that crashed right after a put can safely put
+        it again.
+        """
+        known = (self._pending, self._failed, self._done)
+        if record_id is not None and any(record_id in ids for ids in known):
+            return
+        record = {
+            "id": record_id or uuid4().hex,
+            "content": content,
+            "source": source,
+            "timestamp": (timestamp or datetime.now(timezone.utc)).isoformat(),
+        }
+        self._log.append({"op": "add", **record}, sync=True)
+        self._pending[record["id"]] = record
+        self._queue.put_nowait(record)
+
+    async def close(self, timeout: float = 30.0) -> int:
+        """Flush pending episodes, waiting at most `timeout` seconds.
+
+        Returns the number of episodes left in the log for replay.
+        """
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+        await self._log.synced()
+        self._log.close()
+
+        if not self._pending:
+            self._compact()
+        return len(self._pending) + len(self._failed)
+
+    async def _worker(self) -> None:
+        while True:
+            record = await self._queue.get()
+            try:
+                await self._write(record)
+            finally:
+                self._queue.task_done()
+
+    async def _write(self, record: dict) -> None:
+        started = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.graph.add_episode(
+                    content=record["content"],
+                    source=record["source"],
+                    # Logs from older versions hold naive local times
+                    timestamp=datetime.fromisoformat(record["timestamp"]).astimezone(timezone.utc),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if attempt == self.max_attempts:
+                    # Leave it in the log; it will be retried next startup
+                    self._failed[record["id"]] = self._pending.pop(record["id"], record)
+                    return
+                await asyncio.sleep(2 ** attempt)
+            else:
+                self._log.append({"op": "done", "id": record["id"]})
+                self._pending.pop(record["id"], None)
+                self._done.add(record["id"])
+                if self.metrics is not None:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    self.metrics.record("episode_write", elapsed)
+                    self.metrics.trace("episode_write", ms=elapsed, attempts=attempt)
+                return
+
+    def _read_log(self) -> list[dict]:
+        """Return logged episodes that were never acknowledged, in order."""
+        if not self.log_path.exists():
+            return []
+
+        added: dict[str, dict] = {}
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash
+                if entry.get("op") == "add":
+                    added[entry["id"]] = {k: v for k, v in entry.items() if k != "op"}
+                elif entry.get("op") == "done":
+                    added.pop(entry.get("id"), None)
+                    self._done.add(entry.get("id"))
+
+        return list(added.values())
+
+    def _compact(self) -> None:
+        """Rewrite the log so it only holds pending and failed episodes."""
+        self._log.close()
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.log_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in [*self._pending.values(), *self._failed.values()]:
+                f.write(json.dumps({"op": "add", **record}) + "\n")
+        os.replace(tmp_path, self.log_path)
+
+
+class EpisodeBatcher:
+    """Buffers chat turns and writes them to the queue as combined episodes.
+
+    A batch is flushed once it holds `max_turns` exchanges or `max_tokens`
+    tokens, after `idle_timeout` seconds without a new turn, and whenever
+    flush() is called (on /clear and on exit). Buffered turns are kept in
+    a file until flushed, so a crash loses nothing: they are written as an
+    episode on the next start.
+    """
+
+    def __init__(
+        self,
+        queue: EpisodeQueue,
+        buffer_path: Path,
+        max_turns: int = 4,
+        max_tokens: int = 1500,
+        idle_timeout: float = 300.0,
+        skip_trivial: bool = True,
+    ):
+        self.queue = queue
+        self.buffer_path = buffer_path
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.idle_timeout = idle_timeout
+        self.skip_trivial = skip_trivial
+
+        self.flushed = 0
+        self.dropped = 0
+        self._buffer = JsonLog(buffer_path)
+        self._turns: list[dict] = []
+        # The last reply, to tell whether a bare "yes" answered a question
+        self._previous: str | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def buffered(self) -> int:
+        """Number of turns waiting to be written."""
+        return len(self._turns)
+
+    def restore(self) -> int:
+        """Write out turns a previous session buffered but never flushed."""
+        if not self.buffer_path.exists():
+            return 0
+        with open(self.buffer_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._turns.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash
+        restored = len(self._turns)
+        self.flush()
+        return restored
+
+    def add(self, user_message: str, response: str) -> None:
+        """Buffer one exchange, flushing if the batch is full."""
+        previous, self._previous = self._previous, response
+        if self.skip_trivial and is_trivial(user_message, response, previous):
+            self.dropped += 1
+            return
+
+        turn = {
+            "content": f"User: {user_message}\nAssistant: {response}",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        self._buffer.append(turn, sync=True)
+        self._turns.append(turn)
+
+        tokens = sum(estimate_tokens(turn["content"]) for turn in self._turns)
+        if len(self._turns) >= self.max_turns or tokens >= self.max_tokens:
+            self.flush()
+        elif self.idle_timeout > 0:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = asyncio.get_running_loop().call_later(self.idle_timeout, self.flush)
+
+    def flush(self) -> bool:
+        """Queue the buffered turns as one episode. Returns False if empty."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._turns:
+            return False
+
+        # Durable in the queue's log before the buffer is dropped. The id
+        # comes from the turns, so if a crash keeps the buffer around the
+        # batch is put again under the same id, and the queue ignores it.
+        content = "\n\n".join(turn["content"] for turn in self._turns)
+        first = self._turns[0]["timestamp"]
+        self.queue.put(
+            content,
+            timestamp=datetime.fromisoformat(first).astimezone(timezone.utc),
+            record_id=hashlib.sha256(f"{first}\n{content}".encode()).hexdigest()[:32],
+        )
+        self._turns = []
+        self._buffer.close()
+        self.buffer_path.unlink(missing_ok=True)
+        self.flushed += 1
+        return True
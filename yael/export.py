@@ -0,0 +1,424 @@
+"""
+Streaming parser for Claude.ai data exports.
+
+Exports can be hundreds of megabytes, so nothing here loads a whole
+file: the top-level JSON array is decoded one element at a time and
+turned into episodes as it is read. Peak memory is bounded by the
+largest single conversation, not by the size of the export.
+
+An export batch holds conversations.json, memories.json, projects.json
+and users.json; ExportReader streams all of them through one pipeline.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+
+_SKIP = " \t\r\n,"
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    opened = False
+
+    while True:
+        # Skip whitespace and separators, reading more input as needed
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of file inside JSON array")
+
+        if not opened:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            opened = True
+            pos += 1
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Element spans the buffer boundary: grow the buffer geometrically
+            # so very large elements still decode in linear time.
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        after = end
+        while after < len(buf) and buf[after] in " \t\r\n":
+            after += 1
+        if not eof and (after == len(buf) or buf[after] not in ",]"):
+            # A number may continue in the next chunk ("12" of "1234", "1.5"
+            # of "1.5e3"), so only trust an element once a delimiter follows
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        yield item
+        pos = end
+        if pos >= chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def parse_timestamp(value: str | None) -> datetime:
+    """Parse an export timestamp as an aware UTC datetime, falling back to now."""
+    try:
+        if value:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc)
+    except ValueError:
+        pass
+    return datetime.now(timezone.utc)
+
+
+def format_message(msg: dict, text: str | None = None) -> str:
+    """Render an export message as an episode line."""
+    speaker = "User" if msg.get("sender", "human") == "human" else "Assistant"
+    return f"{speaker}: {msg.get('text', '') if text is None else text}"
+
+
+def _split_text(text: str, max_chars: int) -> list[str]:
+    """Split text into pieces of at most max_chars, preferring paragraph breaks."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n\n", 0, max_chars)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    pieces.append(text)
+    return pieces
+
+
+def _units(messages: list[dict], budget: int) -> Iterator[tuple[list[str], str | None]]:
+    """Yield (lines, created_at) units that each fit the token budget.
+
+    A unit is normally a whole exchange (a user message plus the replies
+    to it). Exchanges over budget fall back to single messages, and
+    messages over budget are split into pieces.
+    """
+    exchanges: list[list[dict]] = []
+    for msg in messages:
+        if msg.get("sender", "human") == "human" or not exchanges:
+            exchanges.append([])
+        exchanges[-1].append(msg)
+
+    for exchange in exchanges:
+        lines = [format_message(msg) for msg in exchange]
+        if sum(estimate_tokens(line) for line in lines) <= budget:
+            yield lines, exchange[0].get("created_at")
+            continue
+
+        for msg in exchange:
+            line = format_message(msg)
+            if estimate_tokens(line) <= budget:
+                yield [line], msg.get("created_at")
+                continue
+            for piece in _split_text(msg.get("text", ""), budget * CHARS_PER_TOKEN):
+                yield [format_message(msg, piece)], msg.get("created_at")
+
+
+def chunk_conversation(
+    title: str,
+    messages: list[dict],
+    max_tokens: int = 0,
+    default_time: str | None = None,
+) -> list[dict]:
+    """Split a conversation into exchange-aligned episodes under max_tokens.
+
+    Every chunk starts with the conversation title and takes the
+    `created_at` of its first message as its reference time. With
+    max_tokens <= 0 the whole conversation becomes a single episode.
+    """
+    header = f"# {title}"
+    if max_tokens <= 0:
+        lines = [header] + [format_message(msg) for msg in messages]
+        return [{"content": "\n\n".join(lines), "timestamp": parse_timestamp(default_time)}]
+
+    budget = max(max_tokens - estimate_tokens(header) - 8, 1)
+    chunks: list[tuple[list[str], str | None]] = []
+    lines: list[str] = []
+    size = 0
+    started = None
+
+    for unit, created_at in _units(messages, budget):
+        unit_size = sum(estimate_tokens(line) for line in unit)
+        if lines and size + unit_size > budget:
+            chunks.append((lines, started))
+            lines, size = [], 0
+        if not lines:
+            started = created_at or default_time
+        lines.extend(unit)
+        size += unit_size
+
+    if lines:
+        chunks.append((lines, started))
+
+    episodes = []
+    for i, (lines, created_at) in enumerate(chunks, 1):
+        title_line = header if len(chunks) == 1 else f"{header} (part {i}/{len(chunks)})"
+        episodes.append({
+            "content": "\n\n".join([title_line] + lines),
+            "timestamp": parse_timestamp(created_at),
+        })
+    return episodes
+
+
+def parse_claude_export(f: TextIO, max_tokens: int = 0) -> Iterator[dict]:
+    """Stream conversations from Claude's conversations.json export.
+
+    Claude export format:
+    [
+        {
+            "uuid": "...",
+            "name": "Conversation Title",
+            "created_at": "2024-...",
+            "updated_at": "2024-...",
+            "chat_messages": [
+                {
+                    "uuid": "...",
+                    "text": "message content",
+                    "sender": "human" | "assistant",
+                    "created_at": "...",
+                }
+            ]
+        }
+    ]
+
+    Yields {"key": uuid, "episodes": [...]} for each non-empty conversation,
+    with long conversations chunked to max_tokens per episode.
+    """
+    for convo in iter_json_array(f):
+        item = conversation_episodes(convo, max_tokens=max_tokens)
+        if item is not None:
+            yield item
+
+
+def conversation_key(convo: dict) -> str:
+    """A conversation's uuid, or a stable stand-in derived from its content."""
+    if convo.get("uuid"):
+        return convo["uuid"]
+    first = (convo.get("chat_messages") or [{}])[0]
+    seed = json.dumps([convo.get("name"), convo.get("created_at"), first.get("text")], default=str)
+    return "unknown:" + hashlib.sha256(seed.encode()).hexdigest()[:16]
+
+
+def conversation_episodes(convo: dict, max_tokens: int = 0, start: int = 0) -> dict | None:
+    """Turn one exported conversation into {"key": uuid, "episodes": [...]}.
+
+    Only messages from index `start` on are included, which lets
+    incremental imports ingest just what was appended since the last run.
+    Returns None if there is nothing to ingest.
+    """
+    messages = convo.get("chat_messages", [])[start:]
+    if not messages:
+        return None
+
+    title = convo.get("name", "Untitled")
+    if start:
+        title = f"{title} (continued)"
+
+    uuid = conversation_key(convo)
+    chunks = chunk_conversation(
+        title,
+        messages,
+        max_tokens=max_tokens,
+        default_time=convo.get("created_at"),
+    )
+    return {
+        "key": uuid,
+        "episodes": [
+            {**chunk, "source": f"claude_export:{uuid}"} for chunk in chunks
+        ],
+    }
+
+
+def chunk_text(title: str, text: str, max_tokens: int = 0) -> list[str]:
+    """Split a document into titled pieces of at most max_tokens."""
+    header = f"# {title}"
+    text = text.strip()
+    if max_tokens <= 0:
+        return [f"{header}\n\n{text}"]
+
+    budget = max(max_tokens - estimate_tokens(header) - 8, 1)
+    pieces = _split_text(text, budget * CHARS_PER_TOKEN)
+    if len(pieces) == 1:
+        return [f"{header}\n\n{text}"]
+    return [
+        f"{header} (part {i}/{len(pieces)})\n\n{piece}"
+        for i, piece in enumerate(pieces, 1)
+    ]
+
+
+def memory_episodes(entry: dict, max_tokens: int = 0) -> Iterator[dict]:
+    """Turn a memories.json entry into episodes.
+
+    Claude's memory summaries are dense, pre-digested context about the
+    user, so they are a cheap, high-signal source: a few KB of text
+    stands in for thousands of raw conversations.
+    """
+    memories = [("Memory summary", entry.get("account_uuid", "account"), entry.get("conversations_memory"))]
+    for project_uuid, text in (entry.get("project_memories") or {}).items():
+        memories.append(("Project memory summary", project_uuid, text))
+
+    for title, owner, text in memories:
+        if not text or not text.strip():
+            continue
+        # Summaries are rewritten between exports, so key on their content
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        key = f"memory:{owner}:{digest}"
+        yield {
+            "key": key,
+            "episodes": [
+                {"content": content, "timestamp": datetime.now(timezone.utc), "source": "claude_memory"}
+                for content in chunk_text(title, text, max_tokens)
+            ],
+        }
+
+
+def project_episodes(project: dict, max_tokens: int = 0) -> Iterator[dict]:
+    """Turn a projects.json entry into an overview episode plus doc chunks.
+
+    Claude's built-in starter project is a generic how-to guide and is skipped.
+    """
+    if project.get("is_starter_project"):
+        return
+
+    uuid = project.get("uuid", "unknown")
+    name = project.get("name", "Untitled project")
+    source = f"claude_project:{uuid}"
+    updated = parse_timestamp(project.get("updated_at") or project.get("created_at"))
+
+    overview = [
+        part for part in (project.get("description"), project.get("prompt_template"))
+        if part and part.strip()
+    ]
+    episodes = [
+        {"content": content, "timestamp": updated, "source": source}
+        for content in chunk_text(f"Project: {name}", "\n\n".join(overview), max_tokens)
+    ] if overview else []
+
+    for doc in project.get("docs", []):
+        if not doc.get("content", "").strip():
+            continue
+        timestamp = parse_timestamp(doc.get("created_at") or project.get("created_at"))
+        title = f"Project: {name} / {doc.get('filename', 'document')}"
+        episodes.extend(
+            {"content": content, "timestamp": timestamp, "source": source}
+            for content in chunk_text(title, doc["content"], max_tokens)
+        )
+
+    if episodes:
+        yield {"key": f"project:{uuid}:{project.get('updated_at', '')}", "episodes": episodes}
+
+
+def user_episodes(user: dict, max_tokens: int = 0) -> Iterator[dict]:
+    """Turn a users.json entry into a short identity episode."""
+    name = user.get("full_name")
+    if not name:
+        return
+    yield {
+        "key": f"user:{user.get('uuid', 'unknown')}:{name}",
+        "episodes": [{
+            "content": f"# User profile\n\nThe user's name is {name}.",
+            "timestamp": datetime.now(timezone.utc),
+            "source": "claude_user",
+        }],
+    }
+
+
+def _conversation_items(convo: dict, max_tokens: int = 0) -> Iterator[dict]:
+    item = conversation_episodes(convo, max_tokens=max_tokens)
+    if item is not None:
+        yield item
+
+
+# Export files in ingestion order: cheap summaries first, so a new
+# install has a useful profile long before the raw conversations finish.
+SOURCES: dict[str, tuple[str, Callable[[dict, int], Iterator[dict]]]] = {
+    "users": ("users.json", user_episodes),
+    "memories": ("memories.json", memory_episodes),
+    "projects": ("projects.json", project_episodes),
+    "conversations": ("conversations.json", _conversation_items),
+}
+
+
+class ExportReader:
+    """Streams episodes from the files of one export batch, in order."""
+
+    def __init__(self, files: list[tuple[str, Path]]):
+        self.files = files
+        self.total_bytes = max(sum(path.stat().st_size for _, path in files), 1)
+        self._done_bytes = 0
+        self._current: TextIO | None = None
+
+    @classmethod
+    def open(cls, path: Path, sources: Iterable[str] | None = None) -> "ExportReader":
+        """Find the export files to read.
+
+        `path` is either an export directory (data-*/) or a single export
+        file, whose source is inferred from its name (default: conversations).
+        """
+        wanted = set(sources or SOURCES)
+        if path.is_dir():
+            files = [
+                (name, path / filename)
+                for name, (filename, _) in SOURCES.items()
+                if name in wanted and (path / filename).exists()
+            ]
+        else:
+            name = next(
+                (name for name, (filename, _) in SOURCES.items() if path.name == filename),
+                "conversations",
+            )
+            files = [(name, path)] if name in wanted else []
+        return cls(files)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the export's bytes read so far."""
+        current = self._current.buffer.tell() if self._current is not None else 0
+        return (self._done_bytes + current) / self.total_bytes
+
+    def items(
+        self,
+        max_tokens: int = 0,
+        conversations: Callable[[Iterable[dict]], Iterator[dict]] | None = None,
+    ) -> Iterator[dict]:
+        """Yield {"key", "episodes"} items from every file in order.
+
+        `conversations` optionally replaces the default conversation parsing,
+        e.g. with SyncState.select for incremental imports.
+        """
+        for name, path in self.files:
+            with open(path, encoding="utf-8") as f:
+                self._current = f
+                elements = iter_json_array(f)
+                if name == "conversations" and conversations is not None:
+                    yield from conversations(elements)
+                else:
+                    parse = SOURCES[name][1]
+                    for element in elements:
+                        yield from parse(element, max_tokens)
+            self._current = None
+            self._done_bytes += path.stat().st_size
@@ -0,0 +1,113 @@
+"""
+LLM clients Graphiti uses for entity and edge extraction.
+
+By default Graphiti extracts with OpenAI. The "extraction" config section
+can point it at a local Ollama model (through Ollama's OpenAI-compatible
+endpoint) or any other OpenAI-compatible server instead. Every extraction
+call runs under the shared "extraction" governor.
+"""
+import json
+from contextvars import ContextVar
+
+from graphiti_core.llm_client import LLMClient
+from graphiti_core.llm_client.token_tracker import TokenUsageTracker
+
+from .limits import Governor, governor, is_rate_limit
+from .metrics import ingest_cost
+from .tokens import estimate_tokens
+
+
+# (input, output) token counts the provider reported for the current call
+_usage: ContextVar[list[tuple[int, int]] | None] = ContextVar("yael_llm_usage", default=None)
+
+
+class UsageTracker(TokenUsageTracker):
+    """Graphiti's token tracker that also hands each count to the current call."""
+
+    def record(self, prompt_name: str | None, input_tokens: int, output_tokens: int) -> None:
+        super().record(prompt_name, input_tokens, output_tokens)
+        usage = _usage.get()
+        if usage is not None:
+            usage.append((input_tokens, output_tokens))
+
+
+class GovernedLLMClient(LLMClient):
+    """LLM client proxy that runs each call under a Governor."""
+
+    def __init__(self, inner: LLMClient, governor: Governor):
+        self.inner = inner
+        self.governor = governor
+        tracker = getattr(inner, "token_tracker", None)
+        if type(tracker) is TokenUsageTracker:
+            # Clients that read usage from the API response record it here
+            inner.token_tracker = UsageTracker()
+
+    def __getattr__(self, name):
+        # Expose the wrapped client's config, token tracker etc. to Graphiti
+        return getattr(self.inner, name)
+
+    def set_tracer(self, tracer) -> None:
+        self.inner.set_tracer(tracer)
+
+    async def generate_response(self, *args, **kwargs):
+        usage: list[tuple[int, int]] = []
+        token = _usage.set(usage)
+        try:
+            async with self.governor.slot():
+                try:
+                    response = await self.inner.generate_response(*args, **kwargs)
+                except Exception as exc:
+                    if is_rate_limit(exc):
+                        self.governor.backoff()
+                    raise
+        finally:
+            _usage.reset(token)
+
+        cost = ingest_cost()
+        if cost is not None:
+            cost.llm_calls += 1
+            if usage:
+                cost.input_tokens += sum(tokens for tokens, _ in usage)
+                cost.output_tokens += sum(tokens for _, tokens in usage)
+            else:
+                # No reported usage: estimate from the messages, which now
+                # include the schema and instructions Graphiti appended
+                messages = args[0] if args else kwargs.get("messages", [])
+                cost.input_tokens += sum(estimate_tokens(message.content) for message in messages)
+                cost.output_tokens += estimate_tokens(json.dumps(response, default=str))
+        return response
+
+    async def _generate_response(self, *args, **kwargs):
+        return await self.inner._generate_response(*args, **kwargs)
+
+
+def create_llm_clients(settings: dict, api_key: str | None = None):
+    """Build Graphiti's (llm_client, cross_encoder) from the extraction settings.
+
+    `settings` is the "extraction" config section: provider ("openai",
+    "ollama" or "openai_compatible"), model, small_model and base_url.
+    """
+    from graphiti_core.cross_encoder.openai_reranker_client import OpenAIRerankerClient
+    from graphiti_core.llm_client.config import LLMConfig
+
+    provider = settings.get("provider", "openai")
+    config = LLMConfig(
+        api_key=settings.get("api_key") or api_key or "local",
+        model=settings.get("model"),
+        small_model=settings.get("small_model"),
+        base_url=settings.get("base_url"),
+    )
+
+    if provider == "openai":
+        from graphiti_core.llm_client import OpenAIClient
+
+        inner = OpenAIClient(config=config)
+    elif provider in ("ollama", "openai_compatible"):
+        from graphiti_core.llm_client.openai_generic_client import OpenAIGenericClient
+
+        inner = OpenAIGenericClient(config=config)
+    else:
+        raise ValueError(f"Unknown extraction provider: {provider}")
+
+    llm_client = GovernedLLMClient(inner, governor("extraction"))
+    return llm_client, OpenAIRerankerClient(config=config)
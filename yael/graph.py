@@ -1,98 +1,306 @@
-"""Graphiti graph memory wrapper."""
-import os
-from datetime import datetime
-from typing import Any
-from graphiti_core import Graphiti
-from graphiti_core.nodes import EpisodeType
+"""Graph memory, on top of a pluggable storage backend.
+
+GraphMemory owns what every backend shares: the content-hash index that
+skips duplicate episodes, the retrieval cache and ingest cost tracking.
+The backend (see yael.backends) extracts, stores and searches.
+"""
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from .backends import MemoryBackend, PartialWriteError
+from .cache import RetrievalCache
+from .config import CONFIG_DIR, get_openai_key
+from .index import EpisodeIndex
+from .limits import configure_limits
+from .metrics import IngestCost, track_ingest
+
+EMBEDDING_CACHE = CONFIG_DIR / "embeddings"
+EMBEDDED_GRAPH = CONFIG_DIR / "memory.db"
+
+
+def extraction_settings(config: dict) -> dict:
+    """Extraction settings, with a local provider defaulting to the chat model."""
+    settings = dict(config["extraction"])
+    if settings.get("provider") == "ollama":
+        settings["model"] = settings.get("model") or config["llm"]["model"]
+        settings["base_url"] = settings.get("base_url") or config["llm"]["base_url"].rstrip("/") + "/v1"
+    return settings
+
+
+def embedding_settings(config: dict) -> dict:
+    """Embedding settings, with a local provider defaulting to the Ollama LLM host."""
+    settings = dict(config["embeddings"])
+    if settings.get("provider") == "ollama" and not settings.get("base_url"):
+        settings["base_url"] = config["llm"]["base_url"]
+    return settings
 
 
 class GraphMemory:
-    """Wrapper for Graphiti knowledge graph."""
+    """Knowledge graph memory over a storage backend."""
 
     def __init__(
         self,
-        neo4j_uri: str,
-        neo4j_user: str,
-        neo4j_password: str,
-        neo4j_database: str,
-        openai_api_key: str,
-        embedding_model: str = "text-embedding-3-small",
+        backend: MemoryBackend,
+        index: EpisodeIndex | None = None,
+        cache: RetrievalCache | None = None,
     ):
-        # Set OpenAI API key in environment for Graphiti to use
-        os.environ["OPENAI_API_KEY"] = openai_api_key
-
-        # Initialize Graphiti (will use OpenAI clients by default via env var)
-        self.graphiti = Graphiti(
-            neo4j_uri,
-            neo4j_user,
-            neo4j_password,
+        self.backend = backend
+
+        # Content-hash index used to skip episodes already in the graph
+        self.index = index
+        self._in_flight: set[str] = set()
+
+        # Search results, invalidated whenever new data is written
+        self.cache = cache
+        # Bumped on every write, so results kept elsewhere (prefetches) can
+        # tell they are out of date
+        self.generation = 0
+
+        # LLM/embedding calls, tokens and nodes/edges spent on writes, in
+        # total and per episode through on_ingest(cost, source)
+        self.ingest = IngestCost(episodes=0)
+        self.on_ingest: Callable[[IngestCost, str], None] | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "GraphMemory":
+        """Create graph memory from a loaded Yael config."""
+        configure_limits(config)
+        uses_openai = "openai" in (
+            config["embeddings"]["provider"], config["extraction"]["provider"]
+        )
+        return cls(
+            backend=create_backend(config, get_openai_key(required=uses_openai)),
+            index=EpisodeIndex(CONFIG_DIR / "episodes.db"),
+            cache=RetrievalCache(
+                max_entries=config["retrieval"]["cache_size"],
+                ttl=config["retrieval"]["cache_ttl"],
+                semantic_threshold=config["retrieval"]["semantic_threshold"],
+            ),
         )
 
+    @property
+    def embedder(self):
+        return self.backend.embedder
+
+    async def connect(self) -> None:
+        """Create the backend's clients, off the event loop."""
+        await self.backend.connect()
+
     async def initialize(self) -> None:
         """Initialize the graph schema."""
-        await self.graphiti.build_indices_and_constraints()
+        await self.connect()
+        await self.backend.initialize()
 
     async def add_episode(
         self,
         content: str,
         source: str = "conversation",
         timestamp: datetime | None = None,
-    ) -> None:
+        force: bool = False,
+    ) -> bool:
         """Add a conversation episode to the graph.
 
-        This extracts entities and relationships automatically.
+        This extracts entities and relationships automatically. Episodes
+        whose content is already in the index are skipped unless `force`
+        is set. Returns True if the episode was written.
+        """
+        digest = EpisodeIndex.content_hash(content)
+        if not force and self._is_duplicate(digest):
+            return False
+
+        await self.connect()
+        self._in_flight.add(digest)
+        try:
+            with track_ingest() as cost:
+                cost.nodes, cost.edges = await self.backend.add_episode(
+                    content, source, timestamp or datetime.now(timezone.utc)
+                )
+            self._record_ingest(cost, source)
+            if self.index is not None:
+                self.index.add(digest, source)
+            self.generation += 1
+            if self.cache is not None:
+                self.cache.invalidate()
+        finally:
+            self._in_flight.discard(digest)
+        return True
+
+    async def add_episodes_bulk(self, episodes: list[dict], force: bool = False) -> int:
+        """Add many episodes in one bulk ingestion call.
+
+        Much faster than add_episode for imports, but Graphiti skips edge
+        invalidation in bulk mode, so it is meant for historical data.
+        Returns the number of episodes written (duplicates are skipped).
+        If only some were written, those are indexed as usual and a
+        PartialWriteError with indices into `episodes` is raised, so a
+        retry skips them.
         """
-        ref_time = timestamp or datetime.now()
-        await self.graphiti.add_episode(
-            name=f"episode_{ref_time.isoformat()}",
-            episode_body=content,
-            source=EpisodeType.text,
-            source_description=source,
-            reference_time=ref_time,
+        batch, positions = [], []
+        for position, episode in enumerate(episodes):
+            digest = EpisodeIndex.content_hash(episode["content"])
+            if force or not self._is_duplicate(digest):
+                batch.append((digest, episode))
+                positions.append(position)
+        if not batch:
+            return 0
+
+        await self.connect()
+        digests = {digest for digest, _ in batch}
+        self._in_flight |= digests
+        try:
+            partial = None
+            with track_ingest(episodes=len(batch)) as cost:
+                try:
+                    cost.nodes, cost.edges = await self.backend.add_episodes(
+                        [episode for _, episode in batch]
+                    )
+                except PartialWriteError as error:
+                    # Keep what was stored, then let the caller retry the rest
+                    partial = PartialWriteError(
+                        [positions[i] for i in error.written],
+                        [positions[i] for i in error.failed],
+                        error.nodes, error.edges, error.errors,
+                    )
+                    cost.episodes = len(error.written)
+                    cost.nodes, cost.edges = error.nodes, error.edges
+                    batch = [batch[i] for i in error.written]
+            self._record_ingest(cost, "bulk")
+            if self.index is not None:
+                self.index.add_many([(digest, episode["source"]) for digest, episode in batch])
+            self.generation += 1
+            if self.cache is not None:
+                self.cache.invalidate()
+            if partial is not None:
+                raise partial
+        finally:
+            self._in_flight -= digests
+        return len(batch)
+
+    def _record_ingest(self, cost: IngestCost, source: str) -> None:
+        self.ingest.add(cost)
+        if self.on_ingest is not None:
+            self.on_ingest(cost, source)
+
+    def _is_duplicate(self, digest: str) -> bool:
+        """Check whether an episode is already ingested or being ingested."""
+        duplicate = digest in self._in_flight or (
+            self.index is not None and digest in self.index
         )
+        if duplicate and self.index is not None:
+            self.index.skipped += 1
+        return duplicate
+
+    async def prime_embeddings(self, queries: list[str]) -> None:
+        """Embed queries in one batch so the searches that follow reuse them."""
+        await self.connect()
+        await self.embedder.prime(queries)
+
+    async def change_marker(self) -> str:
+        """Return a marker that changes whenever episodes are added to the graph."""
+        await self.connect()
+        return await self.backend.change_marker()
+
+    async def size(self) -> dict[str, int]:
+        """Return the number of entity nodes and fact edges in the graph."""
+        await self.connect()
+        return await self.backend.size()
 
     async def search(self, query: str, num_results: int = 10) -> list[dict[str, Any]]:
         """Search the graph for relevant context.
 
-        Returns entities and relationships relevant to the query.
+        Returns entities and relationships relevant to the query. Results
+        are served from the retrieval cache when possible.
         """
-        results = await self.graphiti.search(query, num_results=num_results)
-
-        # Format results for context injection
-        context_items = []
-        for result in results:
-            # Extract human-readable content from Graphiti objects
-            if hasattr(result, "fact"):
-                # Edge (relationship) - has .fact attribute
-                content = result.fact
-            elif hasattr(result, "name"):
-                # EntityNode - has .name and .summary
-                content = f"{result.name}: {getattr(result, 'summary', '')}"
-            else:
-                # Fallback
-                content = str(result)
-
-            context_items.append({
-                "type": result.__class__.__name__,
-                "content": content,
-                "score": getattr(result, "score", None),
-            })
-
-        return context_items
+        await self.connect()
+        if self.cache is None:
+            return await self.backend.search(query, num_results)
+
+        cached = self.cache.get(query, num_results)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation
+        started = time.perf_counter()
+        vector = None
+        if self.cache.semantic:
+            # Memoized, so the backend's own search reuses this embedding
+            vector = await self.embedder.create([query.replace("\n", " ")])
+            cached = self.cache.get_similar(vector, num_results)
+            if cached is not None:
+                return cached
+
+        results = await self.backend.search(query, num_results)
+        self.cache.record_miss(time.perf_counter() - started)
+        self.cache.put(query, num_results, results, vector, generation=generation)
+        return results
 
     async def get_context_string(self, query: str, max_items: int = 5) -> str:
         """Get formatted context string for prompt injection."""
         results = await self.search(query, num_results=max_items)
+        return format_context(results)
 
-        if not results:
-            return ""
-
-        context_parts = ["Relevant context from memory:"]
-        for item in results:
-            context_parts.append(f"- {item['content']}")
+    def cached_context(self, query: str, max_items: int = 5) -> str | None:
+        """Context for `query` from the retrieval cache only, without searching.
 
-        return "\n".join(context_parts)
+        Tries the exact query, then the semantic tier if the query's
+        embedding is already memoized. Returns None on a miss.
+        """
+        if self.cache is None:
+            return None
+        results = self.cache.get(query, max_items)
+        if results is None and self.cache.semantic:
+            peek = getattr(self.embedder, "peek", None)
+            vector = peek(query.replace("\n", " ")) if peek is not None else None
+            if vector is not None:
+                results = self.cache.get_similar(vector, max_items)
+        return None if results is None else format_context(results)
 
     async def close(self) -> None:
         """Close connections."""
-        await self.graphiti.close()
+        await self.backend.close()
+        if self.index is not None:
+            self.index.close()
+
+
+def format_context(results: list[dict[str, Any]]) -> str:
+    """Search results as the context block injected into the prompt."""
+    if not results:
+        return ""
+
+    context_parts = ["Relevant context from memory:"]
+    for item in results:
+        context_parts.append(f"- {item['content']}")
+
+    return "\n".join(context_parts)
+
+
+def create_backend(config: dict, openai_api_key: str | None) -> MemoryBackend:
+    """The storage backend selected by graph.backend."""
+    graph = config["graph"]
+    backend = graph.get("backend", "graphiti")
+    if backend == "graphiti":
+        from .backends.graphiti import GraphitiBackend
+
+        return GraphitiBackend(
+            neo4j_uri=graph["uri"],
+            neo4j_user=graph["user"],
+            neo4j_password=graph["password"],
+            neo4j_database=graph["database"],
+            openai_api_key=openai_api_key,
+            embeddings=embedding_settings(config),
+            extraction=extraction_settings(config),
+            embedding_cache=EMBEDDING_CACHE,
+        )
+    if backend == "embedded":
+        from .backends.embedded import EmbeddedBackend
+
+        return EmbeddedBackend(
+            path=Path(graph["path"]).expanduser() if graph.get("path") else EMBEDDED_GRAPH,
+            openai_api_key=openai_api_key,
+            embeddings=embedding_settings(config),
+            extraction=extraction_settings(config),
+            embedding_cache=EMBEDDING_CACHE,
+        )
+    raise ValueError(f"Unknown graph backend: {backend}")
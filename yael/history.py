@@ -0,0 +1,150 @@
+"""
+Token-budgeted conversation history.
+
+Sending the whole session with every request makes prompt processing,
+and so time-to-first-token, grow with session length until the context
+overflows. The newest turns are kept verbatim under a token budget;
+older turns are folded into a running summary by a background LLM call,
+made in the background lane of the "chat" governor so the scheduler holds
+it back while a reply is produced.
+"""
+import asyncio
+from contextlib import nullcontext
+
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+Update the summary with the new exchanges. Keep facts, decisions, open questions
+and anything the user asked to remember; drop pleasantries and repetition.
+Reply with the updated summary only, in under {words} words."""
+
+
+class ConversationHistory:
+    """Recent turns verbatim plus a summary of everything older.
+
+    When the verbatim turns exceed `max_tokens`, the oldest are folded
+    until they fit in `max_tokens * fold_to`, so a fold runs only every
+    few turns rather than on every one. Turns being folded stay in the
+    prompt until their summary is ready.
+    """
+
+    def __init__(
+        self,
+        llm,
+        max_tokens: int = 3000,
+        summary_tokens: int = 400,
+        fold_to: float = 0.5,
+        governor=None,
+    ):
+        self.llm = llm
+        self.governor = governor
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.fold_to = fold_to
+
+        self.summary = ""
+        self._turns: list[list[dict]] = []
+        self._folding: list[list[dict]] = []
+        self._fold_task: asyncio.Task | None = None
+        self.folds = 0
+
+    def __len__(self) -> int:
+        return len(self._folding) + len(self._turns)
+
+    def messages(self) -> list[dict]:
+        """Messages to send: the summary, then turns newest-last, within budget.
+
+        While a fold is running the prompt may exceed `max_tokens`, but never
+        twice that - if folding falls behind, the oldest turns are left out.
+        """
+        budget = 2 * self.max_tokens
+        turns = []
+        for turn in reversed(self._folding + self._turns):
+            budget -= sum(estimate_tokens(message["content"]) for message in turn)
+            if budget < 0 and turns:
+                break
+            turns.append(turn)
+
+        messages = []
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}",
+            })
+        for turn in reversed(turns):
+            messages.extend(turn)
+        return messages
+
+    def tokens(self) -> int:
+        """Estimated prompt tokens of the current history."""
+        return sum(estimate_tokens(message["content"]) for message in self.messages())
+
+    def add(self, user_message: str, response: str) -> None:
+        """Record an exchange and fold older turns if over budget."""
+        self._turns.append([
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": response},
+        ])
+        self._maybe_fold()
+
+    def clear(self) -> None:
+        if self._fold_task is not None:
+            self._fold_task.cancel()
+            self._fold_task = None
+        self.summary = ""
+        self._turns = []
+        self._folding = []
+
+    async def close(self) -> None:
+        if self._fold_task is not None and not self._fold_task.done():
+            self._fold_task.cancel()
+
+    def _verbatim_tokens(self) -> int:
+        return sum(
+            estimate_tokens(message["content"]) for turn in self._turns for message in turn
+        )
+
+    def _maybe_fold(self) -> None:
+        if self._fold_task is not None or self._verbatim_tokens() <= self.max_tokens:
+            return
+
+        # Fold oldest turns down to the low-water mark, always keeping the newest
+        target = self.max_tokens * self.fold_to
+        total = self._verbatim_tokens()
+        count = 0
+        while count < len(self._turns) - 1 and total > target:
+            total -= sum(estimate_tokens(message["content"]) for message in self._turns[count])
+            count += 1
+        if count == 0:
+            return
+
+        self._folding, self._turns = self._turns[:count], self._turns[count:]
+        self._fold_task = asyncio.create_task(self._fold())
+
+    async def _fold(self) -> None:
+        try:
+            exchanges = "\n\n".join(
+                f"{message['role'].capitalize()}: {message['content']}"
+                for turn in self._folding for message in turn
+            )
+            async with self.governor.slot() if self.governor is not None else nullcontext():
+                summary = await self.llm.complete([
+                    {"role": "system", "content": SUMMARY_PROMPT.format(words=self.summary_tokens * 3 // 4)},
+                    {"role": "user", "content": (
+                        f"Current summary:\n{self.summary or '(none)'}\n\nNew exchanges:\n{exchanges}"
+                    )},
+                ])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Keep the turns verbatim and try again after the next exchange
+            self._turns = self._folding + self._turns
+            self._folding = []
+            self._fold_task = None
+            return
+
+        self.summary = summary.strip()[: 2 * self.summary_tokens * CHARS_PER_TOKEN]
+        self._folding = []
+        self._fold_task = None
+        self.folds += 1
+        self._maybe_fold()
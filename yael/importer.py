@@ -0,0 +1,350 @@
+"""
+Concurrent, resumable import of episodes into graph memory.
+
+Conversations are fed to a bounded pool of workers. A conversation's
+UUID is checkpointed once all of its episodes are written, so a rerun
+after a crash skips everything that already made it into the graph.
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from .backends import PartialWriteError
+from .export import conversation_episodes, conversation_key
+from .metrics import IngestCost
+
+
+class Checkpoint:
+    """Append-only file of completed conversation UUIDs."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark(self, key: str) -> None:
+        """Record a conversation as fully imported."""
+        if key in self.done:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(key + "\n")
+        self._file.flush()
+        self.done.add(key)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SyncState:
+    """Per-conversation sync state for incremental imports.
+
+    Stored as an append-only JSON-lines file of
+    {"uuid", "updated_at", "messages"} records (last record wins), and
+    used in place of a Checkpoint: a conversation is recorded once all of
+    its new episodes are written. Other items (memories, projects, users)
+    carry their version in the key and are recorded as {"key"}, like a
+    Checkpoint would.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conversations: dict[str, dict] = {}
+        self.documents: set[str] = set()
+        self.unchanged = 0
+        self._planned: dict[str, dict] = {}
+        self._file = None
+
+        records = 0
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write from a crash
+                    self._remember(record)
+                    records += 1
+
+        # Keep the file from growing without bound across weekly syncs
+        if records > 2 * len(self.conversations) + len(self.documents) + 100:
+            self._compact()
+
+    def select(self, conversations: Iterable[dict], max_tokens: int = 0) -> Iterator[dict]:
+        """Yield episodes for new conversations and newly appended messages."""
+        for convo in conversations:
+            uuid = conversation_key(convo)
+            updated_at = convo.get("updated_at") or convo.get("created_at") or ""
+            count = len(convo.get("chat_messages", []))
+
+            known = self.conversations.get(uuid)
+            start = 0
+            if known is not None:
+                # New messages decide, not updated_at: exports can leave it
+                # missing, coarse or unchanged when messages were appended
+                if count <= known["messages"]:
+                    self.unchanged += 1
+                    continue
+                start = known["messages"]
+
+            item = conversation_episodes(convo, max_tokens=max_tokens, start=start)
+            if item is None:
+                continue
+            self._planned[uuid] = {"uuid": uuid, "updated_at": updated_at, "messages": count}
+            yield item
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.documents:
+            return True
+        planned = self._planned.get(key)
+        return planned is not None and self.conversations.get(key) == planned
+
+    def mark(self, key: str) -> None:
+        """Record the planned version of a conversation (or a document) as synced."""
+        record = self._planned.pop(key, None)
+        if record is None:
+            if key in self.documents:
+                return
+            record = {"key": key}
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._remember(record)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _remember(self, record: dict) -> None:
+        if "key" in record:
+            self.documents.add(record["key"])
+        else:
+            self.conversations[record["uuid"]] = record
+
+    def _compact(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self.conversations.values():
+                f.write(json.dumps(record) + "\n")
+            for key in self.documents:
+                f.write(json.dumps({"key": key}) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class ImportStats:
+    """Running counters for an import, with throughput and ETA.
+
+    The ETA comes from `total` when the number of conversations is known
+    up front, or from `progress` (fraction of the input consumed) when the
+    export is being streamed.
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        progress: Callable[[], float] | None = None,
+    ):
+        self.total = total
+        self.progress = progress
+        self.conversations = 0
+        self.episodes = 0
+        self.failed = 0
+        self.skipped = 0
+        self.resumed = 0
+        self.started = time.monotonic()
+
+        # Graph write costs, in total and per episode (or bulk batch)
+        self.cost = IngestCost(episodes=0)
+        self.costs: list[dict] = []
+
+    def record_cost(self, cost: IngestCost, source: str) -> None:
+        """Record what one graph write cost (use as GraphMemory.on_ingest)."""
+        self.cost.add(cost)
+        self.costs.append({"source": source, **cost.as_dict()})
+
+    @property
+    def episode_rate(self) -> float:
+        """Episodes written to the graph per minute."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.cost.episodes / self.elapsed * 60
+
+    def report(self, settings: dict | None = None) -> dict:
+        """Machine-readable summary of the run, for comparing settings."""
+        return {
+            "settings": settings or {},
+            "elapsed_seconds": self.elapsed,
+            "conversations": self.conversations,
+            "episodes": self.episodes,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "resumed": self.resumed,
+            "episodes_per_minute": self.episode_rate,
+            "totals": self.cost.as_dict(),
+            "per_episode": self.cost.per_episode(),
+            "writes": self.costs,
+        }
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Conversations imported per minute."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.conversations / self.elapsed * 60
+
+    @property
+    def eta(self) -> float | None:
+        """Estimated seconds until the import finishes, if known."""
+        if not self.conversations:
+            return None
+        if self.progress is not None:
+            fraction = self.progress()
+            if fraction <= 0:
+                return None
+            return self.elapsed * (1 - min(fraction, 1.0)) / fraction
+        if not self.total:
+            return None
+        remaining = self.total - self.conversations - self.resumed
+        return max(remaining, 0) / (self.conversations / self.elapsed)
+
+
+async def import_conversations(
+    graph,
+    conversations: Iterable[dict],
+    concurrency: int = 4,
+    checkpoint: Checkpoint | SyncState | None = None,
+    bulk_size: int = 0,
+    force: bool = False,
+    stats: ImportStats | None = None,
+    on_progress: Callable[[ImportStats], None] | None = None,
+    on_error: Callable[[dict, Exception], None] | None = None,
+) -> ImportStats:
+    """Import conversations into the graph with bounded concurrency.
+
+    Each conversation is {"key": uuid, "episodes": [{"content", "source",
+    "timestamp"}, ...]}. With bulk_size > 1, workers hand batches of
+    episodes to Graphiti's bulk ingestion instead of adding them one by one.
+    Episodes already in the graph's content-hash index are skipped unless
+    `force` is set.
+    """
+    stats = stats or ImportStats()
+    # Room for every worker to take a full bulk batch, with as much again queued
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(bulk_size, 1) * concurrency * 2)
+    remaining: dict[str, int] = {}
+    broken: set[str] = set()
+
+    # Checkpoint failures, raised once the queue has drained
+    checkpoint_errors: list[Exception] = []
+
+    def notify(callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception:
+            pass  # A failing callback must not stop the worker and stall the queue
+
+    def finish(episode: dict, error: BaseException | None) -> None:
+        key = episode["key"]
+        if error is not None:
+            stats.failed += 1
+            broken.add(key)
+            if on_error:
+                notify(on_error, episode, error)
+        else:
+            stats.episodes += 1
+
+        remaining[key] -= 1
+        if remaining[key] == 0:
+            del remaining[key]
+            if key in broken:
+                broken.discard(key)
+            else:
+                stats.conversations += 1
+                if checkpoint is not None:
+                    checkpoint.mark(key)
+
+        if on_progress:
+            notify(on_progress, stats)
+
+    async def worker() -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < max(bulk_size, 1) and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                errors: list[BaseException | None] = [None] * len(batch)
+                try:
+                    if len(batch) > 1:
+                        added = await graph.add_episodes_bulk(batch, force=force)
+                    else:
+                        added = int(await graph.add_episode(
+                            content=batch[0]["content"],
+                            source=batch[0]["source"],
+                            timestamp=batch[0]["timestamp"],
+                            force=force,
+                        ))
+                    stats.skipped += len(batch) - added
+                except asyncio.CancelledError:
+                    raise
+                except PartialWriteError as e:
+                    # Only the failed episodes failed; the rest were written or skipped
+                    for i, error in zip(e.failed, e.errors):
+                        errors[i] = error
+                    stats.skipped += len(batch) - len(e.written) - len(e.failed)
+                except Exception as e:
+                    errors = [e] * len(batch)
+                for episode, error in zip(batch, errors):
+                    try:
+                        finish(episode, error)
+                    except Exception as e:
+                        # Keep draining, but don't report the import as complete
+                        checkpoint_errors.append(e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for convo in conversations:
+            key = convo["key"]
+            if checkpoint is not None and key in checkpoint:
+                stats.resumed += 1
+                continue
+            if not convo["episodes"]:
+                continue
+
+            # Added, not assigned: two conversations may share a key
+            remaining[key] = remaining.get(key, 0) + len(convo["episodes"])
+            for episode in convo["episodes"]:
+                await queue.put({**episode, "key": key})
+
+        await queue.join()
+        if checkpoint_errors:
+            raise checkpoint_errors[0]
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if checkpoint is not None:
+            checkpoint.close()
+
+    return stats
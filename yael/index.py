@@ -0,0 +1,68 @@
+"""
+Content-hash index of episodes already written to the graph.
+
+Lets GraphMemory skip duplicate episodes (re-imports, replays after a
+crash) with a single primary-key lookup, before any LLM or embedding
+call is made. Writes go to a WAL with synchronous=NORMAL, so recording
+an episode costs no fsync on the event loop; a power loss can at worst
+forget the last few entries, which only means re-checking them later.
+"""
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class EpisodeIndex:
+    """SQLite table of episode content hashes."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS episodes ("
+            " hash TEXT PRIMARY KEY,"
+            " source TEXT,"
+            " added_at TEXT"
+            ")"
+        )
+        self.db.commit()
+
+        # Per-process counters for reporting
+        self.added = 0
+        self.skipped = 0
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Hash episode content, ignoring whitespace differences."""
+        normalized = " ".join(content.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def __contains__(self, digest: str) -> bool:
+        row = self.db.execute(
+            "SELECT 1 FROM episodes WHERE hash = ?", (digest,)
+        ).fetchone()
+        return row is not None
+
+    def add(self, digest: str, source: str) -> None:
+        """Record an episode as ingested."""
+        self.add_many([(digest, source)])
+
+    def add_many(self, entries: list[tuple[str, str]]) -> None:
+        """Record (digest, source) episodes as ingested, in one transaction."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO episodes (hash, source, added_at) VALUES (?, ?, ?)",
+                [(digest, source, now) for digest, source in entries],
+            )
+        self.added += len(entries)
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,203 @@
+"""
+Concurrency and rate limits for graph LLM and embedding calls.
+
+Entity extraction and embedding calls each go through one process-wide
+Governor, so chat writes, retrieval and imports share a single budget
+that can be tuned to the local hardware (or the API tier). Calls made in
+the foreground lane - the interactive chat turn - skip ahead of queued
+background work, get a reserved slot and ignore rate-limit backoff, so a
+busy import never stalls a reply. The background lane can be narrowed
+further while the user is active (see yael.scheduler).
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+# Seconds background calls pause after a provider reports a rate limit
+RATE_LIMIT_BACKOFF = 5.0
+
+_foreground: ContextVar[bool] = ContextVar("yael_foreground", default=False)
+
+
+@contextmanager
+def foreground():
+    """Mark calls made in this context (and tasks it creates) as interactive."""
+    token = _foreground.set(True)
+    try:
+        yield
+    finally:
+        _foreground.reset(token)
+
+
+def in_foreground() -> bool:
+    return _foreground.get()
+
+
+def is_rate_limit(exc: BaseException) -> bool:
+    """Whether an error is a provider rate limit (OpenAI's or Graphiti's)."""
+    return type(exc).__name__ == "RateLimitError" or getattr(exc, "status_code", None) == 429
+
+
+class Governor:
+    """Concurrency limit plus a requests-per-minute token bucket."""
+
+    def __init__(self, name: str, concurrency: int = 4, requests_per_minute: float = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+
+        self._active = 0
+        self._background_active = 0
+        # Background calls allowed at once (None = up to concurrency)
+        self.background_limit: int | None = None
+        self._foreground_waiters: deque[asyncio.Future] = deque()
+        self._background_waiters: deque[asyncio.Future] = deque()
+        self._tokens = float(max(1, concurrency))
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+
+        self.calls = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+
+    def configure(self, concurrency: int, requests_per_minute: float = 0) -> None:
+        self.concurrency = max(1, concurrency)
+        self.requests_per_minute = requests_per_minute
+        # A raised limit may admit several waiters; extras just wait again
+        self._wake(count=self.concurrency)
+
+    def set_background_limit(self, limit: int | None) -> None:
+        """Cap concurrent background calls; None lifts the cap, 0 pauses them."""
+        self.background_limit = limit
+        self._wake(count=self.concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one call slot for the duration of the block."""
+        interactive = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(interactive)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; returns whether it is a foreground one."""
+        interactive = in_foreground()
+        started = time.monotonic()
+
+        if not interactive:
+            delay = self._paused_until - started
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        waiters = self._foreground_waiters if interactive else self._background_waiters
+        while not self._can_enter(interactive):
+            waiter = asyncio.get_running_loop().create_future()
+            waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # Pass the wake-up on to the next caller
+                raise
+            finally:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+        self._active += 1
+        if not interactive:
+            self._background_active += 1
+
+        try:
+            await self._throttle(interactive)
+        except asyncio.CancelledError:
+            self.release(interactive)
+            raise
+
+        self.calls += 1
+        self.wait_seconds += time.monotonic() - started
+        return interactive
+
+    def release(self, interactive: bool = False) -> None:
+        self._active -= 1
+        if not interactive:
+            self._background_active -= 1
+        self._wake()
+
+    def backoff(self, seconds: float = RATE_LIMIT_BACKOFF) -> None:
+        """Pause background calls after the provider reported a rate limit."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "active": self._active,
+            "waiting": len(self._foreground_waiters) + len(self._background_waiters),
+            "background_limit": self.background_limit,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "wait_seconds": self.wait_seconds,
+        }
+
+    def _can_enter(self, interactive: bool) -> bool:
+        if interactive:
+            # One slot above the limit is reserved for the foreground lane
+            return self._active < self.concurrency + 1
+        limit = self.concurrency if self.background_limit is None else self.background_limit
+        return (
+            self._active < self.concurrency
+            and self._background_active < limit
+            and not self._foreground_waiters
+        )
+
+    def _wake(self, count: int = 1) -> None:
+        for interactive, waiters in (
+            (True, self._foreground_waiters),
+            (False, self._background_waiters),
+        ):
+            if not self._can_enter(interactive):
+                continue
+            while waiters and count:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    count -= 1
+            if not count:
+                return
+
+    async def _throttle(self, interactive: bool) -> None:
+        if not self.requests_per_minute:
+            return
+        rate = self.requests_per_minute / 60
+        now = time.monotonic()
+        self._tokens = min(max(1, self.concurrency), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+
+        # Tokens may go negative: that is the queue of reserved future calls
+        self._tokens -= 1
+        if self._tokens < 0 and not interactive:
+            await asyncio.sleep(-self._tokens / rate)
+
+
+_governors: dict[str, Governor] = {}
+
+
+def governor(name: str) -> Governor:
+    """Return the process-wide governor for a kind of call ("extraction", "embedding", "chat")."""
+    if name not in _governors:
+        _governors[name] = Governor(name)
+    return _governors[name]
+
+
+def configure_limits(config: dict) -> None:
+    """Apply the configured limits to the process-wide governors."""
+    for name, section in (("extraction", "extraction"), ("embedding", "embeddings")):
+        settings = config[section]
+        governor(name).configure(
+            settings.get("concurrency", 4),
+            settings.get("requests_per_minute", 0),
+        )
+    # Background calls to the chat model (history summaries), one at a time
+    # since they share the local model with the replies
+    governor("chat").configure(1)
@@ -1,46 +1,103 @@
 """Ollama LLM client wrapper."""
-from ollama import Client
-from typing import Generator
+from typing import AsyncGenerator, Awaitable
 
 
 class LLM:
-    """Wrapper for Ollama chat completions."""
+    """Wrapper for Ollama chat completions.
 
-    def __init__(self, model: str = "llama3.1:8b", base_url: str = "http://localhost:11434"):
+    Built on Ollama's async client so streaming never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        model: str = "llama3.1:8b",
+        base_url: str = "http://localhost:11434",
+        keep_alive: str | float | None = None,
+    ):
         self.model = model
-        self.client = Client(host=base_url)
+        self.base_url = base_url
+        # How long Ollama keeps the model (and its KV cache) loaded between requests
+        self.keep_alive = keep_alive
+        self._client = None
+
+        # Timing and token counts Ollama reported for the last streamed response
+        self.last_stats: dict[str, int] = {}
+
+    @property
+    def client(self):
+        """Ollama async client, created (and its module imported) on first use."""
+        if self._client is None:
+            from ollama import AsyncClient
+            self._client = AsyncClient(host=self.base_url)
+        return self._client
 
-    def chat(self, messages: list[dict], stream: bool = True) -> Generator[str, None, None] | str:
+    def chat(self, messages: list[dict], stream: bool = True) -> AsyncGenerator[str, None] | Awaitable[str]:
         """Send chat completion request.
 
         Args:
             messages: List of {"role": "user"|"assistant"|"system", "content": "..."}
             stream: Whether to stream the response
 
-        Yields/Returns:
-            Token strings if streaming, else complete response
+        Returns:
+            An async token generator if streaming, else an awaitable complete response
         """
         if stream:
-            response = self.client.chat(
-                model=self.model,
-                messages=messages,
-                stream=True,
-            )
-            for chunk in response:
-                if chunk.get("message", {}).get("content"):
-                    yield chunk["message"]["content"]
-        else:
-            response = self.client.chat(
-                model=self.model,
-                messages=messages,
-                stream=False,
-            )
-            return response["message"]["content"]
-
-    def is_available(self) -> bool:
+            return self.stream(messages)
+        return self.complete(messages)
+
+    async def stream(self, messages: list[dict]) -> AsyncGenerator[str, None]:
+        """Stream a chat completion token by token.
+
+        Chunks are read off the HTTP response only as fast as the caller
+        consumes them, so a slow consumer applies backpressure to Ollama.
+        Cancelling or closing the generator closes the response, which makes
+        Ollama abort generation and free the model.
+        """
+        self.last_stats = {}
+        response = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            keep_alive=self.keep_alive,
+        )
+        try:
+            async for chunk in response:
+                content = chunk.get("message", {}).get("content")
+                if content:
+                    yield content
+                if chunk.get("done"):
+                    self.last_stats = {
+                        key: chunk.get(key) or 0
+                        for key in (
+                            "prompt_eval_count", "prompt_eval_duration",
+                            "eval_count", "eval_duration",
+                            "load_duration", "total_duration",
+                        )
+                    }
+        finally:
+            await response.aclose()
+
+    async def complete(self, messages: list[dict]) -> str:
+        """Return a complete (non-streamed) chat response."""
+        response = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            stream=False,
+            keep_alive=self.keep_alive,
+        )
+        return response["message"]["content"]
+
+    async def preload(self) -> None:
+        """Load the model into memory ahead of the first request."""
+        try:
+            await self.client.chat(model=self.model, messages=[], keep_alive=self.keep_alive)
+        except Exception:
+            pass  # The first real request loads it instead
+
+    async def is_available(self) -> bool:
         """Check if Ollama is running and model is available."""
         try:
-            models = self.client.list()
+            models = await self.client.list()
             model_prefix = self.model.split(":")[0]
             # models.models is a list of Model objects with .model attribute
             return any(m.model.startswith(model_prefix) for m in models.models)
@@ -0,0 +1,157 @@
+"""
+Latency metrics for chat turns and graph writes.
+
+Timings are kept in rolling histograms (p50/p95 over the most recent
+samples) for the /stats command, and can also be appended as JSONL
+traces to ~/.yael/traces, one file per day, for offline comparison.
+
+Ingest costs (LLM and embedding calls, tokens, nodes and edges created)
+are counted per episode through a context variable, so the clients deep
+inside Graphiti can attribute their calls to the episode being written.
+"""
+import json
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+
+class Histogram:
+    """Rolling window of samples with percentile summaries."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the windowed samples (0 if empty)."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "mean": self.mean,
+        }
+
+
+class Metrics:
+    """Named histograms plus optional JSONL trace export."""
+
+    def __init__(self, trace_dir: Path | None = None, window: int = 1000):
+        self.trace_dir = trace_dir
+        self.window = window
+        self.histograms: dict[str, Histogram] = {}
+
+    def record(self, name: str, value: float) -> None:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(self.window)
+        self.histograms[name].add(value)
+
+    @contextmanager
+    def span(self, name: str, into: dict | None = None):
+        """Time a block in milliseconds; also store it in `into[name]` if given."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.record(name, elapsed)
+            if into is not None:
+                into[name] = elapsed
+
+    def trace(self, event: str, **fields) -> None:
+        """Append one event to today's trace file, if tracing is enabled."""
+        if self.trace_dir is None:
+            return
+        record = {"event": event, "time": datetime.now().isoformat(), **fields}
+        try:
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            path = self.trace_dir / f"{datetime.now():%Y-%m-%d}.jsonl"
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass  # Tracing must never break a chat turn
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+
+class IngestCost:
+    """Work done to write one episode (or one bulk batch) to the graph.
+
+    Token counts are what the provider reported where Graphiti records
+    usage, and estimates (see yael.tokens) for calls where it does not.
+    """
+
+    FIELDS = (
+        "episodes", "seconds", "llm_calls", "input_tokens", "output_tokens",
+        "embedding_calls", "embedded_texts", "cached_embeddings", "nodes", "edges",
+    )
+
+    def __init__(self, episodes: int = 1):
+        self.episodes = episodes
+        self.seconds = 0.0
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.embedding_calls = 0
+        self.embedded_texts = 0
+        self.cached_embeddings = 0
+        self.nodes = 0
+        self.edges = 0
+
+    def add(self, other: "IngestCost") -> None:
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def as_dict(self) -> dict[str, float]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def per_episode(self) -> dict[str, float]:
+        """Averages per episode, for comparing import settings."""
+        if not self.episodes:
+            return {}
+        return {
+            field: getattr(self, field) / self.episodes
+            for field in self.FIELDS if field != "episodes"
+        }
+
+
+_ingest_cost: ContextVar[IngestCost | None] = ContextVar("yael_ingest_cost", default=None)
+
+
+def ingest_cost() -> IngestCost | None:
+    """The cost being accumulated for the episode currently being written."""
+    return _ingest_cost.get()
+
+
+@contextmanager
+def track_ingest(episodes: int = 1):
+    """Count the calls made in this context (and its tasks) towards one ingest."""
+    cost = IngestCost(episodes)
+    token = _ingest_cost.set(cost)
+    started = time.perf_counter()
+    try:
+        yield cost
+    finally:
+        cost.seconds = time.perf_counter() - started
+        _ingest_cost.reset(token)
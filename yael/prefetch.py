@@ -0,0 +1,236 @@
+"""
+Speculative retrieval for the next chat turn.
+
+Retrieval used to start only once the user pressed enter, although the
+next question usually follows from the current exchange. While a reply
+streams, and again once it is complete, the Prefetcher guesses likely
+follow-up queries (the entities named in the exchange, plus one query
+for its main topic) and searches them in the background. Their results
+are kept for a short while; the next turn uses them instead of
+searching when it names only prefetched entities, or when its embedding
+is close enough to a prefetched query. Prefetches run in the background
+lane, behind the turn's own retrieval; the scheduler keeps one embedding
+slot open for them while the reply streams. Anything written to the
+graph since discards them.
+"""
+import asyncio
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable
+
+from .graph import format_context
+from .retrieval import cosine
+
+# Capitalized phrases: names of people, places, projects and tools
+NAME = re.compile(r"\b[A-Z][A-Za-z0-9+#]+(?: [A-Z][A-Za-z0-9+#]+)*")
+TOPIC_WORD = re.compile(r"[a-z][a-z0-9]{4,}")
+
+# Capitalized for grammar, not because they name anything
+COMMON = {
+    "a", "about", "actually", "after", "also", "an", "and", "any", "are", "as", "at",
+    "because", "before", "but", "by", "can", "could", "did", "do", "does", "for", "from",
+    "good", "great", "he", "her", "here", "hey", "hi", "his", "how", "i", "if", "in", "is",
+    "it", "its", "just", "let", "maybe", "my", "no", "not", "now", "of", "ok", "okay", "on",
+    "or", "our", "relevant", "remind", "she", "should", "so", "sure", "tell", "thanks",
+    "that", "the", "then", "there", "these", "they", "this", "those", "to", "user", "we",
+    "what", "when", "where", "which", "who", "why", "will", "with", "would", "yes", "you",
+    "your",
+}
+# Frequent words that make poor topics
+STOPWORDS = {
+    "about", "after", "again", "being", "could", "doing", "going", "other", "really",
+    "should", "since", "something", "still", "their", "there", "these", "thing", "things",
+    "think", "those", "through", "where", "which", "while", "would", "context", "memory",
+    "relevant", "mentioned", "related",
+}
+
+
+def entities(text: str) -> list[str]:
+    """Capitalized names in `text`, most frequent first."""
+    counts: Counter[str] = Counter()
+    for phrase in NAME.findall(text):
+        words = phrase.split()
+        while words and words[0].lower() in COMMON:
+            words.pop(0)
+        if words:
+            counts[" ".join(words)] += 1
+    return [name for name, _ in counts.most_common()]
+
+
+def topic(text: str, words: int = 3) -> str | None:
+    """The exchange's most frequent content words, as a search query."""
+    counts = Counter(
+        word for word in TOPIC_WORD.findall(text.lower()) if word not in STOPWORDS
+    )
+    top = [word for word, count in counts.most_common(words) if count > 1]
+    return " ".join(top) if len(top) > 1 else None
+
+
+class Prefetcher:
+    """Searches likely follow-up queries ahead of the next turn."""
+
+    def __init__(
+        self,
+        search: Callable[[str], Awaitable[list[dict[str, Any]]]],
+        embed: Callable[[str], Awaitable[list[float]]] | None = None,
+        generation: Callable[[], int] | None = None,
+        max_queries: int = 4,
+        ttl: float = 120.0,
+        similarity: float = 0.75,
+        max_items: int = 5,
+        max_entries: int = 32,
+        embed_timeout: float = 0.3,
+    ):
+        self.search = search
+        self.embed = embed
+        self.generation = generation or (lambda: 0)
+        self.max_queries = max_queries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_items = max_items
+        self.max_entries = max_entries
+        self.embed_timeout = embed_timeout
+
+        # Normalized query -> (expires, results, embedding or None); all
+        # from the graph generation in _generation
+        self._entries: OrderedDict[str, tuple[float, list, Any]] = OrderedDict()
+        self._generation = self.generation()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.queries = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def predict(self, *texts: str) -> list[str]:
+        """Likely follow-up queries for an exchange, best first."""
+        names: list[str] = []
+        for text in texts:
+            names.extend(name for name in entities(text) if name not in names)
+        queries = names[: self.max_queries - 1]
+        subject = topic(" ".join(texts))
+        if subject is not None:
+            queries.append(subject)
+        return queries
+
+    def start(self, *texts: str) -> None:
+        """Search the predicted queries that aren't cached or in flight."""
+        for query in self.predict(*texts):
+            key = self.normalize(query)
+            if key in self._tasks or self._fresh(key):
+                continue
+            task = asyncio.create_task(self._prefetch(key, query))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _, key=key: self._tasks.pop(key, None))
+
+    async def _prefetch(self, key: str, query: str) -> None:
+        self.queries += 1
+        generation = self.generation()
+        try:
+            results = await self.search(query)
+        except Exception:
+            return  # Only a guess; the next turn searches as usual
+        if not results:
+            return  # Nothing to serve; let the next turn search for itself
+        # The search embedded the query already, so this is a cache hit
+        vector = await self._embed(query)
+        self._expire()
+        if generation != self._generation:
+            return  # The graph changed while this ran
+        self._entries[key] = (time.monotonic() + self.ttl, results, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def lookup(self, message: str, timeout: float | None = None) -> str | None:
+        """Context for `message` from prefetched results, or None to search.
+
+        `timeout` caps the similarity check's embedding further.
+        """
+        self._expire()
+        context = self._by_entity(message)
+        if context is None:
+            context = await self._by_similarity(message, timeout)
+        if context is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return context
+
+    def _by_entity(self, message: str) -> str | None:
+        """Merged results when every name in the message was prefetched."""
+        names = [self.normalize(name) for name in entities(message)]
+        if not names or any(name not in self._entries for name in names):
+            return None
+        results, seen = [], set()
+        for name in names:
+            for item in self._entries[name][1]:
+                if item["content"] not in seen:
+                    seen.add(item["content"])
+                    results.append(item)
+        return format_context(results[: self.max_items]) or None
+
+    async def _by_similarity(self, message: str, timeout: float | None) -> str | None:
+        candidates = [(key, entry[2]) for key, entry in self._entries.items() if entry[2] is not None]
+        if not candidates:
+            return None
+        vector = await self._embed(message, timeout)
+        if vector is None:
+            return None
+        score, key = max((cosine(vector, other), key) for key, other in candidates)
+        if score < self.similarity:
+            return None
+        return format_context(self._entries[key][1][: self.max_items]) or None
+
+    async def _embed(self, text: str, timeout: float | None = None) -> list[float] | None:
+        if self.embed is None:
+            return None
+        if timeout is not None:
+            timeout = min(timeout, self.embed_timeout)
+        try:
+            # Normalized like graph searches, so the two share cache entries
+            return await asyncio.wait_for(
+                self.embed(text.replace("\n", " ")),
+                self.embed_timeout if timeout is None else timeout,
+            )
+        except Exception:
+            return None
+
+    def _fresh(self, key: str) -> bool:
+        self._expire()
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def _expire(self) -> None:
+        generation = self.generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop prefetched results (a new conversation)."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "queries": self.queries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached": len(self._entries),
+            "in_flight": len(self._tasks),
+        }
+
+    async def close(self) -> None:
+        """Cancel prefetches still running."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
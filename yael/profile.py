@@ -3,7 +3,15 @@ User profile building at session startup.
 
 Queries the graph for persistent context about the user,
 so Yael knows who she's talking to before the conversation begins.
+The built profile is cached on disk with a graph change marker, so a
+warm start can inject it immediately and only rebuild when the graph
+has changed.
 """
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
 
 PROFILE_QUERIES = [
     "user name identity who",
@@ -20,26 +28,36 @@ async def build_user_profile(graph, max_per_query: int = 3) -> str:
 
     Returns formatted string for system prompt injection.
     """
-    facts = []
-    seen = set()
+    # One embedding request for all queries, then search concurrently
+    try:
+        await graph.prime_embeddings(PROFILE_QUERIES)
+    except Exception:
+        pass  # Searches will embed their own queries
 
-    for query in PROFILE_QUERIES:
+    async def query_context(query: str) -> str:
         try:
             # Use get_context_string which properly formats graph results
-            context = await graph.get_context_string(query, max_items=max_per_query)
-
-            if context and "Relevant context from memory:" in context:
-                # Extract the bulleted items
-                lines = context.split("\n")[1:]  # Skip the "Relevant context" header
-                for line in lines:
-                    if line.startswith("- "):
-                        fact = line[2:].strip()  # Remove "- " prefix
-                        key = fact[:100].lower()
-                        if key not in seen and fact:
-                            seen.add(key)
-                            facts.append(fact)
+            return await graph.get_context_string(query, max_items=max_per_query)
         except Exception:
-            continue
+            return ""
+
+    contexts = await asyncio.gather(*(query_context(q) for q in PROFILE_QUERIES))
+
+    facts = []
+    seen = set()
+
+    # Merge in query order so the profile is deterministic
+    for context in contexts:
+        if context and "Relevant context from memory:" in context:
+            # Extract the bulleted items
+            lines = context.split("\n")[1:]  # Skip the "Relevant context" header
+            for line in lines:
+                if line.startswith("- "):
+                    fact = line[2:].strip()  # Remove "- " prefix
+                    key = fact[:100].lower()
+                    if key not in seen and fact:
+                        seen.add(key)
+                        facts.append(fact)
 
     if not facts:
         return ""
@@ -65,3 +83,47 @@ def inject_profile(base_prompt: str, profile: str) -> str:
 {profile}
 
 Use this naturally - don't announce you're reading from memory."""
+
+
+def load_cached_profile(path: Path) -> dict | None:
+    """Load a cached profile ({"marker", "profile", "built_at"}), if any."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(cached, dict) or "profile" not in cached:
+        return None
+    return cached
+
+
+def save_cached_profile(path: Path, marker: str, profile: str) -> None:
+    """Persist a profile along with the graph marker it was built from."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "marker": marker,
+            "profile": profile,
+            "built_at": datetime.now().isoformat(),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+async def refresh_profile(
+    graph,
+    path: Path,
+    cached: dict | None = None,
+    max_per_query: int = 3,
+) -> str | None:
+    """Rebuild the cached profile if the graph changed since it was built.
+
+    Returns the new profile, or None if the cached one is still current.
+    """
+    marker = await graph.change_marker()
+    if cached is not None and cached.get("marker") == marker:
+        return None
+
+    profile = await build_user_profile(graph, max_per_query=max_per_query)
+    save_cached_profile(path, marker, profile)
+    return profile
@@ -0,0 +1,284 @@
+"""
+Deadline-bounded retrieval for chat turns.
+
+A slow graph query or an embedding API hiccup should never hold up a
+reply. Each turn's search gets a deadline: if it misses it, the turn
+goes ahead with whatever the retrieval cache still holds for the same
+query (or none), and the search keeps running in the background, so the
+cache entry it leaves is there for the next turn.
+
+After repeated failures or missed deadlines a circuit breaker stops
+sending turns to the graph at all, and a background probe checks it
+until it answers again.
+
+Many turns need no search at all: a RetrievalGate decides per turn
+whether to search, reuse the previous turn's context (a follow-up on
+the same topic) or skip memory (a bare acknowledgement).
+"""
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable
+
+from .episodes import ACKNOWLEDGEMENT, TRIVIAL
+
+SEARCH = "search"
+REUSE = "reuse"
+SKIP = "skip"
+
+# Back-references to the previous turn: a pronoun standing for it ("why is
+# that?", "does it work?", not "this error"), or a request to go on
+FOLLOW_UP = re.compile(
+    r"\b(?:it|that|this|those|these|they|them)\b"
+    r"(?=\s*(?:[?.!,]|$|(?:is|was|are|were|'s|does|did|do|mean|means|work|works|happen|happened"
+    r"|again|too|instead|though|then)\b))"
+    r"|\b(?:tell me more|go on|what else|how so|why not|and then|such as)\b",
+    re.IGNORECASE,
+)
+# A capitalized word past the first introduces something new (a name)
+NAME = re.compile(r"(?<!^)(?<![.!?] )\b[A-Z][a-z]+")
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; closed again by a probe."""
+
+    def __init__(self, threshold: int = 3):
+        self.threshold = threshold
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trips = 0
+
+    @property
+    def open(self) -> bool:
+        return self.opened_at is not None
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold and self.opened_at is None:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+
+class Retriever:
+    """Fetch graph context for a turn within a deadline."""
+
+    def __init__(
+        self,
+        search: Callable[[str], Awaitable[str]],
+        probe: Callable[[], Awaitable],
+        fallback: Callable[[str], str | None] | None = None,
+        deadline: float = 0.0,
+        breaker: CircuitBreaker | None = None,
+        probe_interval: float = 15.0,
+    ):
+        self.search = search
+        self.probe = probe
+        self.fallback = fallback
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.probe_interval = probe_interval
+
+        self.outcomes = {"fresh": 0, "stale": 0, "empty": 0, "skipped": 0, "failed": 0}
+        self._searches: set[asyncio.Task] = set()
+        self._probe_task: asyncio.Task | None = None
+
+    async def context(self, query: str, deadline: float | None = None) -> tuple[str, str]:
+        """Return (context, outcome) for this turn's query.
+
+        `deadline` overrides the configured one, for a turn that already
+        spent part of it.
+
+        The outcome is "fresh" (searched in time), "stale" or "empty" (the
+        deadline passed; fell back to cached context for this query or none),
+        "skipped" (breaker open) or "failed" (the search raised).
+        """
+        if self.breaker.open:
+            self._start_probe()
+            return self._finish("", "skipped")
+
+        task = asyncio.create_task(self.search(query))
+        self._searches.add(task)
+        task.add_done_callback(self._search_done)
+        try:
+            if deadline is None and self.deadline > 0:
+                deadline = self.deadline
+            if deadline is not None:
+                context = await asyncio.wait_for(asyncio.shield(task), deadline)
+            else:
+                context = await task
+        except asyncio.TimeoutError:
+            # Still running; its result reaches the cache for later turns
+            self.breaker.failure()
+            fallback = (self.fallback(query) if self.fallback is not None else None) or ""
+            return self._finish(fallback, "stale" if fallback else "empty")
+        except Exception:
+            self.breaker.failure()
+            return self._finish("", "failed")
+
+        self.breaker.success()
+        return self._finish(context, "fresh")
+
+    def _finish(self, context: str, outcome: str) -> tuple[str, str]:
+        self.outcomes[outcome] += 1
+        return context, outcome
+
+    def _search_done(self, task: asyncio.Task) -> None:
+        self._searches.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            # A late answer still shows the graph works, just slowly
+            self.breaker.success()
+
+    def _start_probe(self) -> None:
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_until_healthy())
+
+    async def _probe_until_healthy(self) -> None:
+        while self.breaker.open:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await asyncio.wait_for(self.probe(), self.probe_interval)
+            except Exception:
+                continue
+            self.breaker.success()
+
+    def stats(self) -> dict:
+        return {
+            **self.outcomes,
+            "open": self.breaker.open,
+            "trips": self.breaker.trips,
+            "in_flight": len(self._searches),
+        }
+
+    async def close(self) -> None:
+        """Cancel the probe and any searches still running."""
+        tasks = [*self._searches]
+        if self._probe_task is not None:
+            tasks.append(self._probe_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class RetrievalGate:
+    """Decides whether a turn searches memory, reuses the last context or skips it."""
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[list[float]]] | None = None,
+        similarity: float = 0.8,
+        max_reuse: int = 3,
+        follow_up_words: int = 8,
+        embed_timeout: float = 0.3,
+    ):
+        self.embed = embed
+        self.similarity = similarity
+        self.max_reuse = max_reuse
+        self.follow_up_words = follow_up_words
+        self.embed_timeout = embed_timeout
+
+        # The last searched query, its embedding and the context it found
+        self.query: str | None = None
+        self.context = ""
+        self._vector = None
+        self._reused = 0
+        # This turn's message and embedding, kept if it goes on to search
+        self._candidate: tuple = (None, None)
+        self.decisions = {SEARCH: 0, REUSE: 0, SKIP: 0}
+
+    async def decide(self, message: str, timeout: float | None = None) -> tuple[str, str]:
+        """Return (decision, reason) for this turn's message.
+
+        `timeout` caps the similarity check's embedding further, so it can
+        share the turn's retrieval deadline.
+        """
+        decision, reason = await self._decide(message.strip(), timeout)
+        self.decisions[decision] += 1
+        if decision == REUSE:
+            self._reused += 1
+        return decision, reason
+
+    async def _decide(self, message: str, timeout: float | None) -> tuple[str, str]:
+        if ACKNOWLEDGEMENT.fullmatch(message):
+            return SKIP, "acknowledgement"
+        if TRIVIAL.fullmatch(message):
+            # A bare "yes"/"no" answers the last turn; nothing new to look up
+            return (SKIP, "answer") if self.query is None else (REUSE, "answer")
+        if self.query is None:
+            return SEARCH, "no recent context"
+        if self._reused >= self.max_reuse:
+            return SEARCH, "reuse limit"
+
+        if (
+            len(message.split()) <= self.follow_up_words
+            and FOLLOW_UP.search(message)
+            and not NAME.search(message)
+        ):
+            return REUSE, "follow-up"
+
+        vector = await self._embed(message, timeout)
+        self._candidate = (message, vector)
+        if vector is not None and self._vector is not None:
+            if cosine(vector, self._vector) >= self.similarity:
+                return REUSE, "similar query"
+        return SEARCH, "new topic"
+
+    def remember(self, query: str, context: str) -> None:
+        """Record a fresh search, the baseline for the following turns."""
+        self.query = query
+        self.context = context
+        self._reused = 0
+        message, vector = self._candidate
+        self._candidate = (None, None)
+        if message == query.strip():
+            self._vector = vector
+        else:
+            self._vector = None
+            if self.embed is not None:
+                # Embedded for the search already, so this hits the embedder's cache
+                task = asyncio.ensure_future(self._embed(query))
+                task.add_done_callback(lambda t: self._set_vector(query, t))
+
+    def reset(self) -> None:
+        """Forget the previous turn (a new conversation)."""
+        self.query = None
+        self.context = ""
+        self._vector = None
+        self._reused = 0
+        self._candidate = (None, None)
+
+    def _set_vector(self, query: str, task: asyncio.Future) -> None:
+        if query == self.query and not task.cancelled():
+            self._vector = task.result()
+
+    async def _embed(self, text: str, timeout: float | None = None) -> list[float] | None:
+        if self.embed is None:
+            return None
+        if timeout is not None:
+            timeout = min(timeout, self.embed_timeout)
+        try:
+            # Normalized like graph searches, so the two share cache entries
+            return await asyncio.wait_for(
+                self.embed(text.replace("\n", " ")),
+                self.embed_timeout if timeout is None else timeout,
+            )
+        except Exception:
+            return None
+
+    def stats(self) -> dict:
+        total = sum(self.decisions.values())
+        return {
+            **self.decisions,
+            "avoided": (total - self.decisions[SEARCH]) / total if total else 0.0,
+        }
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
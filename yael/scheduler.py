@@ -0,0 +1,150 @@
+"""
+Foreground/background scheduling from what the user is doing.
+
+The governors already let interactive calls jump the queue. The
+scheduler also decides how much background work (episode extraction,
+profile refreshes, imports) may run at all: none while a reply is being
+produced, a trickle while the user is typing, and as much as the limits
+allow when idle.
+
+The chat process publishes its activity to ~/.yael/activity.json, so an
+import running in another process can follow it and yield the same way.
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .config import CONFIG_DIR
+from .limits import Governor, governor
+
+ACTIVITY_FILE = CONFIG_DIR / "activity.json"
+
+IDLE = "idle"
+TYPING = "typing"
+REPLYING = "replying"
+
+# A published "replying" state expires after this long, in case the chat
+# process died mid-reply
+REPLYING_TTL = 120.0
+
+
+class Scheduler:
+    """Sets the governors' background limits from user activity."""
+
+    def __init__(
+        self,
+        governors: list[Governor],
+        limits: dict[str, int | None] | None = None,
+        typing_grace: float = 2.0,
+        state_path: Path | None = None,
+        overrides: dict[str, dict[str, int | None]] | None = None,
+    ):
+        self.governors = governors
+        # Background calls allowed per governor in each state (None = no cap)
+        self.limits = {IDLE: None, TYPING: 1, REPLYING: 0, **(limits or {})}
+        # Governor name -> states whose limit differs for that governor
+        self.overrides = overrides or {}
+        self.typing_grace = typing_grace
+        self.state_path = state_path
+
+        self.state = IDLE
+        self.changes = 0
+        self._replies = 0
+        self._typing_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._published = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict, state_path: Path | None = None) -> "Scheduler":
+        settings = config["scheduler"]
+        return cls(
+            [governor("extraction"), governor("embedding"), governor("chat")],
+            limits={TYPING: settings["typing_background"], REPLYING: settings["replying_background"]},
+            typing_grace=settings["typing_grace"],
+            state_path=state_path,
+            # Prefetches embed their queries while the reply streams
+            overrides={"embedding": {REPLYING: settings["replying_embedding"]}},
+        )
+
+    def typing(self) -> None:
+        """Note a keystroke; the user counts as typing for typing_grace seconds."""
+        self._typing_until = time.monotonic() + self.typing_grace
+        self._update()
+        if self.state == TYPING and time.monotonic() - self._published > self.typing_grace / 2:
+            self._publish()  # Keep the published state from expiring mid-sentence
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.typing_grace, self._update)
+
+    @contextmanager
+    def replying(self):
+        """Mark a chat turn (retrieval and generation) as in progress."""
+        self._replies += 1
+        self._typing_until = 0.0
+        self._update()
+        try:
+            yield
+        finally:
+            self._replies -= 1
+            self._update()
+
+    def _update(self) -> None:
+        if self._replies:
+            state = REPLYING
+        elif time.monotonic() < self._typing_until:
+            state = TYPING
+        else:
+            state = IDLE
+        if state != self.state:
+            self._apply(state)
+            self._publish()
+
+    def _apply(self, state: str) -> None:
+        self.state = state
+        self.changes += 1
+        for gov in self.governors:
+            limits = self.overrides.get(gov.name, {})
+            gov.set_background_limit(limits.get(state, self.limits[state]))
+
+    def _publish(self) -> None:
+        if self.state_path is None:
+            return
+        self._published = time.monotonic()
+        ttl = {IDLE: 0.0, TYPING: self.typing_grace, REPLYING: REPLYING_TTL}[self.state]
+        record = {"state": self.state, "pid": os.getpid(), "expires": time.time() + ttl}
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(record))
+            os.replace(tmp, self.state_path)
+        except OSError:
+            pass
+
+    def observed(self) -> str:
+        """The activity another process published, or idle if none is current."""
+        try:
+            record = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return IDLE
+        if record.get("pid") == os.getpid() or time.time() >= record.get("expires", 0):
+            return IDLE
+        return record.get("state", IDLE)
+
+    async def follow(self, interval: float = 0.5) -> None:
+        """Track another process's published activity until cancelled."""
+        while True:
+            state = self.observed()
+            if state != self.state:
+                self._apply(state)
+            await asyncio.sleep(interval)
+
+    def close(self) -> None:
+        """Lift the background limits and publish that the user is gone."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._replies = 0
+        self._typing_until = 0.0
+        self._update()
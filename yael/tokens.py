@@ -0,0 +1,12 @@
+"""
+Cheap token estimates.
+
+A characters-per-token heuristic is accurate enough for budgeting
+prompts and episodes, and avoids tying Yael to one model's tokenizer.
+"""
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN